@@ -0,0 +1,177 @@
+"""
+Benchmark the load -> construct -> analyze pipeline of a Run on synthetic mat files
+(see synthetic_data.py). Each stage reports its wall time and its peak memory allocated
+by python/numpy (tracemalloc).
+
+The cache (lib/general_funcs/cache_funcs.py) is pointed at a temporary folder, --cache
+runs every stage twice so both the cold (decode the mat file) and warm (read the cache)
+loads are reported.
+
+Usage:
+    python benchmarks/run_benchmarks.py --duration 3600 --json results.json
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+# Let the script be run from anywhere, the library is imported from the repo root
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Library imports
+from benchmarks.synthetic_data import make_synthetic_campaign
+
+def measure(stage, function, results):
+    """
+    Run function and store its wall time (s) and peak allocated memory (MB)
+    """
+    tracemalloc.reset_peak()
+    start_memory, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+
+    output = function()
+
+    wall_time = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+
+    results.append({"stage": stage,
+                    "wall_time_s": wall_time,
+                    "peak_memory_MB": (peak_memory - start_memory) / 1e6
+    })
+
+    return output
+
+def check_chunked_pressure_eta(run, chunk_size, overlap = 2**12, tolerance = 0.01):
+    """
+    Check that the chunked pressure reconstruction matches the whole record. The first
+    and last overlap samples are skipped, the whole record's FFT wraps its ends onto each other
+
+    Returns:
+    - Largest difference relative to the largest eta
+    """
+    # Import here so the import time of the library is its own stage
+    import numpy as np
+
+    eta, _, _ = run.calc_pressure_eta(0.2)
+    eta_chunked, _, _ = run.calc_pressure_eta(0.2, chunk_size = chunk_size, overlap = overlap)
+
+    interior = slice(overlap, eta.shape[-1] - overlap)
+    difference = np.max(np.abs(eta_chunked[:, interior] - eta[:, interior])) / np.max(np.abs(eta))
+
+    if difference > tolerance:
+        raise ValueError(f"The chunked pressure eta is off by {100 * difference:.2f} % of the largest eta\n")
+
+    return difference
+
+def benchmark_run(data_root, run_id, use_cache, label, results, block_duration = None):
+    """
+    Time each stage of loading and analyzing one run. block_duration also times the
+    chunked analyses (see Run.iter_blocks)
+    """
+    # Import here so the import time of the library is its own stage
+    from lib.data_classes.Run import Run
+
+    run = Run(run_id, wave_file_path = os.path.join(data_root, "WG", f"{run_id}.mat"),
+              ADV_file_path = os.path.join(data_root, "ADV", f"{run_id}.mat"),
+              use_cache = use_cache, verbose = False)
+
+    measure(f"{label}load_wave_data", run.load_wave_data, results)
+    measure(f"{label}construct_wave_gauge_wse", run.construct_wave_gauge_wse, results)
+    measure(f"{label}construct_flume_wse", run.construct_flume_wse, results)
+    measure(f"{label}load_adv_data", lambda: run.load_adv_data(lazy = False), results)
+    measure(f"{label}load_pressure_gauge_data",
+            lambda: run.load_pressure_gauge_data(os.path.join(data_root, "P0", f"{run_id}.mat")), results)
+    measure(f"{label}calc_wave_statistics", run.calc_wave_statistics, results)
+    measure(f"{label}calc_spectra", run.calc_spectra, results)
+    measure(f"{label}calc_ensemble_statistics",
+            lambda: run.calc_ensemble_statistics(run.flume_eta, run.date_time), results)
+
+    if block_duration is not None:
+        measure(f"{label}blocks: calc_wave_statistics",
+                lambda: run.calc_wave_statistics(block_duration = block_duration), results)
+        measure(f"{label}blocks: calc_spectra",
+                lambda: run.calc_spectra(block_duration = block_duration), results)
+        measure(f"{label}blocks: calc_channel_moments",
+                lambda: run.calc_channel_moments("adv", "u", block_duration = block_duration), results)
+
+        # Chunks of the same length as the blocks
+        from lib.general_funcs.datetime_funcs import calc_sample_period
+
+        chunk_size = int(round(block_duration / calc_sample_period(run.pressure_gauges[0].date_time)))
+        difference = measure(f"{label}blocks: calc_pressure_eta (checked)",
+                             lambda: check_chunked_pressure_eta(run, chunk_size), results)
+        print(f"{label}chunked pressure eta matches the whole record to {100 * difference:.3f} %")
+
+    return run
+
+def print_results(results):
+    """
+    Print the results as a table
+    """
+    print(f"{'stage':<44}{'wall time (s)':>16}{'peak memory (MB)':>20}")
+
+    for result in results:
+        print(f"{result['stage']:<44}{result['wall_time_s']:>16.4f}{result['peak_memory_MB']:>20.2f}")
+
+def main(args):
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix = "barsed_bench_") as temp_dir:
+        data_root = args.data_root or os.path.join(temp_dir, "data")
+
+        # The cache starts empty so the first load is cold
+        os.environ["BARSED_CACHE_DIR"] = os.path.join(temp_dir, "cache")
+
+        if args.data_root is None:
+            start = time.perf_counter()
+            make_synthetic_campaign(data_root, num_runs = 1, duration = args.duration,
+                                    sample_frequency = args.sample_frequency,
+                                    num_wave_gauges = args.num_wave_gauges, num_ADVs = args.num_advs,
+                                    num_sites = args.num_sites)
+            print(f"Wrote the synthetic data in {time.perf_counter() - start:.2f} s\n")
+
+        tracemalloc.start()
+
+        measure("import lib", lambda: __import__("lib.data_classes.Run"), results)
+
+        benchmark_run(data_root, args.run_id, args.cache, "cold: " if args.cache else "", results,
+                      args.block_duration)
+
+        if args.cache:
+            benchmark_run(data_root, args.run_id, True, "warm: ", results, args.block_duration)
+
+        tracemalloc.stop()
+
+    print_results(results)
+
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            json.dump({"settings": vars(args), "results": results}, file, indent = 2)
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark the Run pipeline on synthetic data")
+    parser.add_argument("--data-root", default = None,
+                        help = "Existing data root to benchmark, synthetic data is written if it's not given")
+    parser.add_argument("--run-id", default = "RUN001")
+    parser.add_argument("--duration", type = float, default = 600, help = "Length of the run (s)")
+    parser.add_argument("--sample-frequency", type = float, default = 50)
+    parser.add_argument("--num-wave-gauges", type = int, default = 17)
+    parser.add_argument("--num-advs", type = int, default = 6)
+    parser.add_argument("--num-sites", type = int, default = 2)
+    parser.add_argument("--cache", action = "store_true", help = "Use the cache and report cold and warm loads")
+    parser.add_argument("--block-duration", type = float, default = None,
+                        help = "Also time the chunked analyses with blocks of this many seconds")
+    parser.add_argument("--json", default = None, help = "Write the results to a JSON file")
+
+    main(parser.parse_args())
@@ -0,0 +1,179 @@
+"""
+Write synthetic BarSed mat files with the same struct layouts as the real data so the
+loaders can be benchmarked without the data on D:\\ERDC\\BarSed.
+
+    <root>/WG/RUNxxx.mat    eta struct:  date, eta, x, y, eta_wm, x_wm
+    <root>/ADV/RUNxxx.mat   adv struct:  per, H, date_matlab, sensor_names, z, t_norm, u, v, w, ...
+    <root>/P0/RUNxxx.mat    p0 cell:     one (3, 1) cell per site of
+                                         {date, pressure, {indices_start_end, date_start_end,
+                                                           period_realization, percent_err_period}}
+    <root>/bathy.mat        bathy:       (num_points, 2) x, z of the flume profile
+
+The size scales with the duration and the number of wave gauges, ADVs and pressure sites.
+
+Usage:
+    python benchmarks/synthetic_data.py <root> --duration 3600 --num-runs 2
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import os
+import argparse
+import numpy as np
+import scipy.io
+
+# Matlab datenum of the first sample
+START_DATENUM = 738000.5
+
+# Velocity keys in the ADV file, the ensemble averages are (num_sensors, num_ensemble_times)
+ADV_VELOCITY_KEYS  = ["u_inter", "v_inter", "w_inter", "u", "v", "w", "u_ens", "v_ens", "w_ens"]
+ADV_ENS_AVG_KEYS   = ["u_ens_avg", "v_ens_avg", "w_ens_avg"]
+
+def make_times(duration, sample_frequency):
+    """
+    Matlab datenums and seconds of the samples
+    """
+    seconds = np.arange(int(duration * sample_frequency)) / sample_frequency
+
+    return START_DATENUM + seconds / 86400, seconds
+
+def make_waves(seconds, wave_period, wave_height, rng, noise = 0.01):
+    """
+    Regular waves plus noise
+    """
+    return (0.5 * wave_height * np.sin(2 * np.pi * seconds / wave_period)
+            + noise * rng.standard_normal(seconds.shape))
+
+def write_wave_file(file_path, datenums, seconds, num_wave_gauges, wave_period, wave_height, rng):
+    """
+    Write the eta struct of the wave gauges and wave maker
+    """
+    eta = np.vstack([make_waves(seconds, wave_period, wave_height, rng) for _ in range(num_wave_gauges)])
+
+    eta_struct = {"date": datenums,
+                  "eta": eta,
+                  "x": np.linspace(10, 80, num_wave_gauges),
+                  "y": np.zeros(num_wave_gauges),
+                  "eta_wm": make_waves(seconds, wave_period, wave_height, rng),
+                  "x_wm": 0.2 * np.sin(2 * np.pi * seconds / wave_period)
+    }
+
+    scipy.io.savemat(file_path, {"eta": eta_struct})
+
+def write_adv_file(file_path, datenums, seconds, num_ADVs, wave_period, wave_height, rng,
+                   num_ensemble_times = 40):
+    """
+    Write the adv struct, the sensor names are a (num_ADVs, 1) cell
+    """
+    sensor_names = np.empty((num_ADVs, 1), dtype = object)
+    for i in range(num_ADVs):
+        sensor_names[i, 0] = f"ADV{i + 1}"
+
+    adv_struct = {"per": float(wave_period),
+                  "H": float(wave_height),
+                  "date_matlab": datenums,
+                  "sensor_names": sensor_names,
+                  "z": np.linspace(0.1, 0.5, num_ADVs),
+                  "t_norm": np.linspace(0, 1, num_ensemble_times)
+    }
+
+    for key in ADV_VELOCITY_KEYS:
+        adv_struct[key] = np.vstack([make_waves(seconds, wave_period, 0.5, rng, noise = 0.05)
+                                     for _ in range(num_ADVs)])
+
+    for key in ADV_ENS_AVG_KEYS:
+        adv_struct[key] = rng.standard_normal((num_ADVs, num_ensemble_times))
+
+    scipy.io.savemat(file_path, {"adv": adv_struct})
+
+def write_pressure_file(file_path, datenums, seconds, num_sites, wave_period, wave_height, rng,
+                        water_depth = 1.0):
+    """
+    Write the p0 cell, one (3, 1) cell per site. The realizations are one wave period long
+    and their indices are 1 based like matlab
+    """
+    num_times = len(seconds)
+    samples_per_wave = int(round(wave_period / (seconds[1] - seconds[0])))
+
+    starts = np.arange(0, num_times - samples_per_wave, samples_per_wave) + 1
+    ends = starts + samples_per_wave - 1
+
+    p0 = np.empty((1, num_sites), dtype = object)
+
+    for site in range(num_sites):
+        realizations = np.empty((1, 4), dtype = object)
+        realizations[0, 0] = np.vstack([starts, ends]).astype(float)
+        realizations[0, 1] = np.vstack([datenums[starts - 1], datenums[ends - 1]])
+        realizations[0, 2] = np.full((1, len(starts)), float(wave_period))
+        realizations[0, 3] = np.zeros((1, len(starts)))
+
+        site_cell = np.empty((3, 1), dtype = object)
+        site_cell[0, 0] = datenums.reshape(-1, 1)
+        site_cell[1, 0] = (water_depth + make_waves(seconds, wave_period, wave_height, rng)).reshape(-1, 1)
+        site_cell[2, 0] = realizations
+
+        p0[0, site] = site_cell
+
+    scipy.io.savemat(file_path, {"p0": p0})
+
+def write_bathy_file(file_path):
+    """
+    Write a flume profile: flat, a slope, the sand pit and the beach
+    """
+    bathy = np.array([[-2.0, 0.0], [0.0, 0.0], [10.0, 0.0], [20.0, 0.3], [30.0, 0.6], [35.0, 0.75],
+                      [40.0, 0.9], [45.0, 1.05], [50.0, 1.2], [52.0, 1.2], [56.0, 1.2], [65.0, 1.5],
+                      [80.0, 2.0], [104.0, 3.0]])
+
+    scipy.io.savemat(file_path, {"bathy": bathy})
+
+def make_synthetic_campaign(root, num_runs = 1, duration = 600, sample_frequency = 50,
+                            num_wave_gauges = 17, num_ADVs = 6, num_sites = 2,
+                            wave_period = 4.0, wave_height = 0.2, seed = 0):
+    """
+    Write the mat files of num_runs runs (RUN001, RUN002, ...) and bathy.mat to root
+
+    Parameters:
+    - duration: Length of each run (s)
+    - sample_frequency: Sample frequency of all of the instruments (Hz)
+
+    Returns:
+    - list of the run ids
+    """
+    rng = np.random.default_rng(seed)
+
+    for folder in ["WG", "ADV", "P0"]:
+        os.makedirs(os.path.join(root, folder), exist_ok = True)
+
+    datenums, seconds = make_times(duration, sample_frequency)
+
+    run_ids = [f"RUN{i + 1:03d}" for i in range(num_runs)]
+
+    for run_id in run_ids:
+        write_wave_file(os.path.join(root, "WG", f"{run_id}.mat"), datenums, seconds,
+                        num_wave_gauges, wave_period, wave_height, rng)
+        write_adv_file(os.path.join(root, "ADV", f"{run_id}.mat"), datenums, seconds,
+                       num_ADVs, wave_period, wave_height, rng)
+        write_pressure_file(os.path.join(root, "P0", f"{run_id}.mat"), datenums, seconds,
+                            num_sites, wave_period, wave_height, rng)
+
+    write_bathy_file(os.path.join(root, "bathy.mat"))
+
+    return run_ids
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Write synthetic BarSed mat files")
+    parser.add_argument("root", help = "Folder the data is written to")
+    parser.add_argument("--num-runs", type = int, default = 1)
+    parser.add_argument("--duration", type = float, default = 600, help = "Length of each run (s)")
+    parser.add_argument("--sample-frequency", type = float, default = 50)
+    parser.add_argument("--num-wave-gauges", type = int, default = 17)
+    parser.add_argument("--num-advs", type = int, default = 6)
+    parser.add_argument("--num-sites", type = int, default = 2)
+    args = parser.parse_args()
+
+    make_synthetic_campaign(args.root, num_runs = args.num_runs, duration = args.duration,
+                            sample_frequency = args.sample_frequency,
+                            num_wave_gauges = args.num_wave_gauges, num_ADVs = args.num_advs,
+                            num_sites = args.num_sites)
@@ -0,0 +1,48 @@
+"""
+Library for processing the BarSed flume experiment data.
+
+The heavy dependencies are imported lazily: matplotlib is only imported by the
+quick_*plot functions, scipy and pandas when a mat file is read or a function that
+needs them is called (the imports are at the top of those functions, marked
+"Lazy import"). Importing the data classes, eg. in the worker processes of
+Campaign.load, only needs numpy.
+
+The main classes can be imported from the package and are loaded on first use:
+    from lib import Run, Campaign
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+import importlib
+
+# Name exported by the package: module it's defined in
+_lazy_exports = {"Run": "lib.data_classes.Run",
+                 "Campaign": "lib.data_classes.Campaign",
+                 "Bathymetry": "lib.data_classes.Bathymetry",
+                 "WaveGauge": "lib.data_classes.WaveGauge",
+                 "WaveMaker": "lib.data_classes.WaveMaker",
+                 "ADV": "lib.data_classes.ADV",
+                 "ADVArray": "lib.data_classes.ADVArray",
+                 "PressureSensor": "lib.data_classes.PressureSensor",
+                 "FlumeLocations": "lib.data_classes.FlumeLocations"
+}
+
+__all__ = list(_lazy_exports.keys())
+
+def __getattr__(name):
+    """
+    Import the module of an exported name the first time it's used (PEP 562)
+    """
+    if name not in _lazy_exports:
+        raise AttributeError(f"module 'lib' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module(_lazy_exports[name]), name)
+
+    # Store it so __getattr__ isn't called again
+    globals()[name] = value
+
+    return value
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
@@ -1,14 +1,96 @@
 # Standard imports
+from collections.abc import MutableMapping
 import numpy as np
-import matplotlib.pyplot as plt
 
 # Library imports
+from lib.general_funcs.plot_funcs import plot_decimated
+
+
+class LazyVelocityDict(MutableMapping):
+    """
+    Dict of velocity data where a value can be a deferred loader.
+    The loader is only called the first time the key is accessed, the result is kept
+    until release() is called.
+    """
+
+    def __init__(self, keys):
+        self._data    = {key: None for key in keys}
+        self._loaders = {}
+
+    def set_loader(self, key, loader):
+        """
+        Set a function (no arguments) that returns the data of key when it's first needed
+        """
+        self._data[key] = None
+        self._loaders[key] = loader
+
+    def is_loaded(self, key):
+        """
+        Check if the data of the key is in memory
+        """
+        return self._data[key] is not None
+
+    def has_data(self, key):
+        """
+        Check if the key has data, either loaded or deferred
+        """
+        return self._data[key] is not None or key in self._loaders
+
+    def has_loader(self, key):
+        """
+        Check if the key's data can be loaded again after it's released
+        """
+        return key in self._loaders
+
+    def release(self, key):
+        """
+        Drop the loaded data of key, it's loaded again on the next access.
+        Only keys with a loader can be released, otherwise the data would be lost
+        """
+        if key not in self._loaders:
+            raise ValueError(f"Key: {key} doesn't have a loader so releasing it would delete the data.\n"
+                             "Only lazily loaded keys can be released")
+
+        self._data[key] = None
+
+    def __getitem__(self, key):
+        # Load the data the first time it's needed
+        if self._data[key] is None and key in self._loaders:
+            self._data[key] = self._loaders[key]()
+
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        # Setting the data directly replaces any loader
+        self._loaders.pop(key, None)
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        self._loaders.pop(key, None)
+        del self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        loaded = {key: ("loaded" if value is not None else
+                        "deferred" if key in self._loaders else None)
+                  for key, value in self._data.items()}
+        return f"LazyVelocityDict({loaded})"
 
 
 class ADV:
     """
     Class to represent an ADV
     """
+    # List of the valid velocity keys
+    valid_ADV_keys = ["u_inter", "v_inter", "w_inter",
+                      "u", "v", "w", "u_ens", "v_ens", "w_ens",
+                      "u_ens_avg", "v_ens_avg", "w_ens_avg"
+    ]
 
     def __init__(self, sensor_name, sensor_id, date_time, flume_height, normalized_time):
         # Init variables for later storage
@@ -20,19 +102,9 @@ class ADV:
 
         # TODO: Might change this into dataframes in the future
 
-        self.vel = {'u_inter': None, 
-                    'v_inter': None,
-                    'w_inter': None,
-                    'u': None,
-                    'v': None,
-                    'w': None,
-                    'u_ens': None,
-                    'v_ens': None,
-                    'w_ens': None,
-                    'u_ens_avg': None,
-                    'v_ens_avg': None,
-                    'w_ens_avg': None
-        }
+        # The values can be deferred loaders (see store_velocity_loader) so the
+        # data is only read from disk when it's used
+        self.vel = LazyVelocityDict(ADV.valid_ADV_keys)
         # Init list for later storage
         self.inter_vel = {
                             }
@@ -76,14 +148,46 @@ class ADV:
         else:
             raise KeyError(f"Key: {key} is not a valid key.\n"
                            "Valid keys are:\n"
-                           f"{self.vel.keys()}\n"
+                           f"{list(self.vel.keys())}\n"
                            )    
 
-    def quick_plot(self, keys, figsize = (8, 4), axs = None, legend = False, **kwargs):
+    def store_velocity_loader(self, key, loader):
+        """
+        Store a function that loads the velocity data of key the first time it's used
+        """
+        if key in self.vel.keys():
+            self.vel.set_loader(key, loader)
+        else:
+            raise KeyError(f"Key: {key} is not a valid key.\n"
+                           "Valid keys are:\n"
+                           f"{list(self.vel.keys())}\n"
+                           )
+
+    def release_velocity_data(self, keys = "all"):
+        """
+        Free the memory of loaded velocity data, it's read again when it's next used.
+        "all" releases every key with a loader, the keys that were stored directly are kept.
+        The data of an ADV made by ADVArray.get_sensor are views of the array's rows so this
+        only drops the views, the memory is freed when the ADVArray releases the key too
+        (see Run.release_adv_data)
+        """
+        if keys == "all":
+            keys = [key for key in self.vel.keys() if self.vel.has_loader(key)]
+        elif not isinstance(keys, list):
+            keys = [keys]
+
+        for key in keys:
+            self.vel.release(key)
+
+    def quick_plot(self, keys, figsize = (8, 4), axs = None, legend = False, max_points = None,
+                   method = "minmax", **kwargs):
         """
         Generate a quick plot for the given keys
+        The data is decimated to max_points (see plot_funcs.plot_decimated)
         """
-        
+        # Lazy import (see lib/__init__.py)
+        import matplotlib.pyplot as plt
+
         if not isinstance(keys, list):
             # Make the keys into a list
             keys = [keys]
@@ -120,7 +224,8 @@ class ADV:
                 time_label = "Time (s)"
 
             # Plot the data
-            ax.plot(time, self.vel[key], label = key, **kwargs)
+            plot_decimated(ax, time, self.vel[key], max_points = max_points, method = method,
+                           label = key, **kwargs)
 
             # Format the plot
             ax.set_ylabel("Velocity (m/s)")
@@ -132,4 +237,4 @@ class ADV:
 
             plt.tight_layout()
 
-        # TODO: Add function to calculate the depth averaged velocity
\ No newline at end of file
+        # NOTE: The depth averaged velocity is calculated across the sensors by ADVArray.depth_averaged_velocity
\ No newline at end of file
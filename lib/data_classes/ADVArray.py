@@ -0,0 +1,238 @@
+"""
+Class to represent all of the ADVs of a run as one array per velocity key
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+from functools import partial
+import numpy as np
+
+# Library imports
+from lib.data_classes.ADV import ADV, LazyVelocityDict
+from lib.general_funcs.datetime_funcs import time_slice
+
+
+class ADVArray:
+    """
+    Struct-of-arrays representation of the ADVs.
+    Each velocity key is stored as one (num_sensors, num_times) array so cross-sensor
+    calculations don't have to loop over the ADV objects
+    """
+
+    # Same keys as the ADV objects so the two can't drift apart
+    velocity_keys = ADV.valid_ADV_keys
+
+    def __init__(self, sensor_names, flume_height, date_time, normalized_time):
+        self.sensor_names = list(sensor_names)
+        self.sensor_ids   = [i + 1 for i in range(len(self.sensor_names))]
+        self.flume_height = np.asarray(flume_height, dtype = float)   # Height of each ADV (m)
+        self.date_time    = date_time
+        self.norm_t       = normalized_time
+        self.num_sensors  = len(self.sensor_names)
+
+        # (num_sensors, num_times) arrays, the values can be deferred loaders
+        self.vel = LazyVelocityDict(ADVArray.velocity_keys)
+
+        # (num_sensors, num_times) velocity with the QC'd samples replaced, {key: array} (see Run.run_qc)
+        self.cleaned_vel = {}
+
+    def __str__(self):
+        """
+        Returns information about the object, print( obj ) is used
+        """
+        return (f"Num sensors: {self.num_sensors}\n"
+                f"Sensor Names: {self.sensor_names}\n"
+                f"Flume Heights, z (m): {self.flume_height}"
+        )
+
+    def _check_key(self, key):
+        """
+        Raise an error if the key isn't a valid velocity key
+        """
+        if key not in self.vel.keys():
+            raise KeyError(f"Key: {key} is not a valid key.\n"
+                           "Valid keys are:\n"
+                           f"{list(self.vel.keys())}\n"
+                           )
+
+    def store_velocity_data(self, key, velocity_data):
+        """
+        Store the (num_sensors, num_times) velocity data of a key
+        """
+        self._check_key(key)
+
+        velocity_data = np.asarray(velocity_data)
+
+        if velocity_data.shape[0] != self.num_sensors:
+            raise ValueError(f"The first dimension of the data: {velocity_data.shape[0]}\n"
+                             f"Doesn't match the number of sensors: {self.num_sensors}")
+
+        self.vel[key] = velocity_data
+
+    def store_cleaned_velocity(self, key, cleaned_data):
+        """
+        Store the (num_sensors, num_times) cleaned velocity of a key
+        """
+        self._check_key(key)
+
+        cleaned_data = np.asarray(cleaned_data)
+
+        if cleaned_data.shape[0] != self.num_sensors:
+            raise ValueError(f"The first dimension of the data: {cleaned_data.shape[0]}\n"
+                             f"Doesn't match the number of sensors: {self.num_sensors}")
+
+        self.cleaned_vel[key] = cleaned_data
+
+    def store_velocity_loader(self, key, loader):
+        """
+        Store a function that loads the (num_sensors, num_times) data of key the first time it's used
+        """
+        self._check_key(key)
+
+        self.vel.set_loader(key, loader)
+
+    def release_velocity_data(self, keys = "all"):
+        """
+        Free the memory of loaded velocity data, it's read again when it's next used.
+        "all" releases every key with a loader, the keys that were stored directly
+        (eg. load_adv_data(lazy = False)) are kept. The ADVs from get_sensor hold views of
+        the rows so the memory is only freed once they release the key too (see Run.release_adv_data)
+        """
+        if keys == "all":
+            keys = [key for key in self.vel.keys() if self.vel.has_loader(key)]
+        elif not isinstance(keys, list):
+            keys = [keys]
+
+        for key in keys:
+            self.vel.release(key)
+
+    def get_sensor_velocity(self, key, sensor_index):
+        """
+        Get the velocity of one sensor, this is a view of the row not a copy
+        """
+        return self.vel[key][sensor_index]
+
+    def get_sensor(self, sensor_index):
+        """
+        Construct an ADV object for one sensor.
+        Its velocity data are views of this array's rows
+        """
+        Adv_object = ADV(self.sensor_names[sensor_index], self.sensor_ids[sensor_index],
+                         self.date_time, self.flume_height[sensor_index], self.norm_t)
+
+        # Only link the keys that have data or a loader
+        for key in self.vel.keys():
+            if self.vel.has_data(key):
+                Adv_object.store_velocity_loader(key, partial(self.get_sensor_velocity, key, sensor_index))
+
+        # Views of the cleaned rows
+        for key, cleaned_data in self.cleaned_vel.items():
+            Adv_object.cleaned_vel[key] = cleaned_data[sensor_index]
+
+        return Adv_object
+
+    def to_ADVs(self):
+        """
+        Construct the ADV objects of all of the sensors
+        """
+        return [self.get_sensor(i) for i in range(self.num_sensors)]
+
+    def _get_window_velocity(self, key, window_slice):
+        """
+        Get the time window of a key's data (a view). The ensemble averages are on the
+        normalized time so they're not sliced
+        """
+        velocity_data = self.vel[key]
+
+        if "ens_avg" in key or velocity_data.shape[-1] != len(self.date_time):
+            return velocity_data
+
+        return velocity_data[..., window_slice]
+
+    def window(self, start = None, end = None):
+        """
+        Get an ADVArray with only the data in the time window [start, end).
+        The velocity data are views of this array's data, they're sliced when first used
+        """
+        window_slice = time_slice(self.date_time, start, end)
+
+        ADV_array = ADVArray(self.sensor_names, self.flume_height, self.date_time[window_slice],
+                             self.norm_t)
+
+        for key in self.vel.keys():
+            if self.vel.has_data(key):
+                ADV_array.store_velocity_loader(key, partial(self._get_window_velocity, key, window_slice))
+
+        for key, cleaned_data in self.cleaned_vel.items():
+            ADV_array.cleaned_vel[key] = cleaned_data[..., window_slice]
+
+        return ADV_array
+
+    def _sorted_by_height(self, key):
+        """
+        Get the flume heights and the velocity data sorted from the bottom to the top
+        """
+        order = np.argsort(self.flume_height)
+
+        return self.flume_height[order], np.asarray(self.vel[key])[order]
+
+    def depth_averaged_velocity(self, key = "u"):
+        """
+        Calc the depth averaged velocity at each time.
+        The profile is integrated with the trapezoid rule over the heights of the sensors
+        (no extrapolation to the bed or the free surface)
+
+        Returns:
+        - (num_times,) array. NaN where any of the sensors is NaN
+        """
+        if self.num_sensors < 2:
+            raise ValueError("At least two sensors are needed to depth average the velocity")
+
+        flume_height, velocity = self._sorted_by_height(key)
+
+        # Height of each of the layers between the sensors
+        dz = np.diff(flume_height)
+
+        # Trapezoid rule over the sensors for all of the times at once
+        layer_velocity = 0.5 * (velocity[1:] + velocity[:-1])
+        integral = np.tensordot(dz, layer_velocity, axes = (0, 0))
+
+        return integral / (flume_height[-1] - flume_height[0])
+
+    def vertical_profile(self, key, time_index):
+        """
+        Get the vertical velocity profile at a time index (or an array of time indices)
+
+        Returns:
+        - flume_height: (num_sensors,) sorted from the bottom to the top
+        - velocity: (num_sensors,) or (num_sensors, num_indices)
+        """
+        order = np.argsort(self.flume_height)
+
+        # Select the times before sorting so only the profile is copied
+        return self.flume_height[order], np.asarray(self.vel[key][:, time_index])[order]
+
+    def sensor_statistics(self, key):
+        """
+        Calc the statistics of each sensor, NaNs are ignored
+
+        Returns:
+        - pandas.DataFrame with one row per sensor
+        """
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
+
+        velocity = np.asarray(self.vel[key], dtype = float)
+
+        return pd.DataFrame({"flume_height": self.flume_height,
+                             "mean": np.nanmean(velocity, axis = 1),
+                             "std": np.nanstd(velocity, axis = 1),
+                             "min": np.nanmin(velocity, axis = 1),
+                             "max": np.nanmax(velocity, axis = 1),
+                             "rms": np.sqrt(np.nanmean(velocity**2, axis = 1)),
+                             "num_valid": np.sum(np.isfinite(velocity), axis = 1)
+                             },
+                             index = pd.Index(self.sensor_names, name = "sensor_name")
+        )
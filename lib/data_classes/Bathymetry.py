@@ -0,0 +1,246 @@
+"""
+Class to represent the bathymetry of the flume: the fixed flume profile (bathy.mat) and
+the initial bed level of the sand at each site for each run (initial_bed_level.mat).
+
+Bathymetry.load caches the loaded objects so analyses can ask for the bathymetry in a loop
+without reading the mat files again.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import os
+import re
+import numpy as np
+
+# Loaded Bathymetry objects, {(file paths, modified times, pit indices): Bathymetry}
+_bathymetry_cache = {}
+
+class Bathymetry:
+    """
+    Flume profile and sand bed levels with vectorized depth lookups
+    """
+
+    def __init__(self, bathy_file_path = None, bed_level_file_path = None, pit_indices = (9, 10)):
+        self.bathy_file_path = bathy_file_path           # Path to bathy.mat
+        self.bed_level_file_path = bed_level_file_path   # Path to initial_bed_level.mat
+
+        # Zero based indices of the profile points at the start and end of the sand pit
+        self.pit_indices = pit_indices
+
+        # Init variables for later storage
+        self.x = None          # (num_points,) cross-shore location of the profile points (m)
+        self.z = None          # (num_points,) height of the flume bottom (m)
+        self.bed_levels = {}   # {site number: {"run": (num_runs,) run numbers, "z": (num_runs,) bed level}}
+        self.bed_level_units = None
+
+        if bathy_file_path is not None:
+            self.load_flume_profile(bathy_file_path)
+
+        if bed_level_file_path is not None:
+            self.load_bed_levels(bed_level_file_path)
+
+    def __str__(self) -> str:
+        """
+        Returns some metadata about the bathymetry when print() is used
+        """
+        return (f"Bathy file path: {self.bathy_file_path}\n"
+                f"Bed level file path: {self.bed_level_file_path}\n"
+                f"Num profile points: {None if self.x is None else len(self.x)}\n"
+                f"Sand pit (m): {self.pit_x if self.x is not None else None}\n"
+                f"Bed level sites: {list(self.bed_levels.keys())}"
+        )
+
+    @classmethod
+    def load(cls, bathy_file_path = None, bed_level_file_path = None, pit_indices = (9, 10)):
+        """
+        Get the Bathymetry of the files, only loaded the first time (or if a file changed)
+        """
+        modified_times = tuple(os.path.getmtime(path) if path is not None else None
+                               for path in (bathy_file_path, bed_level_file_path))
+
+        cache_key = (bathy_file_path, bed_level_file_path, modified_times, tuple(pit_indices))
+
+        if cache_key not in _bathymetry_cache:
+            _bathymetry_cache[cache_key] = cls(bathy_file_path, bed_level_file_path, pit_indices)
+
+        return _bathymetry_cache[cache_key]
+
+    def load_flume_profile(self, bathy_file_path):
+        """
+        Load the flume profile from bathy.mat, sorted by x so it can be interpolated
+        """
+        # Lazy import (see lib/__init__.py)
+        import scipy.io
+
+        bathy = scipy.io.loadmat(bathy_file_path)["bathy"]
+
+        order = np.argsort(bathy[:, 0], kind = "stable")
+
+        self.bathy_file_path = bathy_file_path
+        self.x = bathy[order, 0].astype(float)
+        self.z = bathy[order, 1].astype(float)
+
+    def load_bed_levels(self, bed_level_file_path):
+        """
+        Load the initial bed level of each site (site2, site4, ...) for each run
+        """
+        # Lazy import (see lib/__init__.py)
+        import scipy.io
+
+        bed_level_struct = scipy.io.loadmat(bed_level_file_path)["initial_bed_level"]
+
+        self.bed_level_file_path = bed_level_file_path
+        self.bed_levels = {}
+
+        for field_name in bed_level_struct.dtype.names:
+            site_match = re.fullmatch(r"site(\d+)", field_name)
+
+            if site_match is None:
+                continue
+
+            site_struct = bed_level_struct[field_name][0][0]
+
+            self.bed_levels[int(site_match.group(1))] = {
+                "run": np.ravel(site_struct["run"][0][0]).astype(int),
+                "z": np.ravel(site_struct["z"][0][0]).astype(float)
+            }
+
+        if "units" in bed_level_struct.dtype.names:
+            self.bed_level_units = self._unwrap_units(bed_level_struct["units"][0][0])
+
+    @staticmethod
+    def _unwrap_units(value):
+        """
+        loadmat nests the units string in (1, 1) arrays, dig down to the string.
+        Returns None if the units are empty
+        """
+        while isinstance(value, np.ndarray):
+            if value.size == 0:
+                return None
+
+            if value.size > 1:
+                raise ValueError(f"The bed level units should be one string, not: {value}\n")
+
+            value = value.item()
+
+        if value is None:
+            return None
+
+        if not isinstance(value, (str, bytes)):
+            raise ValueError(f"The bed level units should be a string, not: {value}\n")
+
+        units = value.decode() if isinstance(value, bytes) else value
+
+        return units.strip() or None
+
+    @property
+    def pit_x(self):
+        """
+        (start, end) cross-shore location of the sand pit (m)
+        """
+        start_index, end_index = self.pit_indices
+
+        return float(self.x[start_index]), float(self.x[end_index])
+
+    def bed_elevation(self, x):
+        """
+        Height of the flume bottom at x (scalar or array), linearly interpolated
+        """
+        return np.interp(x, self.x, self.z)
+
+    def run_bed_elevation(self, x, run_id, site = None):
+        """
+        Height of the bottom at x (scalar or array) for a run: the flume profile with the
+        sand pit at the run's initial bed level. site picks the bed level, None uses the
+        mean of the sites that have a level for the run. Without bed levels it's the flume profile
+        """
+        bed_elevation = np.array(self.bed_elevation(x), dtype = float)
+
+        if not self.bed_levels:
+            return bed_elevation
+
+        if site is not None:
+            bed_level = self.get_bed_level(site, run_id)
+        else:
+            run_number = self._get_run_number(run_id)
+            site_levels = [levels["z"][levels["run"] == run_number] for levels in self.bed_levels.values()]
+            site_levels = np.concatenate(site_levels)
+
+            if site_levels.size == 0:
+                raise KeyError(f"Run: {run_id} doesn't have a bed level at any site")
+
+            bed_level = np.mean(site_levels)
+
+        pit_start, pit_end = self.pit_x
+        in_pit = (np.asarray(x) >= pit_start) & (np.asarray(x) <= pit_end)
+
+        return np.where(in_pit, bed_level, bed_elevation)
+
+    def depth(self, x, water_level, run_id = None, site = None):
+        """
+        Still water depth at x (scalar or array), negative where the bottom is above the water.
+        water_level is the run's still water level in the z of the profile. With a run_id the
+        sand pit is at the run's bed level (see run_bed_elevation), otherwise it's the flume profile
+        """
+        if run_id is None:
+            return water_level - self.bed_elevation(x)
+
+        return water_level - self.run_bed_elevation(x, run_id, site)
+
+    def gauge_depths(self, run, water_level, site = None):
+        """
+        Still water depth at each of the wave gauges of a run, (num_wave_gauges,).
+        The gauges over the sand pit use the run's bed level like export_run's bed.dep
+        """
+        return self.depth(run.flume_wse_locs.gauge_locations, water_level, run.id, site)
+
+    @staticmethod
+    def _get_run_number(run_id):
+        """
+        Convert a run id eg. "RUN014" (or 14) to the run number
+        """
+        if isinstance(run_id, (int, np.integer)):
+            return int(run_id)
+
+        run_match = re.search(r"(\d+)$", str(run_id))
+
+        if run_match is None:
+            raise ValueError(f"run_id: {run_id} doesn't end with a run number eg. RUN014")
+
+        return int(run_match.group(1))
+
+    def get_bed_level(self, site, run_id):
+        """
+        Initial bed level of the sand at a site for a run
+        """
+        if site not in self.bed_levels:
+            raise KeyError(f"Site: {site} is not a valid site.\n"
+                           f"Valid sites are: {list(self.bed_levels.keys())}")
+
+        run_number = self._get_run_number(run_id)
+        site_levels = self.bed_levels[site]
+
+        run_index = np.flatnonzero(site_levels["run"] == run_number)
+
+        if run_index.size == 0:
+            raise KeyError(f"Run: {run_id} doesn't have a bed level at site {site}")
+
+        return site_levels["z"][run_index[0]]
+
+    def local_depth(self, site, run_id, water_level):
+        """
+        Still water depth above the sand bed at a site for a run
+        """
+        return water_level - self.get_bed_level(site, run_id)
+
+    def normalize_height(self, flume_height, site, run_id, water_level):
+        """
+        Normalize heights (eg. ADVArray.flume_height) by the local depth at a site:
+        (z - z_bed) / h, 0 at the sand bed and 1 at the still water level.
+        The heights are assumed to be in the same vertical datum as the bathymetry
+        """
+        bed_level = self.get_bed_level(site, run_id)
+
+        return (np.asarray(flume_height, dtype = float) - bed_level) / self.local_depth(site, run_id, water_level)
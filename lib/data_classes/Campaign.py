@@ -0,0 +1,405 @@
+"""
+Class to represent the whole BarSed campaign (every run in a data root)
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Library imports
+from lib.data_classes.Run import Run
+from lib.general_funcs.path_funcs import find_run_files
+
+
+def _load_run(run_id, file_paths, load_options):
+    """
+    Construct a Run and load its data.
+    Module level so it can be sent to the worker processes of the pool
+    """
+
+    run = Run(id = run_id,
+              wave_file_path = file_paths.get("wave"),
+              ADV_file_path  = file_paths.get("adv"),
+              datetime_list  = load_options["datetime_list"],
+              profile        = load_options.get("profile", False),
+              verbose        = load_options.get("verbose", False))
+
+    # Load whatever data exists for this run
+    if run.wave_file_path is not None and load_options["load_wave"]:
+        run.load_wave_data()
+
+    if run.ADV_file_path is not None and load_options["velocity_keys"] is not None:
+        run.load_adv_data(selected_velocity_keys = load_options["velocity_keys"])
+
+    if file_paths.get("pressure") is not None and load_options["load_pressure"]:
+        run.load_pressure_gauge_data(file_paths["pressure"], sites = load_options["pressure_sites"])
+
+    return run
+
+
+def _export_run(run_id, file_paths, bathymetry, output_dir, water_level, export_options):
+    """
+    Load the wave data of a run and write its xBeach model.
+    Module level so it can be sent to the worker processes of the pool
+    """
+    load_options = {"load_wave": True,
+                    "velocity_keys": None,
+                    "load_pressure": False,
+                    "pressure_sites": [],
+                    "datetime_list": False
+    }
+
+    run = _load_run(run_id, file_paths, load_options)
+
+    return run.export_xbeach(bathymetry, output_dir, water_level, **export_options)
+
+
+def _qc_run(run_id, file_paths, load_options, qc_options):
+    """
+    Load a run and QC its data (see Run.run_qc).
+    Only the QC results are sent back, not the run's data
+    """
+    run = _load_run(run_id, file_paths, load_options)
+
+    run.run_qc(**qc_options)
+
+    return run.qc
+
+
+class Campaign:
+    """
+    Discovers every run in a BarSed data root and loads them in parallel
+    """
+
+    def __init__(self, data_root, wave_folder = "WG", ADV_folder = "ADV",
+                 pressure_folder = "P0"):
+        self.data_root = data_root  # Root folder of the BarSed data eg. D:\ERDC\BarSed
+
+        # Folders (relative to the data root) that hold each type of run file
+        self.wave_folder     = wave_folder
+        self.ADV_folder      = ADV_folder
+        self.pressure_folder = pressure_folder
+
+        # Init variables for later storage
+        self.run_files     = {}   # {run id: {"wave": path, "adv": path, "pressure": path}}
+        self.runs          = {}   # {run id: Run}
+        self.errors        = {}   # {run id: exception raised while loading}
+        self.qc            = {}   # {run id: QC results (see Run.run_qc)}
+        self.qc_errors     = {}   # {run id: exception raised while QC'ing a run}
+        self.export_errors = {}   # {run id: exception raised while exporting a run's xBeach model}
+
+        # Find the runs in the data root
+        self.discover_runs()
+
+    def __str__(self) -> str:
+        """
+        Returns some metadata about the Campaign when print() is used
+        """
+        return (f"Data root: {self.data_root}\n"
+                f"Num runs found: {self.num_runs}\n"
+                f"Num runs loaded: {len(self.runs)}\n"
+                f"Num runs failed: {len(self.errors)}\n"
+                f"Num runs QC'd: {len(self.qc)}\n"
+                f"Num runs failed QC: {len(self.qc_errors)}\n"
+                f"Num runs failed export: {len(self.export_errors)}"
+        )
+
+    @property
+    def num_runs(self):
+        return len(self.run_files)
+
+    @property
+    def run_ids(self):
+        return list(self.run_files.keys())
+
+    def discover_runs(self):
+        """
+        Find all of the RUNxxx.mat files in the wave, ADV and pressure folders
+        and group them by run id
+        """
+
+        folders = {"wave": self.wave_folder,
+                   "adv": self.ADV_folder,
+                   "pressure": self.pressure_folder
+        }
+
+        run_files = {}
+
+        for data_type, folder in folders.items():
+            # Skip data types the user turned off
+            if folder is None:
+                continue
+
+            found_files = find_run_files(os.path.join(self.data_root, folder))
+
+            for run_id, file_path in found_files.items():
+                run_files.setdefault(run_id, {})[data_type] = file_path
+
+        # Sort by the run id so the runs are in order
+        self.run_files = dict(sorted(run_files.items()))
+
+        return self.run_files
+
+    def _get_run_ids(self, run_ids):
+        """
+        Check the requested run ids and convert None to all of the runs
+        """
+        if run_ids is None:
+            return self.run_ids
+
+        # Let a single id be passed
+        if isinstance(run_ids, str):
+            run_ids = [run_ids]
+
+        missing_ids = [run_id for run_id in run_ids if run_id not in self.run_files]
+
+        if missing_ids:
+            raise KeyError(f"The following run ids: {missing_ids}\n"
+                           f"Were not found in: {self.data_root}")
+
+        return list(run_ids)
+
+    def load(self, run_ids = None, max_workers = None, progress = True,
+             load_wave = True, velocity_keys = "all", load_pressure = True,
+             pressure_sites = [2, 4], datetime_list = False, profile = False, verbose = False):
+        """
+        Load the runs in a process pool and store them in self.runs
+
+        Parameters:
+        - run_ids: Ids of the runs to load (None loads all of the runs)
+        - max_workers: Number of worker processes. None uses the number of cores,
+                       1 loads the runs serially in this process
+        - progress: True prints the progress, a callable is called with
+                    (num_done, num_total, run_id) after each run finishes
+        - load_wave, load_pressure: Turn loading the wave/pressure data on or off
+        - velocity_keys: ADV keys to load (see Run.load_adv_data), None skips the ADV data
+        - pressure_sites, datetime_list: Passed on to the Run
+        - profile: Record the loading stages of each run in run.report (see Campaign.get_reports)
+        - verbose: Print the events of the runs (eg. the number of wave gauges added)
+
+        Returns:
+        - dict of {run id: Run} for the runs that loaded
+        """
+
+        run_ids = self._get_run_ids(run_ids)
+        num_total = len(run_ids)
+
+        load_options = {"load_wave": load_wave,
+                        "velocity_keys": velocity_keys,
+                        "load_pressure": load_pressure,
+                        "pressure_sites": pressure_sites,
+                        "datetime_list": datetime_list,
+                        "profile": profile,
+                        "verbose": verbose
+        }
+
+        loaded_runs = {}
+
+        if max_workers == 1:
+            # Load the runs serially, useful for debugging
+            for num_done, run_id in enumerate(run_ids, start = 1):
+                try:
+                    loaded_runs[run_id] = _load_run(run_id, self.run_files[run_id], load_options)
+                    # Clear the error of an earlier failed load
+                    self.errors.pop(run_id, None)
+                except Exception as error:
+                    self.errors[run_id] = error
+
+                self._report_progress(progress, num_done, num_total, run_id)
+        else:
+            with ProcessPoolExecutor(max_workers = max_workers) as executor:
+                # Submit all of the runs
+                futures = {executor.submit(_load_run, run_id, self.run_files[run_id], load_options): run_id
+                           for run_id in run_ids}
+
+                # Collect the runs as they finish
+                for num_done, future in enumerate(as_completed(futures), start = 1):
+                    run_id = futures[future]
+                    try:
+                        loaded_runs[run_id] = future.result()
+                        self.errors.pop(run_id, None)
+                    except Exception as error:
+                        self.errors[run_id] = error
+
+                    self._report_progress(progress, num_done, num_total, run_id)
+
+        # Keep the runs in run id order
+        loaded_runs = dict(sorted(loaded_runs.items()))
+        self.runs.update(loaded_runs)
+
+        return loaded_runs
+
+    def export_xbeach(self, bathymetry, output_root, water_level, run_ids = None, max_workers = None,
+                      progress = True, **export_options):
+        """
+        Write the xBeach model of each run to output_root/<run id> in a process pool.
+        Each worker loads the wave data of its own run so the runs aren't sent between processes
+
+        Parameters:
+        - bathymetry: Bathymetry or the path to bathy.mat, sent to each worker
+        - output_root: Folder the run folders are written to
+        - water_level: Still water level of the runs in the bathymetry's z, a float for all
+                       of the runs or a dict of {run id: water level}
+        - run_ids, max_workers, progress: Same as Campaign.load
+        - export_options: Passed to xbeach_funcs.export_run eg. dx, site, forcing
+
+        Returns:
+        - dict of {run id: output folder} for the runs that were exported, the failures are
+          in self.export_errors
+        """
+        run_ids = [run_id for run_id in self._get_run_ids(run_ids) 
+                   if "wave" in self.run_files[run_id]]
+
+        if isinstance(water_level, dict):
+            missing = [run_id for run_id in run_ids if run_id not in water_level]
+            if missing:
+                raise KeyError(f"No water level for the runs: {missing}\n")
+            water_levels = {run_id: water_level[run_id] for run_id in run_ids}
+        else:
+            water_levels = {run_id: water_level for run_id in run_ids}
+
+        num_total = len(run_ids)
+
+        exported = {}
+
+        with ProcessPoolExecutor(max_workers = max_workers) as executor:
+            futures = {executor.submit(_export_run, run_id, self.run_files[run_id], bathymetry,
+                                       os.path.join(output_root, run_id), water_levels[run_id],
+                                       export_options): run_id
+                       for run_id in run_ids}
+
+            for num_done, future in enumerate(as_completed(futures), start = 1):
+                run_id = futures[future]
+                try:
+                    exported[run_id] = future.result()
+                    self.export_errors.pop(run_id, None)
+                except Exception as error:
+                    # Kept apart from the load errors so a run that loads isn't reported as failed
+                    self.export_errors[run_id] = error
+
+                self._report_progress(progress, num_done, num_total, run_id, errors = self.export_errors,
+                                      status = "exported")
+
+        return dict(sorted(exported.items()))
+
+    def run_qc(self, run_ids = None, max_workers = None, progress = True, velocity_keys = ["u", "v", "w"],
+               pressure_sites = [2, 4], **qc_options):
+        """
+        QC every run in a process pool (see Run.run_qc). Each worker loads its own run and
+        only sends back the packed masks and the summary. The results are stored in self.qc
+        and added to the runs that are already loaded
+
+        Parameters:
+        - run_ids, max_workers, progress: Same as Campaign.load
+        - velocity_keys: ADV keys to load and despike, None skips the ADV data
+        - pressure_sites: Passed on to the Run
+        - qc_options: Passed to Run.run_qc eg. spike_threshold, flatline_duration
+
+        Returns:
+        - dict of {run id: QC results} for the runs that were QC'd, the failures are in self.qc_errors
+        """
+        run_ids = self._get_run_ids(run_ids)
+        num_total = len(run_ids)
+
+        load_options = {"load_wave": True,
+                        "velocity_keys": velocity_keys,
+                        "load_pressure": True,
+                        "pressure_sites": pressure_sites,
+                        "datetime_list": False
+        }
+
+        # The cleaned velocity stays in the workers
+        qc_options = {"fill_adv": False, **qc_options}
+
+        if velocity_keys is not None:
+            qc_options.setdefault("adv_keys", velocity_keys)
+
+        qc_results = {}
+
+        with ProcessPoolExecutor(max_workers = max_workers) as executor:
+            futures = {executor.submit(_qc_run, run_id, self.run_files[run_id], load_options, qc_options): run_id
+                       for run_id in run_ids}
+
+            for num_done, future in enumerate(as_completed(futures), start = 1):
+                run_id = futures[future]
+                try:
+                    qc_results[run_id] = future.result()
+                    self.qc_errors.pop(run_id, None)
+                except Exception as error:
+                    # Kept apart from the load errors so a run that loads isn't reported as failed
+                    self.qc_errors[run_id] = error
+
+                self._report_progress(progress, num_done, num_total, run_id, errors = self.qc_errors,
+                                      status = "QC'd")
+
+        qc_results = dict(sorted(qc_results.items()))
+        self.qc.update(qc_results)
+
+        for run_id, qc in qc_results.items():
+            if run_id in self.runs:
+                self.runs[run_id].qc = qc
+
+        return qc_results
+
+    def get_qc_summary(self):
+        """
+        Get the QC summaries of all of the runs in one pandas.DataFrame indexed by (run id, source, channel)
+        """
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
+
+        summaries = {run_id: qc["summary"] for run_id, qc in self.qc.items() if qc["summary"] is not None}
+
+        if not summaries:
+            return None
+
+        return pd.concat(summaries, names = ["run_id"])
+
+    def get_reports(self):
+        """
+        Get the profiling reports of the loaded runs that were profiled, {run id: report}
+        """
+        return {run_id: run.report for run_id, run in self.runs.items() if run.report is not None}
+
+    def _report_progress(self, progress, num_done, num_total, run_id, errors = None, status = "loaded"):
+        """
+        Report the progress of a loop over the runs (loading, QC or export).
+        errors is the dict the failures are in (defaults to self.errors)
+        """
+        if errors is None:
+            errors = self.errors
+
+        if callable(progress):
+            progress(num_done, num_total, run_id)
+        elif progress:
+            status = "failed" if run_id in errors else status
+            print(f"[{num_done}/{num_total}] {run_id} {status}")
+
+    def get_run(self, run_id, **kwargs):
+        """
+        Get a single run, loading it in this process if it hasn't been loaded yet.
+        kwargs are the options of Campaign.load
+        """
+        if run_id not in self.runs:
+            self.load(run_ids = [run_id], max_workers = 1, progress = False, **kwargs)
+
+            # Raise the loading error here since only one run was asked for
+            if run_id in self.errors:
+                raise self.errors[run_id]
+
+        return self.runs[run_id]
+
+    def __getitem__(self, run_id):
+        return self.get_run(run_id)
+
+    def __iter__(self):
+        """
+        Loop over the loaded runs
+        """
+        return iter(self.runs.values())
+
+    def __len__(self):
+        return self.num_runs
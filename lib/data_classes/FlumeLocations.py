@@ -0,0 +1,82 @@
+"""
+Class to represent the x-locations of the columns of Run.flume_wse without a dense
+(num_times, num_wave_gauges + 1) array. Only the wave maker (column 0) moves so it's
+stored as the wave maker position and the wave gauges as one static location vector.
+
+Indexing works like the dense array eg. flume_wse_locs[index, :], flume_wse_locs[i:j]
+or flume_wse_locs[:, 0], only the selected rows are built.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+
+# Standard imports
+import numpy as np
+
+class FlumeLocations:
+    def __init__(self, wave_maker_position, gauge_locations):
+        # (num_times,) x-location of the face of the wave maker, column 0
+        self.wave_maker_position = np.asarray(wave_maker_position, dtype = float)
+
+        # (num_wave_gauges,) x-location of the wave gauges, columns 1:
+        self.gauge_locations = np.asarray(gauge_locations, dtype = float)
+
+    def __str__(self) -> str:
+        return (f"Flume locations: {self.shape[0]} times, "
+                f"wave maker + {len(self.gauge_locations)} wave gauges"
+        )
+
+    @property
+    def shape(self):
+        return (len(self.wave_maker_position), len(self.gauge_locations) + 1)
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def nbytes(self):
+        return self.wave_maker_position.nbytes + self.gauge_locations.nbytes
+
+    def __len__(self):
+        return len(self.wave_maker_position)
+
+    def __getitem__(self, index):
+        """
+        Build only the selected rows (and columns) of the dense location array
+        """
+        if not isinstance(index, tuple):
+            index = (index,)
+
+        if len(index) > 2:
+            raise IndexError(f"Too many indices for FlumeLocations: {len(index)} were given, 2 are valid")
+
+        row_index = index[0]
+        column_index = index[1] if len(index) == 2 else slice(None)
+
+        # Wave maker position of the selected rows, a scalar for a single row
+        position = self.wave_maker_position[row_index]
+
+        # A single column doesn't need the rows to be built
+        if isinstance(column_index, (int, np.integer)):
+            column = int(column_index) % self.shape[1]
+
+            if column == 0:
+                return position
+
+            return np.full(np.shape(position), self.gauge_locations[column - 1])[()]
+
+        rows = np.empty(np.shape(position) + (self.shape[1],))
+        rows[..., 0]  = position
+        rows[..., 1:] = self.gauge_locations
+
+        return rows[..., column_index]
+
+    def __array__(self, dtype = None, copy = None):
+        """
+        Dense (num_times, num_wave_gauges + 1) array eg. for np.asarray(run.flume_wse_locs)
+        """
+        dense = self[:, :]
+
+        return dense if dtype is None else dense.astype(dtype)
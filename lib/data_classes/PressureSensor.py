@@ -2,12 +2,14 @@
 Class to represent the Pressure sensor
 """
 # Standard imports
-# import numpy as np
+import copy
+import numpy as np
 # import pandas as pd
-import matplotlib.pyplot as plt
 # TODO: Fill this class with information
 
-from lib.general_funcs.datetime_funcs import matlab_datenum_to_datetime
+from lib.general_funcs.datetime_funcs import matlab_datenum_to_datetime, time_slice
+from lib.general_funcs.list_functions import apply_mask_2_list
+from lib.general_funcs.plot_funcs import plot_decimated
 
 class PressureSensor:
 
@@ -30,46 +32,117 @@ class PressureSensor:
         
         return return_string
 
-    def store_data(self, site_data):
+    def store_data(self, site_data, datetime_list = False):
         """
         Unpacks the data from one of the selected site locations from the 
         mat_dict
+        datetime_list = True stores the times as lists of datetime.datetime
+        """
+
+        self.store_arrays(**PressureSensor.unpack_site_data(site_data), datetime_list = datetime_list)
+
+    @staticmethod
+    def unpack_site_data(site_data):
+        """
+        Unpack the nested site data from the mat_dict into a dict of plain arrays
+        (the keys match the inputs of store_arrays)
+        """
+
+        # Cell with the zero up-crossing information
+        realization_data = site_data[2][0][0]
+
+        return {"date": np.asarray(site_data[0][0], dtype = float).ravel(),
+                "pressure": np.asarray(site_data[1][0], dtype = float).ravel(),
+                "indices_start_end": np.asarray(realization_data[0]),
+                "date_start_end": np.asarray(realization_data[1], dtype = float),
+                "period_realization": np.asarray(realization_data[2][0]),
+                "percent_err_period": np.asarray(realization_data[3][0])
+        }
+
+    def store_arrays(self, date, pressure, indices_start_end, date_start_end, 
+                     period_realization, percent_err_period, datetime_list = False):
+        """
+        Store the unpacked site data in the pressure sensor
         """
 
         # Convert the datetime from matlab format to python format
-        self.date_time = matlab_datenum_to_datetime(site_data[0][0])
+        self.date_time = matlab_datenum_to_datetime(date, as_list = datetime_list)
         
         # Store the pressure data
-        self.pressure = site_data[1][0]
+        self.pressure = pressure
 
         # Store the start and ending indices in the time-verying data corresponding to 
         # zero up-crossings of the free surface
-        self.indices_start_end = site_data[2][0][0][0]
+        self.indices_start_end = indices_start_end
 
         # Store the start and ending datetime in the time varying data corresponding to the zero-upcrossing 
         # of the free surface
-        self.date_start_end = list(site_data[2][0][0][1])
+        self.date_start_end = list(date_start_end)
 
         # Convert the date_start_end to python datetime
-        self._convert_date_start_end()
+        self._convert_date_start_end(datetime_list)
 
         # Measured wave period from the pressure gauge
-        self.period_realization = site_data[2][0][0][2][0]
+        self.period_realization = period_realization
 
         # Percent error between the applied wave period and the measured wave period
-        self.percent_err_period = site_data[2][0][0][3][0]
+        self.percent_err_period = percent_err_period
 
-    def _convert_date_start_end(self):
+    def _convert_date_start_end(self, datetime_list = False):
         """
         Convert the date_start_end array to datetime.
         This is a nested array so it's easier to just convert it here
         """
 
         # Convert the upcrossing
-        self.date_start_end[0] = matlab_datenum_to_datetime(self.date_start_end[0])
+        self.date_start_end[0] = matlab_datenum_to_datetime(self.date_start_end[0], as_list = datetime_list)
 
         # Convert the end of the upcrossing
-        self.date_start_end[1] = matlab_datenum_to_datetime(self.date_start_end[1])
+        self.date_start_end[1] = matlab_datenum_to_datetime(self.date_start_end[1], as_list = datetime_list)
+
+    def get_realization_indices(self):
+        """
+        Get the zero based start and (exclusive) end index of each wave realization in the
+        pressure time series. The indices in the mat file are MATLAB (one based, inclusive)
+        """
+        indices_start_end = np.asarray(self.indices_start_end, dtype = np.int64)
+
+        # Stored as (2, num_realizations), allow (num_realizations, 2) as well
+        if indices_start_end.shape[0] != 2 and indices_start_end.shape[-1] == 2:
+            indices_start_end = indices_start_end.T
+
+        start_indices = indices_start_end[0] - 1
+        end_indices   = indices_start_end[1]
+
+        return start_indices, end_indices
+
+    def window(self, start = None, end = None):
+        """
+        Get a pressure sensor with only the data in the time window [start, end).
+        The time series are views, only the realizations fully inside the window are kept
+        """
+        window_slice = time_slice(self.date_time, start, end)
+
+        pressure_sensor = copy.copy(self)
+
+        pressure_sensor.date_time = self.date_time[window_slice]
+        pressure_sensor.pressure  = self.pressure[window_slice]
+
+        # Keep the realizations that are inside the window
+        start_indices, end_indices = self.get_realization_indices()
+        inside = (start_indices >= window_slice.start) & (end_indices <= window_slice.stop)
+
+        # Shift the (MATLAB) indices to the start of the window
+        pressure_sensor.indices_start_end = np.vstack((start_indices[inside] + 1, 
+                                                       end_indices[inside])) - window_slice.start
+
+        pressure_sensor.date_start_end = [apply_mask_2_list(dates, inside) if isinstance(dates, list)
+                                          else dates[inside] for dates in self.date_start_end]
+
+        pressure_sensor.period_realization = self.period_realization[inside]
+        pressure_sensor.percent_err_period = self.percent_err_period[inside]
+
+        return pressure_sensor
 
     def get_number_wave_realizations(self):
         """
@@ -81,16 +154,21 @@ class PressureSensor:
         # Return the number of wave realizations
         return num_wave_realizations
     
-    def quick_plot(self, figsize = (8,4), legend = False, ylim= None, **kwargs):
+    def quick_plot(self, figsize = (8,4), legend = False, ylim= None, max_points = None,
+                   method = "minmax", **kwargs):
         """
         Quick plot of the wse at this specific gauge
+        The data is decimated to max_points (see plot_funcs.plot_decimated)
         """
+        # Lazy import (see lib/__init__.py)
+        import matplotlib.pyplot as plt
 
         # Create the figure object
         fig, axs = plt.subplots(nrows = 1, ncols = 1, figsize = figsize)
 
         # Create the plot title
-        axs.plot(self.date_time, self.pressure, label = f"Location: {self.location}", **kwargs)
+        plot_decimated(axs, self.date_time, self.pressure, max_points = max_points, method = method,
+                       label = f"Location: {self.location}", **kwargs)
         
         # Format the plot
         axs.set_title(f"Pressure (m) vs. Time (min), Gauge id: {self.id}")
@@ -6,30 +6,68 @@ Author: WaveHello
 Date: 07/02/2024
 """
 # Standard imports
+import copy
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import scipy.io
 from datetime import datetime, timedelta
+from functools import partial
 
 # Library imports
 from lib.data_classes.WaveGauge import WaveGauge
 from lib.data_classes.WaveMaker import WaveMaker
 from lib.data_classes.ADV import ADV
-from lib.general_funcs.datetime_funcs import matlab_datenum_to_datetime
+from lib.data_classes.ADVArray import ADVArray
+from lib.data_classes.FlumeLocations import FlumeLocations
+from lib.general_funcs.datetime_funcs import matlab_datenum_to_datetime, calc_sample_period, time_slice, to_datetime64
+from lib.general_funcs.wave_statistics import calc_wave_statistics, compare_periods
+from lib.general_funcs.spectral_funcs import welch_psd, calc_spectral_parameters, DEFAULT_NPERSEG
 from lib.general_funcs.list_functions import check_val_in_list, apply_mask_2_list
+from lib.general_funcs.ensemble_funcs import (realization_indices_from_times, split_realizations,
+                                              split_realizations_ragged, ensemble_statistics)
+from lib.general_funcs.plot_funcs import plot_decimated
+from lib.general_funcs.cache_funcs import load_cached_arrays, get_valid_manifest, read_cached_array
+from lib.general_funcs.profile_funcs import new_report, profile_stage, emit_event, summarize_report, save_report
+from lib.general_funcs.xbeach_funcs import export_run
+from lib.general_funcs.kinematic_funcs import calc_orbital_velocity_amplitude
+from lib.general_funcs.pressure_funcs import pressure_to_eta, pressure_to_eta_chunked
+from lib.general_funcs.spatial_funcs import grid_flume_wse, iter_gridded_wse
+from lib.general_funcs.resample_funcs import get_clock_key, get_interpolation_map, resample_channels
+from lib.general_funcs.qc_funcs import qc_channels, summarize_masks, find_time_gaps, pack_mask, unpack_mask
+from lib.general_funcs.signal_processing import fill_masked
+from lib.general_funcs.block_funcs import (new_moment_state, update_moments, finish_moments,
+                                           new_welch_state, update_welch, finish_welch,
+                                           new_wave_state, update_waves, finish_waves)
 from lib.data_classes.PressureSensor import PressureSensor
 
 class Run:
     # TODO: Update this so that a file directory is based and it does 
     # TODO: Add the pressure gauge data
     # all the rest
-    def __init__(self, id, wave_file_path = None, ADV_file_path = None):
+    # List of the valid ADV velocity keys
+    valid_ADV_keys = ADV.valid_ADV_keys
+
+    # Groups of instruments that can be stacked as (num_channels, num_times) (see get_channel_data)
+    valid_sources = ["flume", "wave_gauges", "wave_maker", "adv", "pressure"]
+
+    def __init__(self, id, wave_file_path = None, ADV_file_path = None, datetime_list = False,
+                 use_cache = True, cache_dir = None, mmap_mode = None, profile = False,
+                 verbose = True, hooks = None):
         self.id   = id             # Holds the id of the run eg. RUN001
         self.wave_file_path = wave_file_path # Path to the mat file that contains the run's
                                              # wave data
         self.ADV_file_path = ADV_file_path
 
+        # If True the times are stored as lists of datetime.datetime (slow, compatibility mode)
+        # otherwise they're stored as a pandas.DatetimeIndex
+        self.datetime_list = datetime_list
+
+        # Store the arrays decoded from the mat files in the on disk cache (see cache_funcs)
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+
+        # np.load mmap_mode for the cached arrays eg. "r" memory-maps the wave data
+        # instead of reading it into memory (only used when use_cache is True)
+        self.mmap_mode = mmap_mode
+
          # Init variables for later storage
         self.date_time = None
         self.start_date = None
@@ -37,6 +75,12 @@ class Run:
         self.wave_gauges = []      # Variable to hold the wave gauge information
         self.num_wave_gauges = None
         self.wave_maker  = None    # Variable to hold the wave maker information
+
+        # (num_wave_gauges + 1, num_times) array of the measured surface elevations.
+        # Row 0 is the wave maker and rows 1: are the wave gauges, the wave maker's
+        # eta_wm and each wave gauge's eta are views into this array
+        self.flume_eta = None
+        self._flume_wse_locs = None
         
         # Pressure gauge
         self.pressure_gauges = []
@@ -46,6 +90,26 @@ class Run:
         self.ADVs = []
         self.num_ADVs = None
 
+        # All of the ADVs as one array per velocity key, the ADV objects are views of it
+        self.ADV_array = None
+
+        # Spectra that have been calculated, {(source, key, nperseg, noverlap, window, block_duration): (frequency, psd)}
+        self._spectra_cache = {}
+
+        # Interpolation maps between the instrument clocks, {(source clock, target clock, method): map}
+        self._alignment_maps = {}
+
+        # Quality control results (see run_qc): {"masks": {source: {flag: packed mask}},
+        # "time_gaps": {source: (index, duration)}, "summary": pandas.DataFrame}
+        self.qc = None
+
+        # Instrumentation (see profile_funcs). profile = True records the time and peak memory
+        # of each loading stage in self.report, the hooks are called with ("stage" or "event", record)
+        # and verbose prints the events (eg. the number of wave gauges added)
+        self.report  = new_report(id) if profile else None
+        self.verbose = verbose
+        self.hooks   = [] if hooks is None else list(hooks)
+
     def __str__(self) -> str:
         """
         Called when the print statement is used on the Run object.
@@ -65,10 +129,7 @@ class Run:
         Check that the input veocity keys are valid and return the keys if the input is valid
         """
         # List of the valid keys
-        valid_ADV_keys = ["u_inter", "v_inter", "w_inter", 
-                          "u", "v", "w", "u_ens", "v_ens", "w_ens",
-                          "u_ens_avg", "v_ens_avg", "w_ens_avg"
-        ]
+        valid_ADV_keys = Run.valid_ADV_keys
         
         # Check that the input keys are valid
         if selected_velocity_keys == "all":
@@ -103,6 +164,114 @@ class Run:
         
         return velocity_keys
     
+    def _stage(self, stage):
+        """
+        Context manager that profiles a stage if profiling is on (see profile_funcs.profile_stage)
+        """
+        return profile_stage(self.report, stage, self.hooks)
+
+    def _emit(self, event, message, **data):
+        """
+        Record an event, send it to the hooks and print it if verbose
+        """
+        return emit_event(self.report, event, message, self.hooks, self.verbose, run_id = self.id, **data)
+
+    def add_hook(self, hook):
+        """
+        Add a function that's called with (kind, record) for each stage and event
+        """
+        self.hooks.append(hook)
+
+    def enable_profiling(self):
+        """
+        Start recording the stages in a new report
+        """
+        self.report = new_report(self.id)
+
+        return self.report
+
+    def get_report(self, summary = False):
+        """
+        Get the profiling report (None if profiling is off), summary = True totals each stage
+        """
+        if self.report is None or not summary:
+            return self.report
+
+        return summarize_report(self.report)
+
+    def save_report(self, file_path):
+        """
+        Write the profiling report to a JSON file
+        """
+        save_report(self.report, file_path)
+
+    def _load_arrays(self, file_path, kind, decoder, names = None):
+        """
+        Get the arrays decoded from a mat file, from the cache if it's turned on
+        """
+        with self._stage(f"{kind}.decode") as info:
+            if self.use_cache:
+                # Records if the cache entry was valid and how much was decoded on a miss
+                arrays = load_cached_arrays(file_path, kind, decoder, cache_dir = self.cache_dir,
+                                            mmap_mode = self.mmap_mode, names = names, info = info)
+            else:
+                arrays = decoder(file_path)
+
+                info["cached"] = False
+                info["decoded_bytes"] = int(sum(np.asarray(array).nbytes for array in arrays.values()))
+
+                if names is not None:
+                    arrays = {name: arrays[name] for name in names}
+
+            # Size of the returned arrays, memory-mapped ones aren't read until they're used
+            info["array_bytes"] = int(sum(np.asarray(array).nbytes for array in arrays.values()))
+
+        return arrays
+
+    @staticmethod
+    def _read_wave_file(wave_file_path):
+        """
+        Load the wave mat file and unpack it into a dict of arrays.
+        eta_wm and the wave gauge eta are stored together in one (num_wave_gauges + 1, num_times)
+        array, "flume_eta", so they can be memory-mapped as one block
+        """
+        # Lazy import (see lib/__init__.py)
+        import scipy.io
+
+        variable_names = ["date", "eta", "x", "y", "eta_wm", "x_wm"]
+        
+        # Load the .mat data into a dict
+        mat_dict = scipy.io.loadmat(wave_file_path, variable_names = variable_names)
+
+        # Get the eta
+        eta = mat_dict["eta"]["eta"][0][0]
+
+        # Get the Surface water elevation in front of the wave maker piston
+        eta_wm = mat_dict["eta"]["eta_wm"][0][0].flatten()
+
+        # Put the wave maker in the first row and the gauges in the rest
+        flume_eta = np.empty((eta.shape[0] + 1, eta.shape[1]))
+        flume_eta[0, :]  = eta_wm
+        flume_eta[1:, :] = eta
+
+        """ Unpack the dict """
+        return {
+                # Get the time
+                "date": mat_dict["eta"]["date"][0][0][0].flatten(),
+
+                # Get the wave maker and wave gauge eta
+                "flume_eta": flume_eta,
+
+                # Get the x locations of the wave gauges
+                "x": mat_dict["eta"]["x"][0][0].flatten(),
+
+                # Get the y-locations of the wave gauges
+                "y": mat_dict["eta"]["y"][0][0].flatten(),
+
+                # Get the location of the piston wave maker
+                "x_wm": mat_dict["eta"]["x_wm"][0][0].flatten()
+        }
+
     def load_wave_data(self):
         """
         Loads the wave data from the mat file and constructs:
@@ -111,45 +280,81 @@ class Run:
         """
         # TODO: Move unpacking the data into the wave maker and wave gauge classes
 
-        variable_names = ["date", "eta", "x", "y", "eta_wm", "x_wm"]
-        
-        # Load the .mat data into a dict
-        mat_dict = scipy.io.loadmat(self.wave_file_path, variable_names = variable_names)
+        with self._stage("load_wave_data"):
+            wave_data = self._load_arrays(self.wave_file_path, "wave", Run._read_wave_file)
 
-        """ Unpack the dict """
+            # Convert the time and store it
+            with self._stage("wave.convert_time"):
+                self._convert_mat_time_and_store(wave_data["date"])
 
-        # Get the time
-        mat_time = mat_dict["eta"]["date"][0][0][0].flatten()
+            # Store the block the wave maker and wave gauges view into
+            self.flume_eta = wave_data["flume_eta"]
+            self._flume_wse_locs = None
+            self._spectra_cache  = {}
 
-        # Get the eta
-        eta    = mat_dict["eta"]["eta"][0][0]
+            with self._stage("wave.construct"):
+                # Construct the wave maker
+                self._construct_wave_maker(self.flume_eta[0], wave_data["x_wm"])
+
+                # Construct the wave gauges
+                self._construct_wave_gauges(wave_data["x"], wave_data["y"], self.flume_eta[1:])
+
+    @staticmethod
+    def _unwrap_mat_string(value):
+        """
+        loadmat nests the strings of cells in arrays, dig down to the string
+        """
+        while isinstance(value, np.ndarray):
+            value = value.ravel()[0]
 
-        # Get the x locations of the wave gauges
-        x_loc  = mat_dict["eta"]["x"][0][0].flatten() 
+        return str(value)
 
-        # Get the y-locations of the wave gauges
-        y_loc  = mat_dict["eta"]["y"][0][0].flatten()
+    @staticmethod
+    def _read_adv_file(ADV_file_path):
+        """
+        Load the ADV mat file and unpack it into a dict of arrays
+        """
+        # Lazy import (see lib/__init__.py)
+        import scipy.io
 
-        # Get the Surface water elevation in front of the wave maker piston
-        eta_wm = mat_dict["eta"]["eta_wm"][0][0].flatten()
+        # Load the file and get to the velocity data
+        mat_dict = scipy.io.loadmat(ADV_file_path)["adv"]
+
+        # Sensor names can be a cell or a char array, convert them to plain strings
+        sensor_names = [Run._unwrap_mat_string(name) for name in mat_dict["sensor_names"][0][0]]
+
+        adv_data = {
+                    # Input wave period and wave height
+                    "per": np.asarray(mat_dict["per"][0][0][0][0]),
+                    "H": np.asarray(mat_dict["H"][0][0][0][0]),
+
+                    # Matlab datenums of the measurements
+                    "date_matlab": mat_dict["date_matlab"][0][0].flatten(),
+
+                    "sensor_names": np.array(sensor_names, dtype = str),
 
-        # Get the location of the piston wave maker
-        x_wm   = mat_dict["eta"]["x_wm"][0][0].flatten()
+                    # Height of each of the advs relative to the flume
+                    "z": mat_dict["z"][0][0].flatten(),
 
-        # Convert the time and store it
-        self._convert_mat_time_and_store( mat_time)
+                    # Normalized time of the ensemble averages
+                    "t_norm": mat_dict["t_norm"][0][0][0]
+        }
 
-        # Construct the wave maker
-        self._construct_wave_maker(eta_wm, x_wm)
+        # Store the velocity data that's in the file
+        for key in Run.valid_ADV_keys:
+            if key in mat_dict.dtype.names:
+                adv_data[key] = mat_dict[key][0][0]
 
-        # Construct the wave gauges
-        self._construct_wave_gauges(x_loc, y_loc, eta)
+        return adv_data
 
-    def load_adv_data(self, selected_velocity_keys = "all"):
+    def load_adv_data(self, selected_velocity_keys = "all", lazy = True):
         # TODO: make this just adding the adv to the object and move the unpacking into the adv
         """
         Loads the adv data from the ADV mat file.
         Since there is alot of velocity data there's the option to only load some of the keys in the mat file
+
+        lazy = True (needs use_cache) only stores loaders for the velocity data. Each sensor's component
+        is read from the cache the first time it's used and can be freed with ADV.release_velocity_data
         """
 
         # Check that the input keys are valid
@@ -160,83 +365,106 @@ class Run:
             # Check that the input velocities keys is valid
             raise TypeError("Value should be all, None (<- type None) or a ist of valid keys")
 
-        # Load the file, need this either way
-        mat_dict = scipy.io.loadmat(self.ADV_file_path)
+        # Check that the velocity keys are valid and convert "all" and None 
+        # to the proper list
+        velocity_keys = self._get_velocity_keys(selected_velocity_keys)
 
-        # Open the mat dict and get to the velocity data
-        mat_dict = mat_dict["adv"]
+        with self._stage("load_adv_data"):
+            # Metadata about the ADVs
+            names = ["per", "H", "date_matlab", "sensor_names", "z", "t_norm"]
 
-        # Store the input wave period
-        self.wave_period = mat_dict["per"][0][0][0][0]
+            # The metadata load builds the cache entry, the velocity data is read from it later
+            lazy = lazy and self.use_cache
 
-        # Store the input wave height
-        self.height = mat_dict["H"][0][0][0][0]          
+            if not lazy:
+                # Only read the arrays that are needed (only matters when the data is cached)
+                names = names + velocity_keys
 
-        # Get the datetime and convert it to python datetime
-        date_time = matlab_datenum_to_datetime(mat_dict["date_matlab"][0][0].flatten())
+            adv_data = self._load_arrays(self.ADV_file_path, "adv", Run._read_adv_file, names = names)
 
-        # Get the sensor names
-        sensor_names = mat_dict["sensor_names"][0][0]
+            # Can't be lazy if the cache entry couldn't be written
+            if lazy and get_valid_manifest(self.ADV_file_path, "adv", self.cache_dir) is None:
+                lazy = False
+                adv_data.update(Run._read_adv_file(self.ADV_file_path))
 
-        # Get the sensor ids
-        sensor_ids = [i+1 for i in range(len(sensor_names))]
-        
-        # Get the height of each of the advs relative to the flume
-        flume_heights = mat_dict["z"][0][0].flatten()
+            # Store the input wave period
+            self.wave_period = adv_data["per"][()]
 
-        # Get the normalized time
-        normalized_time = mat_dict["t_norm"][0][0][0]
+            # Store the input wave height
+            self.height = adv_data["H"][()]
 
-        # Get the number of ADVs
-        self.num_ADVs = len(sensor_names)
-    
-        self._construct_ADVs(selected_velocity_keys, sensor_names, sensor_ids, date_time, flume_heights, 
-                             normalized_time, mat_dict)
+            # Get the datetime and convert it to python datetime
+            with self._stage("adv.convert_time"):
+                date_time = matlab_datenum_to_datetime(adv_data["date_matlab"], 
+                                                       as_list = self.datetime_list)
 
-        # Print the number of advs added
-        print( f"Added: {self.num_ADVs} ADV(s)" )
+            # Get the sensor names
+            sensor_names = list(adv_data["sensor_names"])
 
-    def _construct_ADVs(self, selected_velocity_keys, sensor_names, sensor_ids, date_time, 
-                        flume_heights, normalized_time, mat_dict):
-        
-        # Check that the velocity keys are valid and convert "all" and None 
-        # to the proper list
-        velocity_keys = self._get_velocity_keys(selected_velocity_keys)
-        
-        # Loop over all the advs
-        for i in range(self.num_ADVs):
+            # Get the height of each of the advs relative to the flume
+            flume_heights = adv_data["z"]
 
-            # Get the adv height
-            flume_height = flume_heights[i]
+            # Get the normalized time
+            normalized_time = adv_data["t_norm"]
 
-            # Get the sensor name
-            sensor_name = sensor_names[i]
+            # Get the number of ADVs
+            self.num_ADVs = len(sensor_names)
+    
+            with self._stage("adv.construct"):
+                self._construct_ADVs(velocity_keys, sensor_names, date_time, flume_heights, 
+                                     normalized_time, adv_data, lazy)
 
-            # Get the sensor id
-            sensor_id = sensor_ids[i]
+            self._spectra_cache = {}
 
-            # Construct the adv object
-            Adv_object = ADV(sensor_name, sensor_id, date_time, flume_height, normalized_time)
-            
-            # Loop over the velocity keys
-            for key in velocity_keys:
-                # Load the data from the mat_dict
-                velocity_data = mat_dict[key][0][0][i]
+        # Record the number of advs added
+        self._emit("adv_added", f"Added: {self.num_ADVs} ADV(s)", num_ADVs = self.num_ADVs)
 
-                # Store the data in the adv object
-                Adv_object.store_velocity_data(key, velocity_data)
-            
-            # Add the ADV to the list    
-            self.ADVs.append(Adv_object)
+    def _construct_ADVs(self, velocity_keys, sensor_names, date_time, 
+                        flume_heights, normalized_time, adv_data, lazy = False):
+        """
+        Construct the ADVArray and the ADV objects (views of the ADVArray's rows)
+        """
+        self.ADV_array = ADVArray(sensor_names, flume_heights, date_time, normalized_time)
+
+        # Loop over the velocity keys
+        for key in velocity_keys:
+            if lazy:
+                # Read the key from the cache when it's first used.
+                # partial (not a lambda) so the Run can still be pickled
+                loader = partial(read_cached_array, self.ADV_file_path, "adv", key, 
+                                 self.cache_dir, self.mmap_mode)
+
+                self.ADV_array.store_velocity_loader(key, loader)
+            else:
+                # Store all of the sensors' data for the key
+                self.ADV_array.store_velocity_data(key, adv_data[key])
+
+        # Add the ADVs to the list
+        self.ADVs = self.ADVs + self.ADV_array.to_ADVs()
         
         # Update the number of ADVs
         self.num_ADVs = len(self.ADVs)
     
+    def release_adv_data(self, keys = "all"):
+        """
+        Free the loaded velocity data of all the ADVs. Only lazily loaded keys are freed
+        (see load_adv_data), "all" skips the keys that were loaded with lazy = False and
+        naming one of them raises a ValueError since it couldn't be read again.
+        The ADVs' data are views of the ADVArray's rows so both are released, releasing
+        one ADV on its own doesn't free any memory
+        """
+        # The ADVArray first so nothing is released if a key can't be
+        if self.ADV_array is not None:
+            self.ADV_array.release_velocity_data(keys)
+
+        for Adv_object in self.ADVs:
+            Adv_object.release_velocity_data(keys)
+
     def _convert_mat_time_and_store(self, mat_time):
         """
         Convert the time from what it is in the mat file to th matching date time
         """
-        experiment_datetime = matlab_datenum_to_datetime(mat_time)
+        experiment_datetime = matlab_datenum_to_datetime(mat_time, as_list = self.datetime_list)
 
         # Store the full date time array
         self.date_time = experiment_datetime
@@ -263,7 +491,7 @@ class Run:
         # Loop over the locations and construct the wave gauges 
         for id, location in enumerate(zip(x_loc, y_loc)):
     
-            # Create the wave gauge
+            # Create the wave gauge, eta[id] is a view so the data isn't copied
             wave_gauge = WaveGauge(id + 1, location, eta[id], self.date_time)
             
             # Store the wave gauge in the list
@@ -304,25 +532,53 @@ class Run:
 
         # update the number of wave gauges
         self.num_wave_gauges = len(self.wave_gauges)
-        print("New Number of {} wave gauges".format(self.num_wave_gauges))
+        self._emit("wave_gauges_added", "New Number of {} wave gauges".format(self.num_wave_gauges),
+                   num_wave_gauges = self.num_wave_gauges)
 
-    def load_pressure_gauge_data(self, pressure_file_path, sites = [2, 4]):
+    @staticmethod
+    def _read_pressure_file(pressure_file_path):
         """
-        Load the pressure data, create the pressure gauge objects and store them
+        Load the pressure mat file and unpack the data of each site into a dict of arrays.
+        The keys are "site{i}_{name}" where name is a key of PressureSensor.unpack_site_data
         """
+        # Lazy import (see lib/__init__.py)
+        import scipy.io
 
         mat_dict = scipy.io.loadmat(pressure_file_path)
 
         # Get the pressure data
         pressure_data = mat_dict["p0"]
 
-        # Construct and add the pressure gauges
-        self._construct_pressure_gauge(pressure_data, sites)
+        site_cells = pressure_data[0, :]
+
+        pressure_arrays = {"num_sites": np.asarray(len(site_cells))}
+
+        for i, site_data in enumerate(site_cells):
+            for name, array in PressureSensor.unpack_site_data(site_data).items():
+                pressure_arrays[f"site{i}_{name}"] = array
+
+        return pressure_arrays
+
+    def load_pressure_gauge_data(self, pressure_file_path, sites = [2, 4]):
+        """
+        Load the pressure data, create the pressure gauge objects and store them
+        """
+
+        with self._stage("load_pressure_gauge_data"):
+            pressure_data = self._load_arrays(pressure_file_path, "pressure", Run._read_pressure_file)
+
+            # Construct and add the pressure gauges
+            with self._stage("pressure.construct"):
+                self._construct_pressure_gauge(pressure_data, sites)
+
+        self._emit("pressure_gauges_added", f"Number of pressure gauges: {self.num_pressure_gauges}",
+                   num_pressure_gauges = self.num_pressure_gauges)
+
+        self._spectra_cache = {}
 
     def _construct_pressure_gauge(self, pressure_data, sites):
         # Loop over the sites and construct the pressure gauge objects
-        for i, site_data in enumerate(pressure_data[0, :]):
-            # site_data = pressure_data[0, :][0, i]
+        for i in range(int(pressure_data["num_sites"])):
 
             # Make the site name
             site_name = f"site_{sites[i]}"
@@ -330,8 +586,13 @@ class Run:
             # Make the pressure object
             pressure_gauge = PressureSensor(id = i+1, location = site_name)
 
-            # Give the pressure gauge the site data and it'll unpack it
-            pressure_gauge.store_data(site_data)
+            # Get the site's data
+            prefix = f"site{i}_"
+            site_data = {key[len(prefix):]: array for key, array in pressure_data.items()
+                         if key.startswith(prefix)}
+
+            # Give the pressure gauge the site data
+            pressure_gauge.store_arrays(**site_data, datetime_list = self.datetime_list)
 
             # Add the pressure gauge to the Run object
             self.add_pressure_gauge(pressure_gauge)
@@ -347,27 +608,730 @@ class Run:
         # update the number of pressure gauges
         self.num_pressure_gauges = len(self.pressure_gauges)
 
-    def construct_wave_gauge_wse(self):
+    def _get_flume_eta(self):
         """
-        Construct the water surface elevation (wse) across the entire flume 
-        using the wave gauge data
+        Get the (num_wave_gauges + 1, num_times) surface elevation block.
+        If the wave maker and wave gauges were added by hand the block is built from them
+        and they're pointed at views of it so it's only copied once (row 0 is NaN without a wave maker).
         """
+        if self.flume_eta is None:
+            flume_eta = np.empty((self.num_wave_gauges + 1, self.num_times))
 
-        # Init array to store the surface elevations
-        surface_elevations = np.zeros((self.num_times, self.num_wave_gauges))
+            if self.wave_maker is not None:
+                flume_eta[0, :] = self.wave_maker.eta_wm
+                self.wave_maker.eta_wm = flume_eta[0]
+            else:
+                flume_eta[0, :] = np.nan
 
-        # Loop over the wave gauges
-        for i, wave_gauge in enumerate(self.wave_gauges):
-            # Get the measured water surface
-            surface_elevations[:, i] = wave_gauge.eta
+            for i, wave_gauge in enumerate(self.wave_gauges):
+                flume_eta[i + 1, :] = wave_gauge.eta
+                wave_gauge.eta = flume_eta[i + 1]
+
+            self.flume_eta = flume_eta
+
+        return self.flume_eta
+
+    @property
+    def wave_gauge_wse(self):
+        """
+        (num_times, num_wave_gauges) water surface elevation measured by the wave gauges.
+        This is a view of flume_eta, not a copy
+        """
+        return self._get_flume_eta()[1:].T
+
+    @property
+    def flume_wse(self):
+        """
+        (num_times, num_wave_gauges + 1) water surface elevation across the flume,
+        column 0 is the wave maker. This is a view of flume_eta, not a copy
+        """
+        return self._get_flume_eta().T
+
+    @property
+    def flume_wse_locs(self):
+        """
+        x-location of each column of flume_wse, indexed like a (num_times, num_wave_gauges + 1)
+        array eg. flume_wse_locs[index, :]. Only the wave maker (column 0) moves so the
+        locations are stored as the wave maker position and the static wave gauge locations
+        (see FlumeLocations)
+        """
+        if self._flume_wse_locs is None:
+            gauge_locations = [wave_gauge.location[0] for wave_gauge in self.wave_gauges]
+
+            self._flume_wse_locs = FlumeLocations(self.wave_maker.position, gauge_locations)
+
+        return self._flume_wse_locs
+
+    def grid_flume_wse(self, x_grid, chunk_size = 10000, out = None):
+        """
+        Interpolate flume_wse onto a regular x grid (eg. the xBeach grid) for every time.
+        Accounts for the moving wave maker and is processed in chunks of chunk_size times
+        (see spatial_funcs.grid_flume_wse)
+
+        Parameters:
+        - x_grid: (num_grid,) x-locations
+        - out: (num_times, num_grid) array to write into eg. a np.memmap
+
+        Returns:
+        - (num_times, num_grid) eta, NaN behind the wave maker and past the last wave gauge
+        """
+        locations = self.flume_wse_locs
+
+        return grid_flume_wse(self.flume_wse, locations.wave_maker_position, locations.gauge_locations,
+                              x_grid, chunk_size = chunk_size, out = out)
+
+    def iter_gridded_flume_wse(self, x_grid, chunk_size = 10000):
+        """
+        Same as grid_flume_wse but yields (start index, chunk) so the whole grid doesn't
+        have to be in memory
+        """
+        locations = self.flume_wse_locs
+
+        return iter_gridded_wse(self.flume_wse, locations.wave_maker_position, locations.gauge_locations,
+                                x_grid, chunk_size = chunk_size)
+
+    def export_xbeach(self, bathymetry, output_dir, water_level, **kwargs):
+        """
+        Write the inputs of an xBeach model of the run (see xbeach_funcs.export_run for the kwargs).
+        bathymetry is a Bathymetry or the path to bathy.mat, water_level is the run's
+        still water level in the bathymetry's z
+        """
+        return export_run(self, bathymetry, output_dir, water_level, **kwargs)
+
+    def get_adv_normalized_heights(self, bathymetry, site, water_level):
+        """
+        ADV heights normalized by the local depth at a site for this run, 0 at the sand bed
+        and 1 at the still water level (see Bathymetry.normalize_height)
+        """
+        return bathymetry.normalize_height(self.ADV_array.flume_height, site, self.id, water_level)
+
+    def predict_adv_velocity_amplitudes(self, depth, bed_level = 0.0):
+        """
+        Linear theory orbital velocity amplitudes at the ADV heights for the run's input
+        wave height and period, calculated for all of the sensors at once.
+        The measured amplitudes (half the range of u_ens_avg/w_ens_avg) are added when that data is loaded
+
+        Parameters:
+        - depth: Still water depth at the ADVs (m) eg. Bathymetry.local_depth(site, run.id, water_level)
+        - bed_level: Height of the bed in the datum of the ADV flume heights (m)
+
+        Returns:
+        - pandas.DataFrame with one row per sensor
+        """
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
+
+        z = self.ADV_array.flume_height - bed_level
+
+        u_amplitude, w_amplitude = calc_orbital_velocity_amplitude(self.height, self.wave_period, depth, z)
+
+        amplitudes = pd.DataFrame({"z": z, "u_amp_predicted": u_amplitude, "w_amp_predicted": w_amplitude},
+                                  index = pd.Index(self.ADV_array.sensor_names, name = "sensor"))
+
+        for key in ["u", "w"]:
+            ens_avg_key = f"{key}_ens_avg"
+
+            if self.ADV_array.vel.has_data(ens_avg_key):
+                ens_avg = self.ADV_array.vel[ens_avg_key]
+                amplitudes[f"{key}_amp_measured"] = 0.5 * (np.nanmax(ens_avg, axis = -1) - 
+                                                           np.nanmin(ens_avg, axis = -1))
+
+        return amplitudes
+
+    def window(self, start = None, end = None):
+        """
+        Get a lightweight Run with only the data in the time window [start, end) for all of the
+        instruments. Each instrument's window is found with a binary search on its own clock and
+        the data are views of this run's data (nothing is copied).
+        start/end can be anything pandas.Timestamp accepts (None is the start/end of the record)
+        """
+        run_window = copy.copy(self)
+
+        # Calculated values don't carry over
+        run_window._flume_wse_locs = None
+        run_window._spectra_cache  = {}
+        run_window._alignment_maps = {}
+        run_window.qc = None
+
+        # The window has its own instrumentation so it doesn't add to this run's report or hooks
+        run_window.report = None if self.report is None else new_report(self.id)
+        run_window.hooks  = []
+
+        has_wave_data = self.wave_maker is not None or bool(self.wave_gauges)
+
+        if self.date_time is None:
+            if has_wave_data:
+                raise ValueError(f"Run: {self.id} has wave data without times so it can't be windowed\n")
+
+            window_slice = slice(None)
+        else:
+            window_slice = time_slice(self.date_time, start, end)
+
+            run_window.date_time = self.date_time[window_slice]
+            run_window.num_times = len(run_window.date_time)
+
+            if run_window.num_times > 0:
+                run_window.start_date = run_window.date_time[0].date()
+
+        run_window.wave_gauges = []
+
+        if has_wave_data:
+            # One view of the block and the wave maker and gauges view into it
+            run_window.flume_eta = self._get_flume_eta()[:, window_slice]
+
+            if self.wave_maker is not None:
+                run_window.wave_maker = WaveMaker(run_window.flume_eta[0], 
+                                                  self.wave_maker.position[window_slice],
+                                                  run_window.date_time)
+
+            run_window.wave_gauges = [WaveGauge(wave_gauge.id, wave_gauge.location, 
+                                                run_window.flume_eta[i + 1], run_window.date_time)
+                                      for i, wave_gauge in enumerate(self.wave_gauges)]
 
-        # Store the water surface elevations in the object
-        self.wave_gauge_wse = surface_elevations
+        if self.ADV_array is not None:
+            run_window.ADV_array = self.ADV_array.window(start, end)
+            run_window.ADVs = run_window.ADV_array.to_ADVs()
+
+        run_window.pressure_gauges = [pressure_gauge.window(start, end) 
+                                      for pressure_gauge in self.pressure_gauges]
+
+        return run_window
+
+    @staticmethod
+    def _to_timedelta(duration):
+        """
+        Convert a duration in seconds (or anything pandas.Timedelta accepts) to a pandas.Timedelta
+        """
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
+
+        if isinstance(duration, (int, float, np.integer, np.floating)):
+            return pd.Timedelta(seconds = float(duration))
+
+        return pd.Timedelta(duration)
+
+    def iter_blocks(self, duration, overlap = 0.0, start = None, end = None, source = None):
+        """
+        Loop over the run in fixed-duration time blocks across all of the instruments
+        (chunked mode). Each block is a window of the run (see Run.window) so its data are
+        views, with mmap_mode = "r" only the block's samples are read from the cache and the
+        peak memory doesn't depend on the length of the run.
+
+        Parameters:
+        - duration: Length of each block, seconds or anything pandas.Timedelta accepts
+        - overlap: Extra time added to both sides of each window eg. for filters, the blocks
+                   themselves don't overlap
+        - start/end: Part of the record to loop over (None is the start/end of the record)
+        - source: Instrument whose clock the blocks span (see get_channel_data), defaults to
+                  the wave gauges or the first instrument that is loaded
+
+        Yields:
+        - block_start, block_end: pandas.Timestamp of the block [block_start, block_end)
+        - run_window: Run with the data in [block_start - overlap, block_end + overlap)
+        """
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
+
+        duration = self._to_timedelta(duration)
+        overlap  = self._to_timedelta(overlap)
+
+        if duration <= pd.Timedelta(0):
+            raise ValueError(f"duration: {duration} must be positive")
+
+        if source is None:
+            source = ("wave_gauges" if self.date_time is not None else
+                      "adv" if self.ADV_array is not None else "pressure")
+
+        clock = to_datetime64(self._get_clock(source))
+
+        if len(clock) == 0:
+            return
+
+        # The end is just after the last sample so it's in the last block
+        block_start = pd.Timestamp(clock[0] if start is None else start)
+        record_end  = pd.Timestamp(clock[-1]) + pd.Timedelta(1, "ns") if end is None else pd.Timestamp(end)
+
+        while block_start < record_end:
+            block_end = min(block_start + duration, record_end)
+
+            yield block_start, block_end, self.window(block_start - overlap, block_end + overlap)
+
+            block_start = block_end
+
+    def _iter_block_data(self, source, key, block_duration):
+        """
+        Yield the (num_channels, num_block_times) data of a source one block at a time.
+        block_duration = None yields the whole record as one block
+        """
+        if block_duration is None:
+            yield self.get_channel_data(source, key)[0]
+            return
+
+        for _, _, run_window in self.iter_blocks(block_duration, source = source):
+            yield run_window.get_channel_data(source, key)[0]
+
+    def get_realization_indices(self, date_time = None, pressure_gauge_index = 0):
+        """
+        Get the start and (exclusive) end index of each wave realization on the clock date_time.
+        The realizations are the zero-upcrossings found in the pressure gauge data, they're mapped
+        onto the other instruments using the start and end times.
+        date_time = None uses the pressure gauge's own clock
+        """
+        if not self.pressure_gauges:
+            raise ValueError("The pressure gauge data is needed to split the realizations.\n"
+                             "Use load_pressure_gauge_data first")
+
+        pressure_gauge = self.pressure_gauges[pressure_gauge_index]
+
+        if date_time is None:
+            return pressure_gauge.get_realization_indices()
+
+        start_times, end_times = pressure_gauge.date_start_end
+
+        return realization_indices_from_times(date_time, start_times, end_times)
+
+    def split_realizations(self, data, date_time, axis = -1, pressure_gauge_index = 0, 
+                           ragged = False, **kwargs):
+        """
+        Split a time series into the wave realizations. eg.
+            * Wave gauges: run.split_realizations(run.flume_eta, run.date_time)
+            * ADVs: run.split_realizations(run.ADV_array.vel["u"], run.ADV_array.date_time)
+
+        Returns a padded array where the time axis is replaced by (num_realizations, num_samples)
+        or (values, offsets) if ragged is True (see ensemble_funcs)
+        """
+        start_indices, end_indices = self.get_realization_indices(date_time, pressure_gauge_index)
+
+        if ragged:
+            return split_realizations_ragged(data, start_indices, end_indices, axis = axis)
+
+        return split_realizations(data, start_indices, end_indices, axis = axis, **kwargs)
+
+    def calc_ensemble_statistics(self, data, date_time, axis = -1, pressure_gauge_index = 0,
+                                 num_samples = None):
+        """
+        Phase average a time series over the wave realizations.
+        Returns a dict of the ensemble "mean", "var" and "count" (see ensemble_funcs)
+        """
+        realizations = self.split_realizations(data, date_time, axis = axis, 
+                                               pressure_gauge_index = pressure_gauge_index,
+                                               num_samples = num_samples)
+
+        # The realizations are on the axis where the time was
+        realization_axis = axis % np.ndim(data)
+
+        return ensemble_statistics(realizations, realization_axis = realization_axis)
+
+    def calc_wave_statistics(self, kind = "up", pressure_gauge_index = 0, block_duration = None):
+        """
+        Zero-crossing wave statistics of all the wave gauges in one call.
+        If the pressure gauge data is loaded the mean period is checked against the
+        pressure gauge's period_realization (Tm_diff_percent)
+
+        block_duration (s) processes the run one block at a time (see iter_blocks), the
+        mean of each gauge is found in a first pass over the blocks so the result is the
+        same as the whole record. Waves longer than a block are carried across the blocks
+
+        Returns:
+        - statistics: pandas.DataFrame with one row per wave gauge
+        - waves: dict of per-wave arrays (channel is the index of the wave gauge)
+        """
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
+
+        sample_period = calc_sample_period(self.date_time)
+
+        if block_duration is None:
+            statistics, waves = calc_wave_statistics(self.wave_gauge_wse, sample_period,
+                                                     kind = kind, axis = 0)
+        else:
+            mean = self._calc_block_moments("wave_gauges", None, block_duration)["mean"]
+
+            wave_state = new_wave_state(sample_period, kind = kind, mean = mean)
+
+            for data in self._iter_block_data("wave_gauges", None, block_duration):
+                update_waves(wave_state, data)
+
+            statistics, waves = finish_waves(wave_state)
+
+        statistics = pd.DataFrame(statistics, index = pd.Index([wave_gauge.id for wave_gauge in self.wave_gauges],
+                                                               name = "gauge_id"))
+
+        # Add the location so the statistics can be plotted along the flume
+        statistics.insert(0, "x_loc", [wave_gauge.location[0] for wave_gauge in self.wave_gauges])
+
+        if self.pressure_gauges and pressure_gauge_index is not None:
+            period_realization = self.pressure_gauges[pressure_gauge_index].period_realization
+
+            statistics["Tm_diff_percent"] = compare_periods(statistics["Tm"].to_numpy(), period_realization)
+
+        return statistics, waves
+
+    def get_channel_data(self, source, key = None):
+        """
+        Get the data of a group of instruments stacked as (num_channels, num_times)
+
+        Parameters:
+        - source: 
+            * "flume": wave maker eta_wm and all of the wave gauges
+            * "wave_gauges": wave gauge eta
+            * "wave_maker": wave maker eta_wm
+            * "adv": ADV velocity, key is the velocity key (eg. "u")
+            * "pressure": pressure gauge pressure
+
+        Returns:
+        - data: (num_channels, num_times) array, a view where possible
+        - date_time: times of the samples
+        - channel_names: name of each channel
+        """
+        rows, channel_names = self._get_source_channels(source)
+
+        if source in ["flume", "wave_gauges", "wave_maker"]:
+            return self._get_flume_eta()[rows], self.date_time, channel_names
+
+        if source == "adv":
+            if key is None:
+                raise ValueError("The velocity key is needed for the adv data eg. key = 'u'")
+
+            return self.ADV_array.vel[key], self.ADV_array.date_time, channel_names
+
+        # Pressure
+        lengths = {len(pressure_gauge.pressure) for pressure_gauge in self.pressure_gauges}
+
+        if len(lengths) > 1:
+            raise ValueError("The pressure gauges have a different number of samples "
+                             "so they can't be stacked")
+
+        data = np.vstack([np.ravel(pressure_gauge.pressure) for pressure_gauge in self.pressure_gauges])
+
+        return data, self.pressure_gauges[0].date_time, channel_names
+
+    def _calc_block_moments(self, source, key, block_duration):
+        """
+        Running count, mean, std, min and max of each channel of a source (see block_funcs)
+        """
+        moment_state = new_moment_state()
+
+        for data in self._iter_block_data(source, key, block_duration):
+            update_moments(moment_state, data)
+
+        return finish_moments(moment_state)
+
+    def calc_channel_moments(self, source = "wave_gauges", key = None, block_duration = None):
+        """
+        Count, mean, std, min and max of all of the channels of a source (see get_channel_data
+        for the sources), NaNs are skipped. block_duration (s) processes the run one block
+        at a time (see iter_blocks)
+
+        Returns:
+        - pandas.DataFrame with one row per channel
+        """
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
+
+        moments = self._calc_block_moments(source, key, block_duration)
+
+        channel_names = self._get_channel_names(source)
+
+        return pd.DataFrame(moments, index = pd.Index(channel_names, name = "channel"))
+
+    def calc_spectra(self, source = "wave_gauges", key = None, nperseg = DEFAULT_NPERSEG, 
+                     noverlap = None, window = "hann", block_duration = None):
+        """
+        Welch PSD of all of the channels of a source in one batched call (see get_channel_data
+        for the sources). The result is cached in the Run.
+        block_duration (s) processes the run one block at a time (see iter_blocks), the
+        Welch segments continue across the blocks so the PSD is the same as the whole record
+
+        Returns:
+        - frequency: (num_freqs,) (Hz)
+        - psd: (num_channels, num_freqs)
+        """
+        cache_key = (source, key, nperseg, noverlap, window, block_duration)
+
+        if cache_key not in self._spectra_cache:
+            sample_frequency = 1.0 / calc_sample_period(self._get_clock(source))
+
+            if block_duration is None:
+                data, _, _ = self.get_channel_data(source, key)
+
+                self._spectra_cache[cache_key] = welch_psd(data, sample_frequency, nperseg = nperseg,
+                                                           noverlap = noverlap, window = window)
+            else:
+                welch_state = new_welch_state(sample_frequency, nperseg = nperseg, noverlap = noverlap,
+                                              window = window)
+
+                for data in self._iter_block_data(source, key, block_duration):
+                    update_welch(welch_state, data)
+
+                self._spectra_cache[cache_key] = finish_welch(welch_state)
+
+        return self._spectra_cache[cache_key]
+
+    def calc_spectral_parameters(self, source = "wave_gauges", key = None, f_min = None, f_max = None,
+                                 **kwargs):
+        """
+        Spectral wave parameters (Hm0, Tp, Tm-1,0, Tm01, Tm02) of all the channels of a source.
+        kwargs are passed to calc_spectra
+
+        Returns:
+        - pandas.DataFrame with one row per channel
+        """
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
+
+        frequency, psd = self.calc_spectra(source, key, **kwargs)
+
+        channel_names = self._get_channel_names(source)
+
+        parameters = calc_spectral_parameters(frequency, psd, f_min = f_min, f_max = f_max)
+
+        return pd.DataFrame(parameters, index = pd.Index(channel_names, name = "channel"))
+
+    def calc_pressure_eta(self, sensor_heights, depths = None, cutoff = 1.0, max_factor = None, 
+                          chunk_size = None, overlap = 2**12):
+        """
+        Reconstruct the water surface elevation from all of the pressure gauges in one batch
+        with the pressure response factor (see pressure_funcs.pressure_to_eta)
+
+        Parameters:
+        - sensor_heights: Height of each pressure gauge above the bed (m), scalar or (num_pressure_gauges,)
+        - depths: Still water depth at each gauge (m), defaults to the mean pressure + sensor height
+        - cutoff: Cutoff frequency (Hz)
+        - max_factor: Largest correction allowed
+        - chunk_size: Process the record in chunks of chunk_size samples with overlap
+                      samples of context (None does the whole record at once)
+
+        Returns:
+        - eta: (num_pressure_gauges, num_times)
+        - date_time: times of the samples
+        - channel_names: location of each pressure gauge
+        """
+        pressure, date_time, channel_names = self.get_channel_data("pressure")
+
+        sample_period = calc_sample_period(date_time)
+
+        if chunk_size is None:
+            eta = pressure_to_eta(pressure, sample_period, sensor_heights, depths, cutoff, max_factor)
+        else:
+            eta = pressure_to_eta_chunked(pressure, sample_period, sensor_heights, depths, cutoff,
+                                          max_factor, chunk_size = chunk_size, overlap = overlap)
+
+        return eta, date_time, channel_names
+
+    def run_qc(self, adv_keys = ["u", "v", "w"], spike_threshold = 6.0, flatline_duration = 1.0,
+               flatline_tolerance = 0.0, max_iterations = 20, fill_adv = True):
+        """
+        Quality control all of the loaded instruments, each source is checked as one
+        (num_channels, num_times) matrix (see qc_funcs.qc_channels):
+            * wave_gauges, pressure: spike, flatline and gap detection
+            * adv_<key>: phase-space despiking, flatline and gap detection
+
+        The masks are stored packed in self.qc (see get_qc_mask) and the ADV velocity with
+        the bad samples interpolated is stored in ADV_array.cleaned_vel and each ADV.cleaned_vel
+
+        Parameters:
+        - adv_keys: ADV velocity keys to despike
+        - spike_threshold: Threshold of qc_funcs.detect_spikes for the wave gauges and pressure
+        - flatline_duration: Shortest flatline (s)
+        - flatline_tolerance: Largest change between samples of a flatline
+        - max_iterations: Passes of the phase-space despiking
+        - fill_adv: Store the cleaned ADV velocity
+
+        Returns:
+        - summary: pandas.DataFrame of the number of flagged samples, one row per (source, channel)
+        """
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
+
+        sources = []
+
+        if self.wave_gauges:
+            sources.append(("wave_gauges", "wave_gauges", None))
+        if self.pressure_gauges:
+            sources.append(("pressure", "pressure", None))
+        if self.ADV_array is not None:
+            sources += [(f"adv_{key}", "adv", key) for key in adv_keys if self.ADV_array.vel.has_data(key)]
+
+        self.qc = {"masks": {}, "time_gaps": {}, "summary": None}
+        summaries = []
+
+        for name, source, key in sources:
+            data, date_time, channel_names = self.get_channel_data(source, key)
+
+            masks = qc_channels(data, calc_sample_period(date_time), despike = source == "adv",
+                                spike_threshold = spike_threshold, flatline_duration = flatline_duration,
+                                flatline_tolerance = flatline_tolerance, max_iterations = max_iterations)
+
+            time_gaps = find_time_gaps(to_datetime64(date_time))
+
+            if source == "adv" and fill_adv:
+                self._store_cleaned_velocity(key, fill_masked(data, masks["bad"]))
+
+            self.qc["masks"][name] = {flag: pack_mask(mask) for flag, mask in masks.items()}
+            self.qc["time_gaps"][name] = time_gaps
+
+            summary = pd.DataFrame(summarize_masks(masks, channel_names))
+            summary.insert(0, "source", name)
+            summary["time_gaps"] = len(time_gaps[0])
+
+            summaries.append(summary)
+
+        if summaries:
+            self.qc["summary"] = pd.concat(summaries, ignore_index = True).set_index(["source", "channel"])
+
+        self._emit("qc_done", f"QC'd {len(sources)} source(s)",
+                   sources = [name for name, _, _ in sources])
+
+        return self.qc["summary"]
+
+    def _store_cleaned_velocity(self, key, cleaned_data):
+        """
+        Store the cleaned velocity of a key in the ADVArray and link each ADV to its row
+        """
+        self.ADV_array.store_cleaned_velocity(key, cleaned_data)
+
+        sensor_index = {name: i for i, name in enumerate(self.ADV_array.sensor_names)}
+
+        for adv in self.ADVs:
+            if adv.name in sensor_index:
+                adv.cleaned_vel[key] = self.ADV_array.cleaned_vel[key][sensor_index[adv.name]]
+
+    def get_qc_mask(self, source, flag = "bad"):
+        """
+        Get a QC mask (see run_qc) as a (num_channels, num_times) bool array
+
+        Parameters:
+        - source: "wave_gauges", "pressure" or "adv_<key>" eg. "adv_u"
+        - flag: "spike", "flatline", "gap" or "bad"
+        """
+        if self.qc is None:
+            raise ValueError("The QC hasn't been run yet. Use run_qc first")
+
+        if source not in self.qc["masks"]:
+            raise KeyError(f"Source: {source} doesn't have a QC mask.\n"
+                           f"Valid sources are: {list(self.qc['masks'].keys())}")
+
+        return unpack_mask(self.qc["masks"][source][flag])
+
+    def _get_clock(self, source):
+        """
+        Get the times of a source without loading its data
+        """
+        self._check_source(source)
+
+        if source == "adv":
+            return self.ADV_array.date_time
+        if source == "pressure":
+            return self.pressure_gauges[0].date_time
+
+        return self.date_time
+
+    def _check_source(self, source):
+        """
+        Raise an error if source isn't one of the valid_sources
+        """
+        if source not in self.valid_sources:
+            raise ValueError(f"source: {source} is not valid.\n"
+                             f"Valid sources are: {self.valid_sources}")
+
+    def _get_source_channels(self, source):
+        """
+        Get the rows of a source in its stacked data and the names of its channels
+        without loading the data (see get_channel_data)
+
+        Returns:
+        - rows: slice of the stacked rows eg. the wave gauge rows of flume_eta
+        - channel_names: name of each channel
+        """
+        self._check_source(source)
+
+        if source == "adv":
+            return slice(None), self.ADV_array.sensor_names
+        if source == "pressure":
+            return slice(None), [pressure_gauge.location for pressure_gauge in self.pressure_gauges]
+
+        # Row 0 of flume_eta is the wave maker and the rest are the wave gauges
+        channel_names = ["wave_maker"] + [f"WG{wave_gauge.id}" for wave_gauge in self.wave_gauges]
+        rows = {"flume": slice(None), "wave_gauges": slice(1, None), "wave_maker": slice(0, 1)}[source]
+
+        return rows, channel_names[rows]
+
+    def _get_channel_names(self, source):
+        """
+        Get the channel names of a source without loading its data (see get_channel_data)
+        """
+        return self._get_source_channels(source)[1]
+
+    def _get_alignment_map(self, source_time, target_time, method):
+        """
+        Get the interpolation map from one clock to another, cached per (source, target) clock pair
+        """
+        cache_key = (get_clock_key(source_time), get_clock_key(target_time), method)
+
+        if cache_key not in self._alignment_maps:
+            self._alignment_maps[cache_key] = get_interpolation_map(source_time, target_time, method)
+
+        return self._alignment_maps[cache_key]
+
+    def align(self, channels, target = "wave_gauges", method = "linear", anti_alias = "butter"):
+        """
+        Resample channels from different instruments onto a common time base.
+        All of the channels of a source are resampled in one vectorized pass and the
+        interpolation maps are cached per (source, target) clock pair.
+
+        Parameters:
+        - channels: List of sources (see get_channel_data), either the source name eg. "wave_gauges"
+                    or (source, key) eg. ("adv", "u")
+        - target: Time base, a source name (uses that source's clock) or an array of times
+        - method: "linear" or "nearest"
+        - anti_alias: "butter", "mean" or None, low pass filter applied to sources that are
+                      sampled faster than the target (see resample_funcs.anti_alias_filter).
+                      NaN gaps are filled before filtering and put back after resampling
+                      so they don't spread through the channel (see resample_funcs.resample_channels)
+
+        Returns:
+        - target_time: times of the aligned data
+        - aligned: (num_times, num_channels) array, NaN outside of each source's record
+        - channel_names: name of each column
+        """
+        if isinstance(target, str):
+            target_time = self._get_clock(target)
+        else:
+            target_time = target
+
+        aligned_channels = []
+        channel_names = []
+
+        for channel in channels:
+            source, key = (channel, None) if isinstance(channel, str) else channel
+
+            data, source_time, names = self.get_channel_data(source, key)
+
+            interpolation_map = self._get_alignment_map(source_time, target_time, method)
+
+            aligned_channels.append(resample_channels(data, source_time, target_time, method = method,
+                                                      anti_alias = anti_alias,
+                                                      interpolation_map = interpolation_map))
+
+            channel_names += [f"{name}_{key}" if key is not None else str(name) for name in names]
+
+        return target_time, np.vstack(aligned_channels).T, channel_names
+
+    def construct_wave_gauge_wse(self):
+        """
+        Construct the water surface elevation (wse) across the entire flume 
+        using the wave gauge data.
+        wave_gauge_wse is now a view of flume_eta so this only makes sure the block exists
+        """
+        self._get_flume_eta()
 
     def get_wave_gauge_locations(self):
         """
         Get and store the wave gauge locations
         """
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
 
         # Number of location dimensions
         num_dim = 2
@@ -391,31 +1355,18 @@ class Run:
         Construct the wse across the entire flume
         This differs from construct construct_wave_gauge_wse in that it
         includes the surface elevation of the wave maker.
-        This adds a little complexity because the location of the wave maker moves
+        flume_wse is now a view of flume_eta and flume_wse_locs is built
+        when it's first used so this only makes sure the block exists
         """
-        # Just need to append the wave maker data to the gauge data
-        
-        x_location = np.zeros((self.num_times, self.num_wave_gauges + 1))
-        water_surface_elevation = np.zeros((self.num_times, self.num_wave_gauges + 1))
-        
-        # Fill the x_location data
-        x_location[:, 0]  = self.wave_maker.position
-
-        x_location[:, 1:] = self.wg_locations["x_loc"]
-
-        # Fill the wse data
-        water_surface_elevation[:, 0]  = self.wave_maker.eta_wm
-        water_surface_elevation[:, 1:] = self.wave_gauge_wse
-
-        # Store the data in the object
-        self.flume_wse = water_surface_elevation
-        self.flume_wse_locs  = x_location
+        self._get_flume_eta()
 
     def quick_flume_wse_plot(self, time_index, figsize = (8, 4), 
                              legend = False, **kwargs):
         """
         Plot the water surface elevation using the wave gauge data using a 
         """
+        # Lazy import (see lib/__init__.py)
+        import matplotlib.pyplot as plt
 
         #Create the figure plot object
         fig, axs = plt.subplots(nrows = 1, ncols = 1, figsize = figsize)
@@ -457,10 +1408,14 @@ class Run:
 
     def quick_plot_wave_gauges(self, gauge_ids, figsize = (8, 6), 
                                legend = False, ylabel = True,
-                               xlabel= True, time_units= "min", **kwargs):
+                               xlabel= True, time_units= "min", max_points = None,
+                               method = "minmax", **kwargs):
         """
         Plot wave gauge data as a function of time
+        The data is decimated to max_points (see plot_funcs.plot_decimated)
         """
+        # Lazy import (see lib/__init__.py)
+        import matplotlib.pyplot as plt
 
         if isinstance(gauge_ids, list):
             num_gauges = len(gauge_ids)
@@ -485,7 +1440,8 @@ class Run:
             wave_gauge = self.wave_gauges[id - 1]
 
             # Select the gauge
-            axs[i].plot(time, wave_gauge.eta, label = f"{wave_gauge.id}")
+            plot_decimated(axs[i], time, wave_gauge.eta, max_points = max_points, method = method,
+                           label = f"{wave_gauge.id}", **kwargs)
 
             if ylabel:
                 axs[i].set_ylabel("Water Surf. Elev. (m)")
@@ -5,8 +5,8 @@ Author: WaveHello
 
 Date: 07/02/2024
 """
-# Standard imports
-import matplotlib.pyplot as plt
+# Library imports
+from lib.general_funcs.plot_funcs import plot_decimated
 
 class WaveGauge:
     wave_gauge_type_dict = {
@@ -47,16 +47,21 @@ class WaveGauge:
         # Set the wave gauge type using the gauge id
         self.type = WaveGauge.wave_gauge_type_dict[self.id]
 
-    def quick_plot(self, figsize = (8,4), legend = False, ylim= None, **kwargs):
+    def quick_plot(self, figsize = (8,4), legend = False, ylim= None, max_points = None, 
+                   method = "minmax", **kwargs):
         """
         Quick plot of the wse at this specific gauge
+        The data is decimated to max_points (see plot_funcs.plot_decimated)
         """
+        # Lazy import (see lib/__init__.py)
+        import matplotlib.pyplot as plt
 
         # Create the figure object
         fig, axs = plt.subplots(nrows = 1, ncols = 1, figsize = figsize)
 
         # Create the plot title
-        axs.plot(self.date_time, self.eta, label = f"Location (x, y): {self.location}", **kwargs)
+        plot_decimated(axs, self.date_time, self.eta, max_points = max_points, method = method,
+                       label = f"Location (x, y): {self.location}", **kwargs)
         
         # Format the plot
         axs.set_title(f"WSE. (m) vs. Time (min), Gauge id: {self.id}")
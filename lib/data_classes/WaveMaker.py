@@ -6,10 +6,9 @@ Author: WaveHello
 Date: 07/02/2024
 """
 
-# Standard imports
-import matplotlib.pyplot as plt
-
 # Libary imports
+from lib.general_funcs.plot_funcs import plot_decimated
+from lib.general_funcs.kinematic_funcs import calc_velocity_acceleration
 
 class WaveMaker:
     def __init__(self, eta_wm, position, date_time):
@@ -35,17 +34,21 @@ class WaveMaker:
 
         return return_string
     
-    def quick_position_plot(self, figsize = (8,4), axs = None, legend = False, **kwargs):
+    def quick_position_plot(self, figsize = (8,4), axs = None, legend = False, max_points = None,
+                            method = "minmax", **kwargs):
         """
         Plot the location of the wave maker as a function of time
+        The data is decimated to max_points (see plot_funcs.plot_decimated)
         """
+        # Lazy import (see lib/__init__.py)
+        import matplotlib.pyplot as plt
 
         if axs is None:
             # Create the figure object
             fig, axs = plt.subplots(nrows = 1, ncols =1 , figsize = figsize)
 
         # Plot the data
-        axs.plot(self.date_time, self.position, **kwargs)
+        plot_decimated(axs, self.date_time, self.position, max_points = max_points, method = method, **kwargs)
 
         axs.set_title("Wave Maker position vs. Time")
         axs.set_xlabel("Time (min)")
@@ -54,10 +57,14 @@ class WaveMaker:
         if legend:
             axs.legend()
 
-    def quick_wse_plot(self, figsize = (8,4), axs = None, legend = False, **kwargs):
+    def quick_wse_plot(self, figsize = (8,4), axs = None, legend = False, max_points = None,
+                       method = "minmax", **kwargs):
         """
         Plot the water surface elevation infront of the wave maker vs. time
+        The data is decimated to max_points (see plot_funcs.plot_decimated)
         """
+        # Lazy import (see lib/__init__.py)
+        import matplotlib.pyplot as plt
 
         # If an axis isn't paced make a new one
         if axs is None:
@@ -67,7 +74,7 @@ class WaveMaker:
         # Otherwise used the provided axis
 
         # Plot the data
-        axs.plot(self.date_time, self.eta_wm, **kwargs)
+        plot_decimated(axs, self.date_time, self.eta_wm, max_points = max_points, method = method, **kwargs)
 
         axs.set_title("Wave Maker WSE vs. Time")
         axs.set_xlabel("Time (min)")
@@ -78,5 +85,17 @@ class WaveMaker:
 
     def calc_velocity(self):
         """
-        Calc the velocity of the wave gauge. I think I can use this as as flow"""
-        pass
\ No newline at end of file
+        Calc the velocity of the face of the wave maker (m/s) from its position.
+        For a piston wave maker this is the (depth uniform) velocity of the flow at the paddle
+        """
+        velocity, _ = calc_velocity_acceleration(self.position, self.date_time)
+
+        return velocity
+
+    def calc_acceleration(self):
+        """
+        Calc the acceleration of the face of the wave maker (m/s^2) from its position
+        """
+        _, acceleration = calc_velocity_acceleration(self.position, self.date_time)
+
+        return acceleration
\ No newline at end of file
@@ -0,0 +1,3 @@
+"""
+Classes that hold the BarSed data (one module per class, eg. lib.data_classes.Run)
+"""
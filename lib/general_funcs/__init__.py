@@ -0,0 +1,3 @@
+"""
+Functions used by the data classes and the notebooks (grouped by topic, eg. lib.general_funcs.spectral_funcs)
+"""
@@ -0,0 +1,207 @@
+"""
+Functions for animating the water surface elevation along the flume (Run.flume_wse).
+
+The bathymetry is drawn once and only the water surface line and the time label are
+updated for each frame (blitting). Frames can be strided and limited to a time window.
+The headless renderer draws chunks of frames in a process pool and writes a PNG
+sequence or an MP4 (with ffmpeg).
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Library imports
+from lib.general_funcs.datetime_funcs import to_datetime64
+
+def get_frame_indices(date_time, stride = 1, start = None, end = None):
+    """
+    Get the time indices of the frames.
+
+    Parameters:
+    - date_time: Times of the run
+    - stride: Use every stride-th time
+    - start, end: Time window, either time indices or datetimes (end is exclusive).
+                  None uses the start/end of the run
+    """
+    num_times = len(date_time)
+
+    def to_index(value, default):
+        if value is None:
+            return default
+        if isinstance(value, (int, np.integer)):
+            return int(value)
+
+        # Binary search for the datetime
+        return int(np.searchsorted(to_datetime64(date_time), np.datetime64(value, "ns")))
+
+    start_index = to_index(start, 0)
+    end_index   = to_index(end, num_times)
+
+    return np.arange(start_index, min(end_index, num_times), stride)
+
+def _draw_flume(ax, bathy_x, bathy_z, ylim, title):
+    """
+    Draw the parts of the plot that don't change and return the animated artists
+    """
+    ax.plot(bathy_x, bathy_z, label = "flume bottom", color = "grey")
+
+    # Empty water surface line, filled in by each frame
+    wse_line, = ax.plot([], [], label = "water surface", color = "tab:blue")
+    time_text = ax.text(0.02, 0.95, "", transform = ax.transAxes, va = "top")
+
+    ax.set_xlim((min(np.min(bathy_x), 0), np.max(bathy_x)))
+    ax.set_ylim(ylim)
+    ax.set_xlabel("x-direction (m)", weight = "bold")
+    ax.set_ylabel("Surface Elevation (m)", weight = "bold")
+    ax.set_title(title)
+    ax.legend(loc = "lower right")
+
+    return wse_line, time_text
+
+def _get_frame_data(run, frame_indices, water_level):
+    """
+    Get the (shifted) water surface, locations and time labels of the frames
+    """
+    wse = run.flume_wse[frame_indices] + water_level
+    locations = run.flume_wse_locs[frame_indices]
+    time_labels = [f"time: {str(time)[11:19]}" for time in to_datetime64(run.date_time)[frame_indices]]
+
+    return wse, locations, time_labels
+
+def animate_flume_wse(run, bathy_x, bathy_z, water_level = None, stride = 1, start = None,
+                      end = None, interval = 100, figsize = (8, 4), ylim = (0, 3.5)):
+    """
+    Blitted animation of the water surface along the flume.
+
+    Parameters:
+    - run: Run with the wave data loaded
+    - bathy_x, bathy_z: Bathymetry of the flume (eg. bathy.mat)
+    - water_level: Still water level the wse is shifted by, defaults to the max bathymetry height
+    - stride, start, end: Which times to animate (see get_frame_indices)
+    - interval: Time between frames (ms)
+
+    Returns:
+    - matplotlib.animation.FuncAnimation, use .save() or display it in a notebook
+    """
+    # Lazy import (see lib/__init__.py)
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    if water_level is None:
+        water_level = np.max(bathy_z)
+
+    frame_indices = get_frame_indices(run.date_time, stride, start, end)
+
+    # Get the data of all the frames once instead of indexing the run every frame
+    wse, locations, time_labels = _get_frame_data(run, frame_indices, water_level)
+
+    fig, ax = plt.subplots(figsize = figsize)
+    wse_line, time_text = _draw_flume(ax, bathy_x, bathy_z, ylim,
+                                      f"Run id: {run.id}, BarSed Experiment - OSU WSE Plot")
+
+    def init_plot():
+        wse_line.set_data([], [])
+        time_text.set_text("")
+        return wse_line, time_text
+
+    def update_plot(frame):
+        """
+        Update only the water surface and the time
+        """
+        wse_line.set_data(locations[frame], wse[frame])
+        time_text.set_text(time_labels[frame])
+        return wse_line, time_text
+
+    return FuncAnimation(fig, update_plot, frames = len(frame_indices), init_func = init_plot,
+                         interval = interval, blit = True)
+
+def _render_frame_chunk(first_frame, wse, locations, time_labels, bathy_x, bathy_z, ylim, title,
+                        output_dir, figsize, dpi):
+    """
+    Render a chunk of frames to PNG files. Module level so it can run in a worker process.
+    Uses the Agg canvas directly so pyplot isn't needed in the workers
+    """
+    # Lazy import (see lib/__init__.py)
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize = figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    wse_line, time_text = _draw_flume(ax, bathy_x, bathy_z, ylim, title)
+
+    for i in range(len(wse)):
+        wse_line.set_data(locations[i], wse[i])
+        time_text.set_text(time_labels[i])
+
+        fig.savefig(os.path.join(output_dir, f"frame_{first_frame + i:06d}.png"), dpi = dpi)
+
+    return len(wse)
+
+def render_flume_frames(run, bathy_x, bathy_z, output_path, water_level = None, stride = 1,
+                        start = None, end = None, fps = 10, max_workers = None, chunk_size = 200,
+                        figsize = (8, 4), dpi = 100, ylim = (0, 3.5)):
+    """
+    Headless rendering of the flume animation in a process pool.
+
+    Parameters:
+    - output_path: A folder for a PNG sequence or a .mp4 file (needs ffmpeg on the path)
+    - max_workers: Number of worker processes (None uses the number of cores)
+    - chunk_size: Number of frames each worker renders at a time
+    - fps: Frames per second of the MP4
+    - The rest are the same as animate_flume_wse
+
+    Returns:
+    - output_path
+    """
+    if water_level is None:
+        water_level = np.max(bathy_z)
+
+    make_movie = output_path.lower().endswith(".mp4")
+
+    if make_movie and shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg is needed to write an MP4. Install it or write a PNG sequence")
+
+    # PNGs for a movie are written to a temporary folder
+    frame_dir = tempfile.mkdtemp(prefix = "flume_frames_") if make_movie else output_path
+    os.makedirs(frame_dir, exist_ok = True)
+
+    frame_indices = get_frame_indices(run.date_time, stride, start, end)
+    title = f"Run id: {run.id}, BarSed Experiment - OSU WSE Plot"
+
+    try:
+        with ProcessPoolExecutor(max_workers = max_workers) as executor:
+            futures = []
+
+            for first_frame in range(0, len(frame_indices), chunk_size):
+                # Only send the rows the chunk needs to the worker
+                chunk_indices = frame_indices[first_frame: first_frame + chunk_size]
+                wse, locations, time_labels = _get_frame_data(run, chunk_indices, water_level)
+
+                futures.append(executor.submit(_render_frame_chunk, first_frame, wse, locations,
+                                               time_labels, bathy_x, bathy_z, ylim, title,
+                                               frame_dir, figsize, dpi))
+
+            # Raise any errors from the workers
+            for future in futures:
+                future.result()
+
+        if make_movie:
+            subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-framerate", str(fps),
+                            "-i", os.path.join(frame_dir, "frame_%06d.png"),
+                            "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+                            output_path], check = True)
+    finally:
+        if make_movie:
+            shutil.rmtree(frame_dir, ignore_errors = True)
+
+    return output_path
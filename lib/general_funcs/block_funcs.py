@@ -0,0 +1,291 @@
+"""
+Functions for analyzing a record one time block at a time (see Run.iter_blocks) so the
+peak memory doesn't depend on the length of the run.
+
+Each analysis has a state dict that is updated with the (num_channels, num_block_times)
+data of each block in order and finished when all of the blocks have been seen:
+
+    state = new_moment_state()
+    for block in blocks:
+        update_moments(state, block)
+    moments = finish_moments(state)
+
+The states only keep what is needed to continue at the next block (running sums, the
+samples of the unfinished Welch segment or wave) so the results match analyzing the
+whole record at once. The carried samples of a wave aren't limited to a block, a wave
+longer than the blocks is kept across as many blocks as it takes to finish.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import numpy as np
+
+# Library imports
+from lib.general_funcs.spectral_funcs import (welch_psd, welch_segment_power, scale_welch_power,
+                                              DEFAULT_NPERSEG)
+from lib.general_funcs.wave_statistics import zero_crossing_analysis, summarize_waves, _find_crossings
+
+def _as_channels(block, axis = -1):
+    """
+    Convert a block to a (num_channels, num_times) float array
+    """
+    data = np.moveaxis(np.asarray(block, dtype = float), axis, -1)
+
+    return np.atleast_2d(data).reshape(-1, data.shape[-1])
+
+def new_moment_state():
+    """
+    Make an empty state for the running count, mean, variance, min and max of each channel
+    """
+    return {"count": None, "mean": None, "m2": None, "min": None, "max": None}
+
+def update_moments(state, block, axis = -1):
+    """
+    Add a block to the running moments. The block's moments are merged with the
+    running ones (Chan et al.) so the variance doesn't lose precision. NaNs are skipped
+    """
+    data = _as_channels(block, axis)
+
+    if data.shape[1] == 0:
+        return state
+
+    finite = np.isfinite(data)
+
+    block_count = np.sum(finite, axis = 1)
+    block_sum   = np.sum(np.where(finite, data, 0.0), axis = 1)
+
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        block_mean = np.where(block_count > 0, block_sum / block_count, 0.0)
+
+    block_m2  = np.sum(np.where(finite, data - block_mean[:, None], 0.0)**2, axis = 1)
+    block_min = np.fmin.reduce(data, axis = 1)
+    block_max = np.fmax.reduce(data, axis = 1)
+
+    if state["count"] is None:
+        state.update(count = block_count, mean = block_mean, m2 = block_m2,
+                     min = block_min, max = block_max)
+        return state
+
+    count = state["count"] + block_count
+    delta = block_mean - state["mean"]
+
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        weight = np.where(count > 0, block_count / count, 0.0)
+
+    state["m2"]    = state["m2"] + block_m2 + delta**2 * state["count"] * weight
+    state["mean"]  = state["mean"] + delta * weight
+    state["count"] = count
+    state["min"]   = np.fmin(state["min"], block_min)
+    state["max"]   = np.fmax(state["max"], block_max)
+
+    return state
+
+def finish_moments(state):
+    """
+    Returns:
+    - dict of (num_channels,) arrays: count, mean, std (population), min and max.
+      The mean and std are NaN for channels without any finite samples
+    """
+    count = state["count"]
+
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        mean = np.where(count > 0, state["mean"], np.nan)
+        std  = np.sqrt(state["m2"] / count)
+
+    return {"count": count, "mean": mean, "std": std, "min": state["min"], "max": state["max"]}
+
+def new_welch_state(sample_frequency, nperseg = DEFAULT_NPERSEG, noverlap = None, window = "hann",
+                    detrend = True):
+    """
+    Make an empty state for a Welch PSD (see spectral_funcs.welch_psd for the parameters)
+    """
+    return {"sample_frequency": sample_frequency,
+            "nperseg": int(nperseg),
+            "noverlap": noverlap,
+            "window": window,
+            "detrend": detrend,
+            "tail": None,           # Samples from the start of the next segment on
+            "power": None,          # Sum of the segments' |FFT|^2
+            "num_segments": 0
+    }
+
+def update_welch(state, block, axis = -1):
+    """
+    Add a block to a Welch PSD. The segments continue across the blocks so they're the
+    same segments the whole record would have, the samples after the last full segment
+    are carried to the next block
+    """
+    data = _as_channels(block, axis)
+
+    if state["tail"] is not None:
+        data = np.concatenate((state["tail"], data), axis = 1)
+
+    nperseg  = state["nperseg"]
+    noverlap = nperseg // 2 if state["noverlap"] is None else state["noverlap"]
+
+    if data.shape[1] < nperseg:
+        state["tail"] = data
+        return state
+
+    power, num_segments = welch_segment_power(data, nperseg, noverlap, window = state["window"],
+                                              detrend = state["detrend"])
+
+    state["power"] = power if state["power"] is None else state["power"] + power
+    state["num_segments"] += num_segments
+
+    # Copy so the block the tail came from can be freed
+    state["tail"] = data[:, num_segments * (nperseg - noverlap):].copy()
+
+    return state
+
+def finish_welch(state):
+    """
+    Returns:
+    - frequency: (num_freqs,) (Hz)
+    - psd: (num_channels, num_freqs)
+    """
+    # Records shorter than a segment use a shorter segment like welch_psd
+    if state["num_segments"] == 0:
+        return welch_psd(state["tail"], state["sample_frequency"], nperseg = state["nperseg"],
+                         noverlap = state["noverlap"], window = state["window"],
+                         detrend = state["detrend"])
+
+    return scale_welch_power(state["power"], state["num_segments"], state["sample_frequency"],
+                             state["nperseg"], window = state["window"])
+
+def new_wave_state(sample_period, kind = "up", mean = None):
+    """
+    Make an empty state for the zero-crossing wave statistics (see wave_statistics.calc_wave_statistics)
+
+    Parameters:
+    - sample_period: Time between samples (s)
+    - kind: "up" or "down" crossing
+    - mean: Mean of each channel that is removed before finding the crossings, eg. from
+            finish_moments. None doesn't remove a mean
+    """
+    return {"sample_period": sample_period,
+            "kind": kind,
+            "mean": None if mean is None else np.asarray(mean, dtype = float).reshape(-1, 1),
+            "buffer": None,           # Samples from the start of the unfinished waves on
+            "offset": 0,              # Index of the buffer's first sample in the record
+            "last_start": None,       # Start time (s) of the last wave kept on each channel
+            "waves": [],
+            "gradient_tail": None,    # Last two samples, their derivative needs the next sample
+            "gradient_started": False,
+            "eta_moments": new_moment_state(),
+            "deta_moments": new_moment_state()
+    }
+
+def _update_gradient_moments(state, data):
+    """
+    Add the time derivative of a block to the running moments. The derivative is
+    the same as np.gradient of the whole record (central differences, one sided at the ends)
+    """
+    sample_period = state["sample_period"]
+
+    if state["gradient_tail"] is not None:
+        data = np.concatenate((state["gradient_tail"], data), axis = 1)
+
+    # First sample of the record
+    if not state["gradient_started"] and data.shape[1] >= 2:
+        update_moments(state["deta_moments"], (data[:, 1:2] - data[:, :1]) / sample_period)
+        state["gradient_started"] = True
+
+    if data.shape[1] >= 3:
+        update_moments(state["deta_moments"], (data[:, 2:] - data[:, :-2]) / (2 * sample_period))
+
+    state["gradient_tail"] = data[:, -2:].copy()
+
+def update_waves(state, block, axis = -1):
+    """
+    Add a block to the wave statistics. The waves that aren't finished at the end of the
+    block are carried to the next block however long they are, so the carried samples
+    only grow past a block while a channel has no new crossing (eg. a dead gauge)
+    """
+    data = _as_channels(block, axis)
+
+    if state["mean"] is not None:
+        data = data - state["mean"]
+
+    update_moments(state["eta_moments"], data)
+    _update_gradient_moments(state, data)
+
+    if state["buffer"] is not None:
+        data = np.concatenate((state["buffer"], data), axis = 1)
+
+    num_channels, num_times = data.shape
+    sample_period = state["sample_period"]
+
+    if state["last_start"] is None:
+        state["last_start"] = np.full(num_channels, -np.inf)
+
+    waves = zero_crossing_analysis(data, sample_period, kind = state["kind"], axis = -1,
+                                   remove_mean = False)
+
+    # Times relative to the start of the record
+    waves["start_time"] = waves["start_time"] + state["offset"] * sample_period
+
+    # The waves of the carried samples were already kept. Crossings are at least a sample
+    # apart so half a sample covers the rounding of the start times
+    is_new = waves["start_time"] > state["last_start"][waves["channel"]] + 0.5 * sample_period
+    waves = {name: values[is_new] for name, values in waves.items()}
+
+    state["waves"].append(waves)
+    np.maximum.at(state["last_start"], waves["channel"], waves["start_time"])
+
+    # Carry the samples from the last crossing of each channel on, the last sample is
+    # always kept so a crossing between the blocks is found
+    channel, sample, _ = _find_crossings(data, state["kind"])
+
+    carry_start = num_times - 1
+    if sample.size > 0:
+        # The crossings are sorted by channel then time
+        is_last = np.append(channel[1:] != channel[:-1], True)
+        carry_start = min(carry_start, int(np.min(sample[is_last])))
+
+    state["buffer"] = data[:, carry_start:].copy()
+    state["offset"] += carry_start
+
+    return state
+
+def finish_waves(state):
+    """
+    Returns:
+    - statistics: dict of (num_channels,) arrays (see wave_statistics.calc_wave_statistics)
+    - waves: dict of per-wave arrays, start_time is from the start of the record
+    """
+    waves = {name: np.concatenate([block_waves[name] for block_waves in state["waves"]])
+             for name in ["channel", "start_time", "period", "height", "crest", "trough"]}
+
+    # Sort by channel then time like zero_crossing_analysis
+    order = np.lexsort((waves["start_time"], waves["channel"]))
+    waves = {name: values[order] for name, values in waves.items()}
+
+    # Derivative of the last sample
+    tail = state["gradient_tail"]
+    if tail is not None and tail.shape[1] == 2:
+        update_moments(state["deta_moments"], (tail[:, 1:] - tail[:, :1]) / state["sample_period"])
+
+    eta_moments  = finish_moments(state["eta_moments"])
+    deta_moments = finish_moments(state["deta_moments"])
+
+    num_channels = len(eta_moments["count"])
+
+    wave_statistics = summarize_waves(waves, num_channels)
+
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        t_z = 2 * np.pi * eta_moments["std"] / deta_moments["std"]
+
+    statistics = {"num_waves": wave_statistics["num_waves"],
+                  "H1/3": wave_statistics["H1/3"],
+                  "T1/3": wave_statistics["T1/3"],
+                  "Hs": 4 * eta_moments["std"],
+                  "Hrms": wave_statistics["Hrms"],
+                  "Hmax": wave_statistics["Hmax"],
+                  "Tm": wave_statistics["Tm"],
+                  "Tz": t_z
+    }
+
+    return statistics, waves
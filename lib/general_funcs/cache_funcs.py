@@ -0,0 +1,233 @@
+"""
+Functions for caching the arrays decoded from the BarSed mat files on disk.
+
+Each source file gets a folder in the cache with one .npy file per array and a
+manifest.json that records the source file's modification time, size and hash.
+The .npy files can be memory-mapped so reloading a run doesn't need to parse
+the mat file again.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+
+# Bump this when the layout of the cached arrays changes so old caches are rebuilt
+CACHE_VERSION = 2
+
+# Name of the file that describes a cache entry
+MANIFEST_NAME = "manifest.json"
+
+def get_cache_dir(cache_dir = None):
+    """
+    Get the root directory of the cache.
+    Order: the input cache_dir, the BARSED_CACHE_DIR environment variable, ~/.cache/barsed
+    """
+    if cache_dir is not None:
+        return cache_dir
+
+    env_cache_dir = os.environ.get("BARSED_CACHE_DIR")
+
+    if env_cache_dir:
+        return env_cache_dir
+
+    return os.path.join(os.path.expanduser("~"), ".cache", "barsed")
+
+def hash_file(file_path, chunk_size = 2**22):
+    """
+    Hash the contents of a file in chunks so large files don't have to fit in memory
+    """
+    file_hash = hashlib.blake2b(digest_size = 20)
+
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+def get_entry_dir(source_path, kind, cache_dir = None):
+    """
+    Get the cache folder of a source file.
+    kind separates the different data stored for the same file (eg. "wave", "adv", "pressure")
+    """
+    source_path = os.path.abspath(source_path)
+
+    # Use the name of the file so the cache is easy to look through and a hash
+    # of the full path so files with the same name in different folders don't collide
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    path_hash = hashlib.sha1(source_path.encode("utf-8")).hexdigest()[:12]
+
+    return os.path.join(get_cache_dir(cache_dir), kind, f"{stem}_{path_hash}")
+
+def _read_manifest(entry_dir):
+    """
+    Read the manifest of a cache entry, returns None if it doesn't exist or can't be read
+    """
+    manifest_path = os.path.join(entry_dir, MANIFEST_NAME)
+
+    try:
+        with open(manifest_path, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def _write_manifest(entry_dir, manifest):
+    """
+    Write the manifest of a cache entry
+    """
+    with open(os.path.join(entry_dir, MANIFEST_NAME), "w") as file:
+        json.dump(manifest, file, indent = 2)
+
+def get_valid_manifest(source_path, kind, cache_dir = None):
+    """
+    Returns the manifest of the cache entry if it matches the source file, otherwise None.
+
+    The modification time and size are checked first (cheap). If the modification time changed
+    but the size didn't the file is hashed and the entry is still used when the hash matches.
+    """
+    entry_dir = get_entry_dir(source_path, kind, cache_dir)
+    manifest  = _read_manifest(entry_dir)
+
+    if manifest is None or manifest.get("version") != CACHE_VERSION:
+        return None
+
+    source_stat = os.stat(source_path)
+
+    # Different size means different contents
+    if manifest["size"] != source_stat.st_size:
+        return None
+
+    # Unchanged modification time, trust the entry
+    if manifest["mtime_ns"] == source_stat.st_mtime_ns:
+        return manifest
+
+    # The file was touched, check if the contents actually changed
+    if manifest["hash"] != hash_file(source_path):
+        return None
+
+    # Same contents, store the new modification time so the file isn't hashed next time
+    manifest["mtime_ns"] = source_stat.st_mtime_ns
+
+    try:
+        _write_manifest(entry_dir, manifest)
+    except OSError:
+        # The entry is still valid even if the manifest can't be updated
+        pass
+
+    return manifest
+
+def write_cached_arrays(source_path, kind, arrays, cache_dir = None):
+    """
+    Store a dict of arrays decoded from source_path in the cache.
+    The entry is written to a temporary folder and then moved into place so other
+    processes never read a half written entry.
+    """
+    entry_dir = get_entry_dir(source_path, kind, cache_dir)
+    temp_dir  = f"{entry_dir}.tmp{os.getpid()}"
+
+    # Get the stats before hashing so a file modified while hashing looks stale
+    source_stat = os.stat(source_path)
+
+    os.makedirs(temp_dir, exist_ok = True)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(temp_dir, f"{name}.npy"), np.asarray(array), allow_pickle = False)
+
+    manifest = {"version": CACHE_VERSION,
+                "source": os.path.abspath(source_path),
+                "mtime_ns": source_stat.st_mtime_ns,
+                "size": source_stat.st_size,
+                "hash": hash_file(source_path),
+                "arrays": list(arrays.keys())
+    }
+
+    # Manifest is written last, an entry without one is never used
+    _write_manifest(temp_dir, manifest)
+
+    # Replace any old entry
+    shutil.rmtree(entry_dir, ignore_errors = True)
+
+    try:
+        os.rename(temp_dir, entry_dir)
+    except OSError:
+        # Another process wrote the entry first, theirs is just as good
+        shutil.rmtree(temp_dir, ignore_errors = True)
+
+    return manifest
+
+def read_cached_array(source_path, kind, name, cache_dir = None, mmap_mode = None):
+    """
+    Read a single array from a cache entry.
+    Doesn't check the entry, use get_valid_manifest or load_cached_arrays first.
+    """
+    array_path = os.path.join(get_entry_dir(source_path, kind, cache_dir), f"{name}.npy")
+
+    return np.load(array_path, mmap_mode = mmap_mode, allow_pickle = False)
+
+def load_cached_arrays(source_path, kind, decoder, cache_dir = None, mmap_mode = None,
+                       names = None, info = None):
+    """
+    Load the arrays of a source file from the cache, decoding and caching them first if needed.
+
+    Parameters:
+    - source_path: Path to the source (mat) file
+    - kind: Name of the type of data stored (eg. "wave")
+    - decoder: Function that takes source_path and returns a dict of arrays
+    - cache_dir: Root of the cache, see get_cache_dir
+    - mmap_mode: Passed to np.load, "r" memory-maps the arrays instead of reading them
+    - names: Only return these arrays (None returns all of them)
+    - info: Optional dict that gets "cached" (True if the entry was valid and nothing was
+            decoded) and "decoded_bytes" (size of the arrays decoded from the source, 0 on a hit)
+
+    Returns:
+    - dict of {name: array}
+    """
+    manifest = get_valid_manifest(source_path, kind, cache_dir)
+
+    if info is not None:
+        info["cached"] = manifest is not None
+        info["decoded_bytes"] = 0
+
+    if manifest is None:
+        # Decode the source file and store the result
+        arrays = decoder(source_path)
+
+        if info is not None:
+            info["decoded_bytes"] = int(sum(np.asarray(array).nbytes for array in arrays.values()))
+
+        try:
+            manifest = write_cached_arrays(source_path, kind, arrays, cache_dir)
+        except OSError:
+            # Not being able to write the cache shouldn't stop the data from loading
+            pass
+
+        # Swap the decoded arrays for memory-mapped ones so they can be freed
+        if manifest is not None and mmap_mode is not None:
+            del arrays
+            return load_cached_arrays(source_path, kind, decoder, cache_dir, mmap_mode, names)
+
+        if names is not None:
+            arrays = {name: arrays[name] for name in names}
+
+        return arrays
+
+    if names is None:
+        names = manifest["arrays"]
+
+    return {name: read_cached_array(source_path, kind, name, cache_dir, mmap_mode) for name in names}
+
+def clear_cache(kind = None, cache_dir = None):
+    """
+    Delete the cache, or only one kind of data if kind is given
+    """
+    cache_root = get_cache_dir(cache_dir)
+
+    if kind is not None:
+        cache_root = os.path.join(cache_root, kind)
+
+    shutil.rmtree(cache_root, ignore_errors = True)
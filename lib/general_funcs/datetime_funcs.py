@@ -8,11 +8,40 @@ Date: 07/03/2024
 """
 
 # Standard imports
+import sys
 from datetime import datetime, timedelta
+import numpy as np
 
-def matlab_datenum_to_datetime(matlab_datenums):
+# MATLAB datenum of the unix epoch (1970-01-01 00:00:00)
+MATLAB_UNIX_EPOCH = 719529
+
+# Number of nanoseconds in a day
+NS_PER_DAY = 86_400 * 10**9
+
+# Size of each of the supported rounding resolutions in nanoseconds
+RESOLUTION_NS = {"ns": 1,
+                 "us": 10**3,
+                 "ms": 10**6,
+                 "s" : 10**9
+}
+
+def matlab_datenum_to_datetime(matlab_datenums, as_list = False, resolution = "us"):
     """
     Convert an array of MATLAB datenum to Python datetime.
+
+    By default the fast vectorized conversion is used and a pandas.DatetimeIndex is returned.
+    as_list = True returns the original list of datetime.datetime objects (slow, one object per sample)
+    """
+
+    if as_list:
+        return matlab_datenum_to_datetime_list(matlab_datenums)
+
+    return matlab_datenum_to_datetime64(matlab_datenums, resolution = resolution, as_index = True)
+
+def matlab_datenum_to_datetime_list(matlab_datenums):
+    """
+    Convert an array of MATLAB datenum to a list of Python datetime.
+    Kept for compatibility with code that expects datetime.datetime objects
     """
     # MATLAB datenum's epoch starts at year 0000, while Python's datetime starts at year 0001.
     # There is a difference of 366 days because of MATLAB's usage of the year 0000 as a leap year.
@@ -20,5 +49,89 @@ def matlab_datenum_to_datetime(matlab_datenums):
 
     # Convert each datenum to a datetime object
     python_datetimes = [datetime.fromordinal(int(day)) + timedelta(days=day%1) - timedelta(days=1) for day in days]
-    
-    return python_datetimes
\ No newline at end of file
+
+    return python_datetimes
+
+def matlab_datenum_to_datetime64(matlab_datenums, resolution = "us", as_index = False):
+    """
+    Vectorized conversion of MATLAB datenums to numpy datetime64[ns].
+
+    Parameters:
+    - matlab_datenums: array of MATLAB datenums (any shape)
+    - resolution: resolution the times are rounded to ("ns", "us", "ms" or "s").
+                  A float64 datenum only resolves ~10 us so "us" is the default.
+    - as_index: If True return a (flattened) pandas.DatetimeIndex
+
+    Returns:
+    - datetime64[ns] array with the same shape as the input or a pandas.DatetimeIndex
+    """
+    if resolution not in RESOLUTION_NS:
+        raise ValueError(f"Resolution: {resolution} is not valid.\n"
+                         f"Valid resolutions are: {list(RESOLUTION_NS.keys())}")
+
+    # Number of nanoseconds to round to
+    step_ns = RESOLUTION_NS[resolution]
+
+    # Days since the unix epoch. Both values are of the same magnitude so the subtraction is exact
+    days = np.asarray(matlab_datenums, dtype = np.float64) - MATLAB_UNIX_EPOCH
+
+    # Split into whole days and the fraction of the day so the rounding is done
+    # on the small fractional part (keeps the sub-millisecond precision)
+    whole_days = np.floor(days)
+    frac_days  = days - whole_days
+
+    # Round the fraction of the day to the selected resolution
+    frac_ns = np.rint(frac_days * (NS_PER_DAY / step_ns)).astype(np.int64) * step_ns
+
+    # Total nanoseconds since the epoch
+    total_ns = whole_days.astype(np.int64) * NS_PER_DAY + frac_ns
+
+    date_time = total_ns.view("datetime64[ns]")
+
+    if as_index:
+        # Lazy import (see lib/__init__.py)
+        import pandas as pd
+
+        return pd.DatetimeIndex(date_time.ravel())
+
+    return date_time
+
+def to_datetime64(date_time):
+    """
+    Convert a DatetimeIndex, datetime64 array or list of datetime.datetime to a datetime64[ns] array
+    """
+    # Only a DatetimeIndex if pandas has been imported, this doesn't import it
+    pd = sys.modules.get("pandas")
+
+    if pd is not None and isinstance(date_time, pd.DatetimeIndex):
+        return date_time.values
+
+    return np.asarray(date_time, dtype = "datetime64[ns]")
+
+def calc_sample_period(date_time):
+    """
+    Calc the sample period (s) of a time series from the median time step
+    """
+    time_ns = to_datetime64(date_time).view(np.int64)
+
+    return float(np.median(np.diff(time_ns))) / 1e9
+
+def time_slice(date_time, start = None, end = None):
+    """
+    Get the slice of the samples in the time window [start, end) using a binary search
+    on the (sorted) times. start/end can be anything pandas.Timestamp accepts, None means
+    the start/end of the record.
+    """
+    # Lazy import (see lib/__init__.py)
+    import pandas as pd
+
+    time_ns = to_datetime64(date_time)
+
+    # to_datetime64 keeps the nanoseconds, np.datetime64(Timestamp) rounds to microseconds
+    start_index = 0 if start is None else \
+        int(np.searchsorted(time_ns, pd.Timestamp(start).to_datetime64().astype("datetime64[ns]"), side = "left"))
+
+    end_index = len(time_ns) if end is None else \
+        int(np.searchsorted(time_ns, pd.Timestamp(end).to_datetime64().astype("datetime64[ns]"), side = "left"))
+
+    return slice(start_index, max(start_index, end_index))
@@ -0,0 +1,161 @@
+"""
+Functions for splitting time series into the individual wave realizations (ensembles)
+and for ensemble averaging.
+
+The realizations are given by start and end indices, eg. the zero-upcrossings stored
+in PressureSensor.indices_start_end. Everything is done with array indexing so there
+are no per-realization python copies.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import numpy as np
+
+# Library imports
+from lib.general_funcs.datetime_funcs import to_datetime64
+
+def realization_indices_from_times(date_time, start_times, end_times):
+    """
+    Map the start and end times of the realizations onto the clock of another instrument
+
+    Parameters:
+    - date_time: Times of the instrument (sorted)
+    - start_times, end_times: Start and end time of each realization
+
+    Returns:
+    - start_indices, end_indices: Zero based indices, the end is exclusive
+    """
+    time_ns  = to_datetime64(date_time).view(np.int64)
+    start_ns = to_datetime64(start_times).view(np.int64)
+    end_ns   = to_datetime64(end_times).view(np.int64)
+
+    # First sample at or after the start of each realization
+    start_indices = np.searchsorted(time_ns, start_ns, side = "left")
+
+    # One past the last sample at or before the end of each realization
+    end_indices = np.searchsorted(time_ns, end_ns, side = "right")
+
+    return start_indices, end_indices
+
+def _check_indices(start_indices, end_indices, num_times):
+    """
+    Check the realization indices and return them as integer arrays
+    """
+    start_indices = np.asarray(start_indices, dtype = np.int64).ravel()
+    end_indices   = np.asarray(end_indices, dtype = np.int64).ravel()
+
+    if start_indices.shape != end_indices.shape:
+        raise ValueError("There must be the same number of start and end indices\n"
+                         f"Num start indices: {start_indices.size}\n"
+                         f"Num end indices: {end_indices.size}")
+
+    if np.any(start_indices < 0) or np.any(end_indices > num_times) or np.any(end_indices < start_indices):
+        raise IndexError(f"The realization indices must satisfy 0 <= start <= end <= {num_times}")
+
+    return start_indices, end_indices
+
+def split_realizations(data, start_indices, end_indices, axis = -1, num_samples = None,
+                       fill_value = np.nan):
+    """
+    Reshape a time series into a padded array of realizations.
+
+    Parameters:
+    - data: Array with time along axis, eg. (num_channels, num_times)
+    - start_indices, end_indices: Zero based index of the start and the (exclusive) end of each realization
+    - axis: Time axis of data
+    - num_samples: Number of samples stored per realization, defaults to the longest realization.
+                   Longer realizations are cut off
+    - fill_value: Value used to pad the shorter realizations
+
+    Returns:
+    - Array where the time axis is replaced by (num_realizations, num_samples),
+      eg. (num_channels, num_realizations, num_samples)
+    """
+    data = np.asarray(data)
+    axis = axis % data.ndim
+
+    start_indices, end_indices = _check_indices(start_indices, end_indices, data.shape[axis])
+
+    lengths = end_indices - start_indices
+
+    if num_samples is None:
+        num_samples = int(lengths.max()) if lengths.size else 0
+
+    # (num_realizations, num_samples) index of every sample
+    sample_indices = start_indices[:, None] + np.arange(num_samples)[None, :]
+    valid = np.arange(num_samples)[None, :] < lengths[:, None]
+
+    # Clip so the padding doesn't index past the end of the data
+    sample_indices = np.minimum(sample_indices, data.shape[axis] - 1)
+
+    # One gather for all of the realizations
+    realizations = np.take(data, sample_indices, axis = axis)
+
+    if not np.all(valid):
+        # Pad values need a dtype that can hold the fill value
+        if np.isnan(fill_value) and not np.issubdtype(realizations.dtype, np.inexact):
+            realizations = realizations.astype(float)
+
+        # Broadcast the mask over the other axes
+        mask_shape = [1] * realizations.ndim
+        mask_shape[axis]     = valid.shape[0]
+        mask_shape[axis + 1] = valid.shape[1]
+
+        realizations = np.where(valid.reshape(mask_shape), realizations, fill_value)
+
+    return realizations
+
+def split_realizations_ragged(data, start_indices, end_indices, axis = -1):
+    """
+    Split a time series into realizations without padding.
+
+    Returns:
+    - values: The samples of all of the realizations back to back along axis
+    - offsets: (num_realizations + 1,) realization i is values[..., offsets[i]:offsets[i + 1]]
+    """
+    data = np.asarray(data)
+    axis = axis % data.ndim
+
+    start_indices, end_indices = _check_indices(start_indices, end_indices, data.shape[axis])
+
+    lengths = end_indices - start_indices
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    # Index of every sample: the position in the output minus the offset of its
+    # realization plus the start of the realization
+    sample_indices = np.arange(offsets[-1]) + np.repeat(start_indices - offsets[:-1], lengths)
+
+    return np.take(data, sample_indices, axis = axis), offsets
+
+def ensemble_statistics(realizations, realization_axis = -2, ddof = 0):
+    """
+    Calc the ensemble (phase) average of the realizations. NaN padding is ignored
+
+    Parameters:
+    - realizations: Output of split_realizations eg. (num_channels, num_realizations, num_samples)
+    - realization_axis: Axis of the realizations
+    - ddof: Delta degrees of freedom of the variance
+
+    Returns:
+    - dict of "mean", "var" and "count" with the realization axis removed
+    """
+    realizations = np.asarray(realizations, dtype = float)
+
+    valid = np.isfinite(realizations)
+    count = np.sum(valid, axis = realization_axis)
+
+    # Zero the padding so it doesn't contribute to the sums
+    filled = np.where(valid, realizations, 0.0)
+
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        mean = np.sum(filled, axis = realization_axis) / count
+
+        deviation = np.where(valid, realizations - np.expand_dims(mean, realization_axis), 0.0)
+        var = np.sum(deviation**2, axis = realization_axis) / (count - ddof)
+
+    # Not enough realizations for a variance
+    var = np.where(count - ddof > 0, var, np.nan)
+
+    return {"mean": mean, "var": var, "count": count}
@@ -1,7 +1,19 @@
 """
 Functions for doing kimematic functions,
 acceleration, velocity, displacement, no forces
+
+Also has the linear wave theory kinematics: the dispersion relation and orbital velocities.
+Every function broadcasts so whole arrays of periods, depths and heights
+(eg. every sensor of every run) are calculated in one call.
 """
+# Standard imports
+import numpy as np
+
+# Library imports
+from lib.general_funcs.datetime_funcs import to_datetime64
+
+# Gravitational acceleration (m/s^2)
+GRAVITY = 9.81
 
 def calc_velocity(position, time):
     """
@@ -20,6 +32,125 @@ def calc_velocity(position, time):
     # return the velocity
     return velocity
 
+def _to_seconds(time):
+    """
+    Convert times (datetimes or seconds) to seconds since the first time
+    """
+    if len(time) > 0 and isinstance(time[0], (int, float, np.number)):
+        return np.asarray(time, dtype = float)
+
+    time_ns = to_datetime64(time).view(np.int64)
+
+    return (time_ns - time_ns[0]) / 1e9
+
+def calc_velocity_acceleration(position, time):
+    """
+    Calc the velocity and acceleration from a position time series with second order
+    central differences, the same length as the position
+
+    Parameters:
+    - position: (num_times,) position (m)
+    - time: (num_times,) datetimes or seconds
+
+    Returns:
+    - velocity (m/s), acceleration (m/s^2)
+    """
+    time = _to_seconds(time)
+    position = np.asarray(position, dtype = float)
+
+    velocity = np.gradient(position, time)
+    acceleration = np.gradient(velocity, time)
+
+    return velocity, acceleration
+
+def solve_dispersion(period, depth, tolerance = 1e-12, max_iterations = 20):
+    """
+    Solve the linear dispersion relation, omega^2 = g k tanh(k h), for the wavenumber.
+    Starts from the explicit approximation of Guo (2002) and refines it with Newton's method,
+    all of the values are iterated at the same time
+
+    Parameters:
+    - period: Wave period (s), scalar or array
+    - depth: Still water depth (m), scalar or array (broadcast with period)
+    - tolerance: Relative change in k to stop at
+    - max_iterations: Max number of Newton iterations
+
+    Returns:
+    - k: Wavenumber (rad/m), the broadcast shape of period and depth
+    """
+    omega = 2 * np.pi / np.asarray(period, dtype = float)
+    depth = np.asarray(depth, dtype = float)
+
+    omega, depth = np.broadcast_arrays(omega, depth)
+
+    # Explicit approximation, within ~0.75% everywhere
+    deep_kh = omega**2 * depth / GRAVITY
+    kh = deep_kh * (1 - np.exp(-(omega * np.sqrt(depth / GRAVITY))**2.5))**(-0.4)
+    k = kh / depth
+
+    for _ in range(max_iterations):
+        tanh_kh = np.tanh(k * depth)
+
+        # f(k) = g k tanh(kh) - omega^2
+        residual   = GRAVITY * k * tanh_kh - omega**2
+        derivative = GRAVITY * (tanh_kh + k * depth * (1 - tanh_kh**2))
+
+        step = residual / derivative
+        k = k - step
+
+        if np.all(np.abs(step) <= tolerance * np.abs(k)):
+            break
+
+    return k
+
+def calc_wave_length(period, depth):
+    """
+    Linear theory wave length (m)
+    """
+    return 2 * np.pi / solve_dispersion(period, depth)
+
+def calc_orbital_velocity_amplitude(height, period, depth, z):
+    """
+    Linear theory amplitude of the horizontal (u) and vertical (w) orbital velocity
+
+    Parameters:
+    - height: Wave height (m)
+    - period: Wave period (s)
+    - depth: Still water depth (m)
+    - z: Height above the bed (m), 0 at the bed and depth at the still water level
+
+    Returns:
+    - u_amplitude, w_amplitude (m/s), the broadcast shape of the inputs
+    """
+    k = solve_dispersion(period, depth)
+    omega = 2 * np.pi / np.asarray(period, dtype = float)
+
+    amplitude = 0.5 * np.asarray(height, dtype = float) * omega / np.sinh(k * depth)
+    z = np.asarray(z, dtype = float)
+
+    return amplitude * np.cosh(k * z), amplitude * np.sinh(k * z)
+
+def calc_orbital_velocity(height, period, depth, z, time, x = 0.0, phase = 0.0):
+    """
+    Linear theory orbital velocity time series, eta = H/2 cos(k x - omega t + phase)
+
+    Parameters:
+    - height, period, depth, z: See calc_orbital_velocity_amplitude, eg. (num_sensors, 1) arrays
+    - time: Seconds, broadcast against the other inputs eg. (num_times,)
+    - x: Cross-shore location (m)
+    - phase: Phase (rad)
+
+    Returns:
+    - u, w (m/s), the broadcast shape of the inputs eg. (num_sensors, num_times)
+    """
+    k = solve_dispersion(period, depth)
+    omega = 2 * np.pi / np.asarray(period, dtype = float)
+
+    u_amplitude, w_amplitude = calc_orbital_velocity_amplitude(height, period, depth, z)
+
+    wave_phase = k * x - omega * np.asarray(time, dtype = float) + phase
+
+    return u_amplitude * np.cos(wave_phase), w_amplitude * np.sin(wave_phase)
 
 if __name__ == "__main__":
     pass
\ No newline at end of file
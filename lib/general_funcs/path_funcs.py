@@ -2,6 +2,7 @@
 Functions for working or creating paths
 """
 import os
+import re
 
 def create_directory_if_not_exists(directory_path):
     """
@@ -14,4 +15,31 @@ def create_directory_if_not_exists(directory_path):
         os.makedirs(directory_path)
         print(f"Directory '{directory_path}' created.")
     else:
-        print(f"Directory '{directory_path}' already exists.")
\ No newline at end of file
+        print(f"Directory '{directory_path}' already exists.")
+
+def find_run_files(folder_path, pattern = r"^(RUN\d+)\.mat$"):
+    """
+    Find the run files (eg. RUN001.mat) in a folder.
+
+    Parameters:
+    folder_path (str): The folder to search.
+    pattern (str): Regex that matches the file name, the first group is used as the run id.
+
+    Returns:
+    dict: {run id: file path} sorted by run id. Empty if the folder doesn't exist.
+    """
+    run_files = {}
+
+    # Missing folders just don't have any runs
+    if folder_path is None or not os.path.isdir(folder_path):
+        return run_files
+
+    regex = re.compile(pattern, re.IGNORECASE)
+
+    for file_name in sorted(os.listdir(folder_path)):
+        match = regex.match(file_name)
+
+        if match:
+            run_files[match.group(1).upper()] = os.path.join(folder_path, file_name)
+
+    return run_files
@@ -0,0 +1,158 @@
+"""
+Plotting backend for the quick_plot functions.
+
+Long time series are decimated before they're drawn (min/max per pixel bin or LTTB) and
+datetimes are plotted as numeric matplotlib dates instead of lists of datetime objects.
+The line is decimated again from the full data when the x-limits change, so zooming in
+shows the full resolution.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import numpy as np
+
+# Library imports
+from lib.general_funcs.datetime_funcs import to_datetime64
+
+def to_plot_time(time):
+    """
+    Convert the times to numbers matplotlib can plot directly.
+    Datetimes become matplotlib date numbers (days), numbers are returned as floats
+
+    Returns:
+    - plot_time: float array
+    - is_date: True if the times were datetimes
+    """
+    # Lazy import (see lib/__init__.py)
+    import matplotlib.dates as mdates
+
+    if len(time) > 0 and not isinstance(time[0], (int, float, np.number)):
+        return mdates.date2num(to_datetime64(time)), True
+
+    return np.asarray(time, dtype = float), False
+
+def minmax_decimate(x, y, num_bins):
+    """
+    Keep the min and the max of y in each of num_bins bins of equal sample count
+    (plus the first and last points). The envelope of the line is kept exactly.
+
+    Returns:
+    - x, y of at most 2 * num_bins + 2 points
+    """
+    num_points = len(y)
+
+    if num_points <= 2 * num_bins + 2:
+        return x, y
+
+    bin_size = num_points // num_bins
+    num_binned = bin_size * num_bins
+
+    binned = y[:num_binned].reshape(num_bins, bin_size)
+
+    # NaNs shouldn't be picked unless the whole bin is NaN
+    nan_mask = np.isnan(binned)
+    max_index = np.argmax(np.where(nan_mask, -np.inf, binned), axis = 1)
+    min_index = np.argmin(np.where(nan_mask, np.inf, binned), axis = 1)
+
+    offsets = np.arange(num_bins) * bin_size
+
+    # Keep the points in time order
+    indices = np.concatenate(([0], offsets + min_index, offsets + max_index, [num_points - 1]))
+    indices = np.unique(indices)
+
+    return x[indices], y[indices]
+
+def lttb_decimate(x, y, num_out):
+    """
+    Largest-Triangle-Three-Buckets decimation, keeps the visual shape of the line with num_out points.
+    Each bucket depends on the point picked in the previous one so the buckets are looped over,
+    the work inside each bucket is vectorized.
+    """
+    num_points = len(y)
+
+    if num_out >= num_points or num_out < 3:
+        return x, y
+
+    # Bucket edges of the points between the first and the last
+    edges = np.linspace(1, num_points - 1, num_out - 1).astype(int)
+
+    indices = np.empty(num_out, dtype = int)
+    indices[0]  = 0
+    indices[-1] = num_points - 1
+
+    previous = 0
+
+    for i in range(num_out - 2):
+        start, stop = edges[i], edges[i + 1]
+
+        # Average of the next bucket (the last point for the last bucket)
+        next_stop = edges[i + 2] if i + 2 < len(edges) else num_points
+        next_x = np.mean(x[stop:next_stop]) if next_stop > stop else x[-1]
+        next_y = np.nanmean(y[stop:next_stop]) if next_stop > stop else y[-1]
+
+        # Area of the triangle from the previous point to each candidate to the next average
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous]) -
+                      (x[previous] - x[start:stop]) * (next_y - y[previous]))
+
+        previous = start + int(np.nanargmax(area)) if np.any(np.isfinite(area)) else start
+        indices[i + 1] = previous
+
+    return x[indices], y[indices]
+
+def _decimate(x, y, max_points, method):
+    """
+    Decimate with the selected method
+    """
+    if method == "minmax":
+        return minmax_decimate(x, y, max(max_points // 2, 1))
+    if method == "lttb":
+        return lttb_decimate(x, y, max_points)
+    if method is None:
+        return x, y
+
+    raise ValueError(f"method: {method} is not valid. Valid methods are: 'minmax', 'lttb' or None")
+
+def plot_decimated(ax, time, y, max_points = None, method = "minmax", **kwargs):
+    """
+    Plot a (long) time series on ax, decimated to about the number of pixels of the axes.
+    The line is decimated again from the full data when the x-limits change (zoom/pan).
+
+    Parameters:
+    - ax: matplotlib axes
+    - time: Times (datetimes or numbers)
+    - y: Values
+    - max_points: Number of points drawn, defaults to twice the axes width in pixels
+    - method: "minmax", "lttb" or None (no decimation)
+    - kwargs: Passed to ax.plot
+
+    Returns:
+    - The Line2D
+    """
+    x, is_date = to_plot_time(time)
+    y = np.asarray(y, dtype = float).ravel()
+
+    if max_points is None:
+        max_points = max(int(2 * ax.bbox.width), 200)
+
+    line, = ax.plot(*_decimate(x, y, max_points, method), **kwargs)
+
+    if is_date:
+        ax.xaxis_date()
+
+    def redecimate(ax):
+        """
+        Decimate the visible part of the full data
+        """
+        x_min, x_max = ax.get_xlim()
+
+        # Keep one point on each side so the line reaches the edges
+        start = max(np.searchsorted(x, x_min) - 1, 0)
+        stop  = min(np.searchsorted(x, x_max) + 1, len(x))
+
+        line.set_data(*_decimate(x[start:stop], y[start:stop], max_points, method))
+
+    ax.callbacks.connect("xlim_changed", redecimate)
+
+    return line
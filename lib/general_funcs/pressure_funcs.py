@@ -0,0 +1,176 @@
+"""
+Functions for reconstructing the water surface elevation from the pressure sensors.
+
+The dynamic pressure is converted with the linear theory pressure response factor
+Kp = cosh(k z) / cosh(k h) in the frequency domain: eta = IFFT( FFT(p) / Kp ). Frequencies
+above the cutoff are removed because 1 / Kp blows up (the signal there is noise), the
+correction is rolled off to 0 below the cutoff instead of cut so its impulse response is
+short and a record can be reconstructed in chunks.
+
+The wavenumbers of the FFT frequency bins are cached per (number of samples, sample period,
+depth) so the dispersion relation is only solved once for all of the chunks of a record
+and for runs with the same setup.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+from functools import lru_cache
+import numpy as np
+
+# Library imports
+from lib.general_funcs.kinematic_funcs import solve_dispersion
+from lib.general_funcs.signal_processing import iter_array_chunks, filter_chunks
+
+@lru_cache(maxsize = 256)
+def get_bin_wavenumbers(num_samples, sample_period, depth):
+    """
+    Wavenumber of each rfft frequency bin of a record, cached.
+    The zero frequency has k = 0
+
+    Returns:
+    - frequency: (num_freqs,) (Hz)
+    - k: (num_freqs,) (rad/m)
+    """
+    # Lazy import (see lib/__init__.py)
+    import scipy.fft
+
+    frequency = scipy.fft.rfftfreq(num_samples, d = sample_period)
+
+    k = np.zeros(frequency.shape)
+    k[1:] = solve_dispersion(1.0 / frequency[1:], depth)
+
+    # The arrays are shared so don't let them be modified
+    frequency.setflags(write = False)
+    k.setflags(write = False)
+
+    return frequency, k
+
+def calc_correction_factor(num_samples, sample_period, depth, sensor_height, cutoff, max_factor = None,
+                           taper = 0.2):
+    """
+    1 / Kp = cosh(k h) / cosh(k z) of each frequency bin, 0 above the cutoff frequency.
+    The factor is rolled off to 0 with a cosine over the top taper fraction of the kept band
+    so the correction's impulse response is short and chunks of a record line up
+    (see pressure_to_eta_chunked)
+
+    Parameters:
+    - depth: Still water depth (m)
+    - sensor_height: Height of the sensor above the bed (m)
+    - cutoff: Cutoff frequency (Hz)
+    - max_factor: Largest correction allowed, the bins from the first one with a larger
+                  correction on are removed
+    - taper: Fraction of the kept band that is rolled off (0 is a hard cutoff)
+    """
+    frequency, k = get_bin_wavenumbers(num_samples, float(sample_period), float(depth))
+
+    # cosh(k h) / cosh(k z) written with exponentials of negative numbers so the high
+    # frequency bins don't overflow to inf / inf
+    with np.errstate(over = "ignore"):
+        factor = (np.exp(k * (depth - sensor_height)) * (1 + np.exp(-2 * k * depth))
+                  / (1 + np.exp(-2 * k * sensor_height)))
+
+    keep = (frequency <= cutoff) & np.isfinite(factor)
+    if max_factor is not None:
+        keep &= factor <= max_factor
+
+    # The factor grows with frequency so the kept band ends at the first removed bin
+    num_kept = len(keep) if np.all(keep) else int(np.argmin(keep))
+    factor[num_kept:] = 0.0
+
+    if taper > 0 and num_kept > 1:
+        top_frequency = frequency[num_kept - 1]
+        taper_start = (1 - taper) * top_frequency
+
+        in_taper = frequency[:num_kept] > taper_start
+        phase = (frequency[:num_kept][in_taper] - taper_start) / (top_frequency - taper_start)
+        factor[:num_kept][in_taper] *= 0.5 * (1 + np.cos(np.pi * phase))
+
+    return factor
+
+def pressure_to_eta(pressure, sample_period, sensor_height, depth = None, cutoff = 1.0,
+                    max_factor = None, taper = 0.2, axis = -1):
+    """
+    Reconstruct the water surface elevation of every channel of a pressure array in one batch
+
+    Parameters:
+    - pressure: Pressure head (m) with time along axis eg. (num_sensors, num_times)
+    - sample_period: Sample period (s)
+    - sensor_height: Height of each sensor above the bed (m), scalar or (num_sensors,)
+    - depth: Still water depth of each sensor (m), defaults to the mean pressure + sensor height
+    - cutoff: Cutoff frequency (Hz)
+    - max_factor: Largest correction allowed (see calc_correction_factor)
+    - taper: Fraction of the kept band that is rolled off (see calc_correction_factor)
+    - axis: Time axis
+
+    Returns:
+    - eta: Same shape as the pressure, the mean (still water level) is removed
+    """
+    # Lazy import (see lib/__init__.py)
+    import scipy.fft
+
+    pressure = np.moveaxis(np.asarray(pressure, dtype = float), axis, -1)
+
+    channel_shape = pressure.shape[:-1]
+    num_samples = pressure.shape[-1]
+
+    mean_pressure = np.mean(pressure, axis = -1, keepdims = True)
+
+    sensor_height = np.broadcast_to(np.asarray(sensor_height, dtype = float), channel_shape)
+
+    if depth is None:
+        depth = mean_pressure[..., 0] + sensor_height
+
+    depth = np.broadcast_to(np.asarray(depth, dtype = float), channel_shape)
+
+    # Correction of each channel, channels with the same depth and height reuse the same factor
+    factors = np.empty(channel_shape + (num_samples // 2 + 1,))
+
+    for index in np.ndindex(channel_shape):
+        factors[index] = calc_correction_factor(num_samples, sample_period, depth[index],
+                                                sensor_height[index], cutoff, max_factor, taper)
+
+    # One FFT call for all of the channels
+    spectrum = scipy.fft.rfft(pressure - mean_pressure, axis = -1, workers = -1)
+    eta = scipy.fft.irfft(spectrum * factors, n = num_samples, axis = -1, workers = -1)
+
+    return np.moveaxis(eta, -1, axis)
+
+def pressure_to_eta_chunked(pressure, sample_period, sensor_height, depth = None, cutoff = 1.0,
+                            max_factor = None, chunk_size = 2**16, overlap = 2**12, taper = 0.2,
+                            axis = -1):
+    """
+    Same as pressure_to_eta for long records: the record is processed in chunks of chunk_size
+    samples with overlap samples of context on each side (see signal_processing.filter_chunks)
+    so the whole FFT doesn't have to be in memory. Works with memory-mapped arrays.
+
+    The depth is calculated from the whole record (if it isn't given) and the same mean is
+    removed from every chunk so the chunks line up. With the default taper the result
+    matches pressure_to_eta except within the correction's reach of the ends of the record,
+    where the whole record's FFT wraps the start and end onto each other.
+
+    Returns:
+    - eta: Same shape as the pressure
+    """
+    pressure = np.moveaxis(np.asarray(pressure), axis, -1)
+    channel_shape = pressure.shape[:-1]
+
+    mean_pressure = np.mean(pressure, axis = -1, keepdims = True)
+    sensor_height = np.broadcast_to(np.asarray(sensor_height, dtype = float), channel_shape)
+
+    if depth is None:
+        depth = mean_pressure[..., 0] + sensor_height
+
+    def reconstruct(chunk):
+        # Put back the record mean so each chunk's own mean removal doesn't shift it
+        chunk_mean = np.mean(chunk, axis = -1, keepdims = True)
+        return pressure_to_eta(chunk, sample_period, sensor_height, depth, cutoff,
+                               max_factor, taper) + chunk_mean - mean_pressure
+
+    eta_chunks = filter_chunks(iter_array_chunks(pressure, chunk_size, axis = -1), reconstruct,
+                               overlap, axis = -1)
+
+    eta = np.concatenate(list(eta_chunks), axis = -1)
+
+    return np.moveaxis(eta, -1, axis)
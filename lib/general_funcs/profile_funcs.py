@@ -0,0 +1,148 @@
+"""
+Functions for the opt-in instrumentation of loading and processing the data.
+
+A report is a plain dict so it can be written to JSON:
+    {"name": ..., "stages": [stage records], "events": [event records]}
+
+Stage records have the wall time, the peak memory allocated during the stage (tracemalloc)
+and any extra information the stage adds (eg. the bytes decoded). Events replace the prints
+of the loaders, they're only printed when verbose is on.
+
+Hooks are functions called with (kind, record), kind is "stage" or "event", so the
+records can be sent to another logging system as they happen.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Peak memory seen by each of the stages that are running, innermost last.
+# tracemalloc only has one peak so it's reset for each stage and the outer stages
+# keep the max of their nested stages
+_peak_stack = []
+
+def new_report(name):
+    """
+    Make an empty report
+    """
+    return {"name": name, "stages": [], "events": []}
+
+def _call_hooks(hooks, kind, record):
+    """
+    Send a record to the hooks
+    """
+    for hook in hooks:
+        hook(kind, record)
+
+@contextmanager
+def profile_stage(report, stage, hooks = (), track_memory = True):
+    """
+    Time a stage and record it in the report. Does nothing if the report is None.
+
+    Usage:
+        with profile_stage(report, "wave.decode") as info:
+            arrays = ...
+            info["decoded_bytes"] = sum(array.nbytes for array in arrays.values())
+
+    Parameters:
+    - report: Report dict (see new_report) or None
+    - stage: Name of the stage
+    - hooks: Functions called with ("stage", record) when the stage finishes
+    - track_memory: Record the peak allocated memory (starts tracemalloc if it isn't running)
+
+    Yields:
+    - dict the stage can add extra information to
+    """
+    info = {}
+
+    if report is None:
+        yield info
+        return
+
+    started_tracing = False
+
+    if track_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+
+        # Keep the outer stage's peak before the peak is reset for this stage
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        if _peak_stack:
+            _peak_stack[-1] = max(_peak_stack[-1], peak_memory)
+
+        tracemalloc.reset_peak()
+        _peak_stack.append(current_memory)
+
+    start = time.perf_counter()
+
+    try:
+        yield info
+    finally:
+        record = {"stage": stage, "wall_time_s": time.perf_counter() - start}
+
+        if track_memory:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            stage_peak = max(_peak_stack.pop(), peak_memory)
+
+            record["peak_memory_bytes"] = stage_peak - current_memory
+
+            # The outer stage's peak includes this stage's
+            if _peak_stack:
+                _peak_stack[-1] = max(_peak_stack[-1], stage_peak)
+
+            if started_tracing:
+                tracemalloc.stop()
+
+        record.update(info)
+
+        report["stages"].append(record)
+        _call_hooks(hooks, "stage", record)
+
+def emit_event(report, event, message, hooks = (), verbose = False, **data):
+    """
+    Record an event (eg. instruments were added), send it to the hooks and print
+    the message if verbose
+
+    Returns:
+    - The event record
+    """
+    record = {"event": event, "message": message, **data}
+
+    if report is not None:
+        report["events"].append(record)
+
+    _call_hooks(hooks, "event", record)
+
+    if verbose:
+        print(message)
+
+    return record
+
+def summarize_report(report):
+    """
+    Total wall time, peak memory and number of calls of each stage name
+    """
+    summary = {}
+
+    for record in report["stages"]:
+        stage_summary = summary.setdefault(record["stage"], {"calls": 0, "wall_time_s": 0.0,
+                                                             "peak_memory_bytes": 0})
+        stage_summary["calls"] += 1
+        stage_summary["wall_time_s"] += record["wall_time_s"]
+        stage_summary["peak_memory_bytes"] = max(stage_summary["peak_memory_bytes"],
+                                                 record.get("peak_memory_bytes", 0))
+
+    return summary
+
+def save_report(report, file_path):
+    """
+    Write a report to a JSON file
+    """
+    with open(file_path, "w") as file:
+        json.dump(report, file, indent = 2, default = str)
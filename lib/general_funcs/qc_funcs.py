@@ -0,0 +1,288 @@
+"""
+Functions for the quality control (QC) of the instrument data.
+
+Every check works on a whole (num_channels, num_times) matrix at once and returns a
+boolean mask of the same shape (True is a bad sample):
+    * Spikes: phase-space thresholding for the ADVs (Goring and Nikora 2002, with the
+              robust MAD estimate of the standard deviations from Wahl 2003), jumps in the
+              first difference for the wave gauges and pressure sensors
+    * Flatlines: runs of (nearly) constant values eg. dropouts of the ultrasonic wave gauges
+    * Gaps: NaN or inf samples
+
+The masks are packed 8 samples per byte (see pack_mask) when they're stored.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import numpy as np
+
+# Library imports
+from lib.general_funcs.signal_processing import fill_masked
+
+# Scale of the median absolute deviation to the standard deviation of normal data
+MAD_SCALE = 1.4826
+
+# Names of the QC flags, "bad" is any of the other flags
+QC_FLAGS = ["spike", "flatline", "gap"]
+
+def _as_channels(data):
+    """
+    Convert data to a (num_channels, num_times) float array
+    """
+    data = np.asarray(data, dtype = float)
+
+    return np.atleast_2d(data).reshape(-1, data.shape[-1])
+
+def robust_std(data, axis = -1, keepdims = False):
+    """
+    Standard deviation estimated from the median absolute deviation (NaNs are skipped)
+    """
+    median = np.nanmedian(data, axis = axis, keepdims = True)
+    mad = np.nanmedian(np.abs(data - median), axis = axis, keepdims = keepdims)
+
+    return MAD_SCALE * mad
+
+def _ellipse_radius(x, y, a, b, theta = 0.0):
+    """
+    Normalized radius of the points (x, y) in the ellipse with semi-axes a, b rotated
+    by theta, greater than 1 outside the ellipse
+    """
+    cos_theta = np.cos(theta)
+    sin_theta = np.sin(theta)
+
+    x_rotated =  x * cos_theta + y * sin_theta
+    y_rotated = -x * sin_theta + y * cos_theta
+
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        return np.sqrt((x_rotated / a)**2 + (y_rotated / b)**2)
+
+def _is_local_max(values, half_width):
+    """
+    Check if each value is the largest within half_width samples along the time axis
+    """
+    padded = np.pad(values, ((0, 0), (half_width, half_width)), constant_values = -np.inf)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * half_width + 1, axis = 1)
+
+    return values >= np.max(windows, axis = -1)
+
+def phase_space_despike(velocity, max_iterations = 20, robust = True):
+    """
+    Find the spikes of every channel with the phase-space thresholding method.
+    The velocity, its first and its second difference of each sample are checked against
+    ellipses with axes of the universal threshold sqrt(2 ln n) times their standard
+    deviations. The spikes are replaced by interpolation and the check is repeated until
+    no new spikes are found (or max_iterations)
+
+    Parameters:
+    - velocity: (num_channels, num_times) eg. ADVArray.vel["u"]
+    - max_iterations: Most passes
+    - robust: Estimate the standard deviations from the MAD instead of the std
+
+    Returns:
+    - (num_channels, num_times) bool, True at the spikes (NaNs aren't spikes, see detect_gaps)
+    """
+    data = _as_channels(velocity)
+    finite = np.isfinite(data)
+
+    spikes = np.zeros(data.shape, dtype = bool)
+
+    # Universal threshold of each channel
+    num_good = np.maximum(np.sum(finite, axis = 1, keepdims = True), 2)
+    threshold = np.sqrt(2 * np.log(num_good))
+
+    std_function = robust_std if robust else \
+        (lambda values, axis, keepdims: np.nanstd(values, axis = axis, keepdims = keepdims))
+
+    for _ in range(max_iterations):
+        u = fill_masked(data, spikes)
+        u = u - np.nanmedian(u, axis = 1, keepdims = True)
+
+        du  = np.gradient(u, axis = 1)
+        d2u = np.gradient(du, axis = 1)
+
+        std_u   = std_function(u, axis = 1, keepdims = True)
+        std_du  = std_function(du, axis = 1, keepdims = True)
+        std_d2u = std_function(d2u, axis = 1, keepdims = True)
+
+        # Rotation of the principal axis of u vs d2u
+        theta = np.arctan2(np.nansum(u * d2u, axis = 1, keepdims = True),
+                           np.nansum(u**2, axis = 1, keepdims = True))
+
+        # Axes of the rotated ellipse from its projections on u and d2u
+        cos_squared = np.cos(theta)**2
+        sin_squared = np.sin(theta)**2
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            a_squared = (((threshold * std_u)**2 * cos_squared - (threshold * std_d2u)**2 * sin_squared)
+                         / (cos_squared - sin_squared))
+            b_squared = (((threshold * std_d2u)**2 * cos_squared - (threshold * std_u)**2 * sin_squared)
+                         / (cos_squared - sin_squared))
+
+        radius = np.fmax.reduce([_ellipse_radius(u, du, threshold * std_u, threshold * std_du),
+                                 _ellipse_radius(du, d2u, threshold * std_du, threshold * std_d2u),
+                                 _ellipse_radius(u, d2u, np.sqrt(np.abs(a_squared)),
+                                                 np.sqrt(np.abs(b_squared)), theta)])
+
+        # A spike also throws its neighbors' differences out of the ellipses so only the
+        # worst sample within 2 samples is taken each pass, the next pass finds the rest
+        new_spikes = (radius > 1) & _is_local_max(np.nan_to_num(radius, nan = -np.inf), 2) & finite & ~spikes
+
+        if not np.any(new_spikes):
+            break
+
+        spikes |= new_spikes
+
+    return spikes
+
+def detect_spikes(data, threshold = 6.0):
+    """
+    Find single sample spikes: a jump in and a jump back out of a sample that are both
+    larger than threshold times the robust std of the first difference of the channel
+
+    Returns:
+    - (num_channels, num_times) bool
+    """
+    data = _as_channels(data)
+
+    difference = np.diff(data, axis = 1)
+    limit = threshold * robust_std(difference, axis = 1, keepdims = True)
+
+    with np.errstate(invalid = "ignore"):
+        # Flat channels have a limit of 0, don't flag every change
+        jump = (np.abs(difference) > limit) & (limit > 0)
+
+    spikes = np.zeros(data.shape, dtype = bool)
+    spikes[:, 1:-1] = jump[:, :-1] & jump[:, 1:] & (np.sign(difference[:, :-1]) != np.sign(difference[:, 1:]))
+
+    return spikes
+
+def detect_flatlines(data, min_samples, tolerance = 0.0):
+    """
+    Find the runs of at least min_samples samples where the value doesn't change by
+    more than tolerance from one sample to the next
+
+    Returns:
+    - (num_channels, num_times) bool
+    """
+    data = _as_channels(data)
+    num_channels, num_times = data.shape
+
+    with np.errstate(invalid = "ignore"):
+        constant = np.abs(np.diff(data, axis = 1)) <= tolerance
+
+    # Start and (exclusive) end of each run of constant differences, sorted by channel then time
+    padded = np.zeros((num_channels, num_times + 1), dtype = np.int8)
+    padded[:, 1:-1] = constant
+    edges = np.diff(padded, axis = 1)
+
+    start_channel, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+
+    # A run of n constant differences covers n + 1 samples
+    is_flat = ends - starts + 1 >= min_samples
+
+    # Mark the samples of the flat runs with a cumulative sum of +1 at the starts and -1 after the ends
+    marks = np.zeros((num_channels, num_times + 1), dtype = np.int32)
+    np.add.at(marks, (start_channel[is_flat], starts[is_flat]), 1)
+    np.add.at(marks, (start_channel[is_flat], ends[is_flat] + 1), -1)
+
+    return np.cumsum(marks, axis = 1)[:, :-1] > 0
+
+def detect_gaps(data):
+    """
+    Find the missing (NaN or inf) samples
+
+    Returns:
+    - (num_channels, num_times) bool
+    """
+    return ~np.isfinite(_as_channels(data))
+
+def find_time_gaps(time_ns, factor = 1.5):
+    """
+    Find the gaps in a clock: time steps longer than factor times the median time step
+
+    Parameters:
+    - time_ns: datetime64[ns] times (see datetime_funcs.to_datetime64)
+
+    Returns:
+    - index: Index of the first sample after each gap
+    - duration: Length of each gap (s)
+    """
+    time_step = np.diff(np.asarray(time_ns).view(np.int64))
+
+    if time_step.size == 0:
+        return np.empty(0, dtype = int), np.empty(0)
+
+    gap = np.flatnonzero(time_step > factor * np.median(time_step))
+
+    return gap + 1, time_step[gap] / 1e9
+
+def qc_channels(data, sample_period, despike = False, spike_threshold = 6.0, flatline_duration = 1.0,
+                flatline_tolerance = 0.0, max_iterations = 20):
+    """
+    Run all of the checks on a (num_channels, num_times) matrix
+
+    Parameters:
+    - sample_period: Time between samples (s)
+    - despike: Use phase-space despiking (ADVs) instead of detect_spikes
+    - spike_threshold: Threshold of detect_spikes (robust stds of the first difference)
+    - flatline_duration: Shortest flatline (s)
+    - flatline_tolerance: Largest change between samples of a flatline
+    - max_iterations: Passes of phase_space_despike
+
+    Returns:
+    - dict of (num_channels, num_times) bool masks: "spike", "flatline", "gap" and "bad" (any of them)
+    """
+    data = _as_channels(data)
+
+    if despike:
+        spike = phase_space_despike(data, max_iterations = max_iterations)
+    else:
+        spike = detect_spikes(data, threshold = spike_threshold)
+
+    min_samples = max(int(round(flatline_duration / sample_period)), 2)
+
+    masks = {"spike": spike,
+             "flatline": detect_flatlines(data, min_samples, tolerance = flatline_tolerance),
+             "gap": detect_gaps(data)
+    }
+
+    masks["bad"] = masks["spike"] | masks["flatline"] | masks["gap"]
+
+    return masks
+
+def summarize_masks(masks, channel_names):
+    """
+    Number of flagged samples of each channel
+
+    Returns:
+    - dict of (num_channels,) arrays: num_samples, the count of each flag and percent_bad
+    """
+    num_samples = masks["bad"].shape[-1]
+
+    summary = {"channel": list(channel_names),
+               "num_samples": np.full(masks["bad"].shape[0], num_samples)}
+
+    for flag in QC_FLAGS + ["bad"]:
+        summary[flag] = np.sum(masks[flag], axis = -1)
+
+    summary["percent_bad"] = 100 * summary["bad"] / max(num_samples, 1)
+
+    return summary
+
+def pack_mask(mask):
+    """
+    Pack a bool mask 8 samples per byte along the time axis
+    """
+    mask = np.asarray(mask, dtype = bool)
+
+    return {"bits": np.packbits(mask, axis = -1), "shape": mask.shape}
+
+def unpack_mask(packed_mask):
+    """
+    Unpack a mask packed by pack_mask
+    """
+    shape = packed_mask["shape"]
+
+    return np.unpackbits(packed_mask["bits"], axis = -1, count = shape[-1]).astype(bool).reshape(shape)
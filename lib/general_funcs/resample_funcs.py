@@ -0,0 +1,151 @@
+"""
+Functions for aligning instruments sampled on different clocks onto a common time base.
+
+The interpolation is split into building an index map (which source samples and weights
+make each target sample) and applying it, so the map can be cached per (source, target)
+clock pair and applied to all of the channels of an instrument at once.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import numpy as np
+
+# Library imports
+from lib.general_funcs.datetime_funcs import to_datetime64, calc_sample_period
+from lib.general_funcs.signal_processing import butterworth_filter, moving_average_filter, fill_masked
+
+def get_clock_key(date_time):
+    """
+    Cheap key that identifies a clock: (number of samples, first time, last time) in ns
+    """
+    time_ns = to_datetime64(date_time).view(np.int64)
+
+    if time_ns.size == 0:
+        return (0, None, None)
+
+    return (time_ns.size, int(time_ns[0]), int(time_ns[-1]))
+
+def get_interpolation_map(source_time, target_time, method = "linear"):
+    """
+    Build the map from the source samples to the target times
+
+    Parameters:
+    - source_time, target_time: Sorted times
+    - method: "linear" or "nearest"
+
+    Returns:
+    - dict with "index" (left/nearest source index of each target sample), "weight"
+      (weight of the right sample, linear only) and "valid" (target inside the source record)
+    """
+    source_ns = to_datetime64(source_time).view(np.int64)
+    target_ns = to_datetime64(target_time).view(np.int64)
+
+    # Work in seconds from the start of the source so the floats keep their precision
+    origin = source_ns[0]
+    source_s = (source_ns - origin) / 1e9
+    target_s = (target_ns - origin) / 1e9
+
+    valid = (target_s >= source_s[0]) & (target_s <= source_s[-1])
+
+    # Index of the source sample at or before each target time
+    left = np.clip(np.searchsorted(source_s, target_s, side = "right") - 1, 0, source_s.size - 2)
+
+    dt = source_s[left + 1] - source_s[left]
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        weight = np.where(dt > 0, (target_s - source_s[left]) / dt, 0.0)
+
+    weight = np.clip(weight, 0.0, 1.0)
+
+    if method == "linear":
+        return {"method": method, "index": left, "weight": weight, "valid": valid}
+
+    if method == "nearest":
+        nearest = left + (weight >= 0.5)
+        return {"method": method, "index": nearest, "weight": None, "valid": valid}
+
+    raise ValueError(f"method: {method} is not valid. Valid methods are: 'linear' or 'nearest'")
+
+def apply_interpolation_map(data, interpolation_map, axis = -1):
+    """
+    Interpolate all of the channels of data with an interpolation map.
+    Target times outside of the source record are NaN
+
+    Returns:
+    - data's shape with the time axis replaced by the number of target times
+    """
+    data = np.moveaxis(np.asarray(data, dtype = float), axis, -1)
+
+    index = interpolation_map["index"]
+
+    if interpolation_map["method"] == "linear":
+        weight = interpolation_map["weight"]
+        resampled = data[..., index] * (1 - weight) + data[..., index + 1] * weight
+    else:
+        resampled = data[..., index]
+
+    resampled = np.where(interpolation_map["valid"], resampled, np.nan)
+
+    return np.moveaxis(resampled, -1, axis)
+
+def anti_alias_filter(data, source_period, target_period, method = "butter", axis = -1):
+    """
+    Low pass the data before it's resampled to a longer sample period.
+    Nothing is done if the target is sampled as fast as (or faster than) the source
+
+    Parameters:
+    - method: "butter" (zero-phase Butterworth at 0.45 * the target sample frequency)
+              or "mean" (moving average over one target sample period)
+    """
+    if target_period <= source_period * 1.0001:
+        return data
+
+    if method == "butter":
+        return butterworth_filter(data, 0.45 / target_period, 1.0 / source_period, btype = "low", axis = axis)
+
+    if method == "mean":
+        window_size = int(round(target_period / source_period))
+        return moving_average_filter(data, window_size, axis = axis, mode = "same")
+
+    raise ValueError(f"method: {method} is not valid. Valid methods are: 'butter' or 'mean'")
+
+def resample_channels(data, source_time, target_time, method = "linear", anti_alias = "butter",
+                      interpolation_map = None, axis = -1):
+    """
+    Resample (num_channels, num_times) data from source_time onto target_time in one call
+
+    Gaps (NaNs) in the source are linearly filled before the anti-alias filter so they
+    don't spread through the filtered channel. The target samples interpolated from a gap
+    are set back to NaN afterwards so only the gap itself is missing in the output.
+
+    Parameters:
+    - anti_alias: Anti-alias method (see anti_alias_filter) or None
+    - interpolation_map: Precomputed map (see get_interpolation_map)
+    """
+    if interpolation_map is None:
+        interpolation_map = get_interpolation_map(source_time, target_time, method)
+
+    gaps = None
+
+    if anti_alias is not None:
+        data = np.moveaxis(np.asarray(data, dtype = float), axis, -1)
+        gaps = ~np.isfinite(data)
+
+        if np.any(gaps):
+            data = fill_masked(data, gaps).reshape(data.shape)
+        else:
+            gaps = None
+
+        data = anti_alias_filter(data, calc_sample_period(source_time), calc_sample_period(target_time),
+                                 method = anti_alias, axis = -1)
+        data = np.moveaxis(data, -1, axis)
+
+    resampled = apply_interpolation_map(data, interpolation_map, axis = axis)
+
+    if gaps is not None:
+        # Target samples with any weight on a gap sample
+        in_gap = apply_interpolation_map(gaps.astype(float), interpolation_map, axis = -1) > 0
+        resampled = np.where(np.moveaxis(in_gap, -1, axis), np.nan, resampled)
+
+    return resampled
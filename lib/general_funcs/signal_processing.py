@@ -1,30 +1,234 @@
 import numpy as np
 
-def moving_average_filter(data, window_size):
+def _moving_sum(data, window_size, axis):
+    """
+    Sum of every window_size consecutive samples along axis using a cumulative sum, O(n)
+    Returns the 'valid' part (length n - window_size + 1)
+    """
+    cumulative_sum = np.cumsum(data, axis = axis)
+
+    # Pad a zero at the start so window i is cumsum[i + window_size] - cumsum[i]
+    pad_width = [(0, 0)] * data.ndim
+    pad_width[axis] = (1, 0)
+    cumulative_sum = np.pad(cumulative_sum, pad_width)
+
+    upper = np.take(cumulative_sum, np.arange(window_size, cumulative_sum.shape[axis]), axis = axis)
+    lower = np.take(cumulative_sum, np.arange(0, cumulative_sum.shape[axis] - window_size), axis = axis)
+
+    return upper - lower
+
+def moving_average_filter(data, window_size, axis = 0, mode = "same"):
     """
     Applies a moving average filter to the input data.
+    Uses a cumulative sum so the cost doesn't depend on the window size.
+    NaNs are skipped: each window is the mean of its finite samples and windows
+    without any finite samples are NaN.
 
     Parameters:
-    - data: The input array of data points (list or numpy array).
+    - data: The input array of data points (list or numpy array), eg. (time, gauge).
     - window_size: The size of the moving window.
+    - axis: The time axis of the data.
+    - mode: 'same' (default) returns the same length as the input, the window is centered
+            and shrinks at the ends.
+            'valid' only returns the points where the window fits (length n - window_size + 1),
+            this was the output of the old np.convolve filter.
 
     Returns:
     - filtered_data: The filtered data as a numpy array.
     """
     # Convert data to a numpy array if it is not already
-    data = np.array(data)
-    
+    data = np.asarray(data, dtype = float)
+
     # Ensure the window size is an integer
     window_size = int(window_size)
-    
-    # Check if window size is greater than 0 and less than or equal to the length of data
-    if window_size <= 0 or window_size > len(data):
+
+    num_times = data.shape[axis]
+
+    # Check if window size is greater than 0 and (for 'valid') less than or equal to the length of data
+    if window_size <= 0 or (mode == "valid" and window_size > num_times):
         raise ValueError("Window size must be greater than 0 and less than or equal to the length of the data.")
-    
-    # Compute the moving average using np.convolve with 'valid' mode to avoid padding effects
-    filtered_data = np.convolve(data, np.ones(window_size)/window_size, mode='valid')
-    
-    return filtered_data
+
+    if mode not in ["valid", "same"]:
+        raise ValueError(f"mode: {mode} is not valid. Valid modes are: 'valid' or 'same'")
+
+    finite = np.isfinite(data)
+
+    # Remove the mean so the cumulative sum doesn't lose precision on long records.
+    # The NaNs are summed as 0 and left out of the count of each window
+    count = finite.astype(float)
+    data  = np.where(finite, data, 0.0)
+
+    offset = np.sum(data, axis = axis, keepdims = True) / np.maximum(np.sum(count, axis = axis, keepdims = True), 1)
+    data = np.where(finite, data - offset, 0.0)
+
+    if mode == "same":
+        # Centered window of [i - half_before, i + half_after]. Pad with zeros (that aren't
+        # counted) so the ends are averaged over the samples that exist
+        pad_width = [(0, 0)] * data.ndim
+        pad_width[axis] = ((window_size - 1) // 2, window_size // 2)
+
+        data  = np.pad(data, pad_width)
+        count = np.pad(count, pad_width)
+
+    window_sum   = _moving_sum(data, window_size, axis)
+    window_count = _moving_sum(count, window_size, axis)
+
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        # Rounding of the cumulative sum can leave a tiny count in windows without samples
+        return np.where(window_count > 0.5, window_sum / window_count, np.nan) + offset
+
+def butterworth_filter(data, cutoff, sample_frequency, btype = "low", order = 4, axis = 0):
+    """
+    Zero-phase Butterworth filter (forward-backward, second order sections).
+
+    Parameters:
+    - data: Input array eg. (time, gauge)
+    - cutoff: Cutoff frequency (Hz), [low, high] for btype = 'band' or 'bandstop'
+    - sample_frequency: Sample frequency (Hz)
+    - btype: 'low', 'high', 'band' or 'bandstop'
+    - order: Order of the filter (the effective order is doubled by the forward-backward pass)
+    - axis: The time axis of the data
+
+    Returns:
+    - filtered_data: Same shape as the input
+    """
+    # Lazy import (see lib/__init__.py)
+    import scipy.signal
+
+    sos = scipy.signal.butter(order, cutoff, btype = btype, fs = sample_frequency, output = "sos")
+
+    return scipy.signal.sosfiltfilt(sos, np.asarray(data, dtype = float), axis = axis)
+
+def detrend(data, axis = 0, type = "linear"):
+    """
+    Remove the linear trend ('linear') or the mean ('constant') along the time axis
+    """
+    # Lazy import (see lib/__init__.py)
+    import scipy.signal
+
+    return scipy.signal.detrend(np.asarray(data, dtype = float), axis = axis, type = type)
+
+def fill_masked(data, mask):
+    """
+    Replace the masked samples of each channel by linearly interpolating between the
+    nearest good samples of the same channel (the nearest good sample at the ends).
+    Channels without any good samples are NaN
+
+    Parameters:
+    - data: (num_channels, num_times)
+    - mask: Same shape as data, True where the sample is replaced
+
+    Returns:
+    - (num_channels, num_times) filled copy
+    """
+    data = np.asarray(data, dtype = float)
+    data = np.atleast_2d(data).reshape(-1, data.shape[-1])
+    good = ~np.asarray(mask, dtype = bool).reshape(data.shape) & np.isfinite(data)
+
+    num_times = data.shape[1]
+    index = np.arange(num_times)
+
+    # Index of the previous and next good sample of every sample, -1/num_times if there isn't one
+    previous_good = np.maximum.accumulate(np.where(good, index, -1), axis = 1)
+    next_good = np.minimum.accumulate(np.where(good, index, num_times)[:, ::-1], axis = 1)[:, ::-1]
+
+    # Use the nearest good sample at the ends
+    has_previous = previous_good >= 0
+    has_next     = next_good < num_times
+
+    previous_good = np.where(has_previous, previous_good, next_good)
+    next_good     = np.where(has_next, next_good, previous_good)
+
+    no_good = ~has_previous & ~has_next
+    previous_good[no_good] = 0
+    next_good[no_good] = 0
+
+    rows = np.arange(data.shape[0])[:, None]
+    previous_value = data[rows, previous_good]
+    next_value     = data[rows, next_good]
+
+    span = next_good - previous_good
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        weight = np.where(span > 0, (index - previous_good) / span, 0.0)
+
+    filled = np.where(good, data, previous_value + weight * (next_value - previous_value))
+    filled[no_good] = np.nan
+
+    return filled
+
+def iter_array_chunks(data, chunk_size, axis = 0):
+    """
+    Loop over an array in chunks of chunk_size samples along axis.
+    The chunks are views so a memory-mapped array is only read one chunk at a time.
+    """
+    num_times = data.shape[axis]
+
+    for start in range(0, num_times, chunk_size):
+        index = [slice(None)] * data.ndim
+        index[axis] = slice(start, min(start + chunk_size, num_times))
+
+        yield data[tuple(index)]
+
+def filter_chunks(chunks, filter_function, overlap, axis = 0):
+    """
+    Apply a filter to a record that arrives in chunks (streaming mode) so multi-hour
+    records don't have to be loaded at once.
+
+    Each output sample is filtered with at least `overlap` samples of context on both
+    sides, so the result matches filtering the whole record when overlap covers the
+    filter's reach (eg. window_size // 2 for moving_average_filter(mode = 'same')).
+    The output is delayed by `overlap` samples and has the same total length as the input.
+
+    Parameters:
+    - chunks: Iterable of arrays, eg. iter_array_chunks(run.wave_gauge_wse, 10000)
+    - filter_function: Function that takes an array and returns the filtered array of the
+                       same length eg. lambda x: butterworth_filter(x, 0.05, 20, "high")
+    - overlap: Samples of context on each side
+    - axis: The time axis of the chunks
+
+    Yields:
+    - Filtered chunks
+    """
+    overlap = int(overlap)
+
+    # Raw samples before the pending samples (left context) and samples waiting for
+    # enough right context
+    left = None
+    pending = None
+
+    def take(array, start, stop):
+        index = [slice(None)] * array.ndim
+        index[axis] = slice(start, stop)
+        return array[tuple(index)]
+
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype = float)
+
+        pending = chunk if pending is None else np.concatenate((pending, chunk), axis = axis)
+
+        # Only emit the samples that have overlap samples after them
+        num_emit = pending.shape[axis] - overlap
+
+        if num_emit <= 0:
+            continue
+
+        num_left = 0 if left is None else left.shape[axis]
+        buffer = pending if left is None else np.concatenate((left, pending), axis = axis)
+
+        filtered = filter_function(buffer)
+
+        yield take(filtered, num_left, num_left + num_emit)
+
+        # The last overlap samples of what was emitted become the left context
+        left = take(buffer, max(num_left + num_emit - overlap, 0), num_left + num_emit)
+        pending = take(pending, num_emit, None)
+
+    # Flush the end of the record
+    if pending is not None and pending.shape[axis] > 0:
+        num_left = 0 if left is None else left.shape[axis]
+        buffer = pending if left is None else np.concatenate((left, pending), axis = axis)
+
+        yield take(filter_function(buffer), num_left, None)
 
 if __name__ == "__main__":
-    pass
\ No newline at end of file
+    pass
@@ -0,0 +1,149 @@
+"""
+Functions for interpolating the water surface elevation measured along the flume onto
+a regular cross-shore (x) grid.
+
+The first node (the face of the wave maker) moves so the grid points between the wave
+maker and the first wave gauge are interpolated with weights calculated for each time.
+The weights of the grid points between the wave gauges don't change so they're
+calculated once and applied to a chunk of times in one vectorized call.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import numpy as np
+
+def get_gauge_weights(gauge_x, x_grid):
+    """
+    Linear interpolation weights of the grid points between the (fixed) wave gauges
+
+    Parameters:
+    - gauge_x: (num_wave_gauges,) x-location of the wave gauges, in any order
+    - x_grid: (num_grid,) x-locations to interpolate to
+
+    Returns:
+    - dict with:
+        * order: sorts the wave gauges by x
+        * grid_index: indices of the grid points between the first and last gauge
+        * left: sorted gauge index left of each of those grid points
+        * weight: weight of the gauge right of each of those grid points
+        * front_index: indices of the grid points in front of the first gauge (wave maker side)
+    """
+    gauge_x = np.asarray(gauge_x, dtype = float)
+    x_grid  = np.asarray(x_grid, dtype = float)
+
+    order = np.argsort(gauge_x)
+    sorted_x = gauge_x[order]
+
+    between = (x_grid >= sorted_x[0]) & (x_grid <= sorted_x[-1])
+    grid_index = np.flatnonzero(between)
+
+    # Index of the gauge at or before each grid point, the last gauge uses the last interval
+    left = np.clip(np.searchsorted(sorted_x, x_grid[grid_index], side = "right") - 1,
+                   0, len(sorted_x) - 2)
+
+    weight = (x_grid[grid_index] - sorted_x[left]) / (sorted_x[left + 1] - sorted_x[left])
+
+    return {"order": order,
+            "grid_index": grid_index,
+            "left": left,
+            "weight": weight,
+            "front_index": np.flatnonzero(x_grid < sorted_x[0])
+    }
+
+def _grid_chunk(flume_wse, wave_maker_position, gauge_x, x_grid, weights, out):
+    """
+    Interpolate one chunk of times into out, (chunk_times, num_grid)
+    """
+    # Wave gauges sorted by x
+    gauge_eta = flume_wse[:, 1:][:, weights["order"]]
+
+    out[:] = np.nan
+
+    # Fixed wave gauges, the same weights for every time
+    left, weight = weights["left"], weights["weight"]
+    out[:, weights["grid_index"]] = gauge_eta[:, left] * (1 - weight) + gauge_eta[:, left + 1] * weight
+
+    # Between the moving wave maker and the first wave gauge, the weights change with time
+    front_index = weights["front_index"]
+
+    if front_index.size > 0:
+        first_x = gauge_x[weights["order"][0]]
+        x_front = x_grid[front_index]
+
+        eta_wm = flume_wse[:, :1]
+        position = np.asarray(wave_maker_position, dtype = float)[:, None]
+
+        with np.errstate(invalid = "ignore", divide = "ignore"):
+            front_weight = (x_front - position) / (first_x - position)
+
+        front_eta = eta_wm + (gauge_eta[:, :1] - eta_wm) * front_weight
+
+        # Behind the face of the wave maker there's no water
+        out[:, front_index] = np.where(x_front >= position, front_eta, np.nan)
+
+    return out
+
+def iter_gridded_wse(flume_wse, wave_maker_position, gauge_x, x_grid, chunk_size = 10000):
+    """
+    Interpolate the flume water surface elevation onto x_grid one chunk of times at a time,
+    so the memory used doesn't depend on the length of the record
+
+    Parameters:
+    - flume_wse: (num_times, num_wave_gauges + 1) eta, column 0 is the wave maker (Run.flume_wse)
+    - wave_maker_position: (num_times,) x-location of the face of the wave maker
+    - gauge_x: (num_wave_gauges,) x-location of the wave gauges
+    - x_grid: (num_grid,) x-locations to interpolate to
+    - chunk_size: Number of times in each chunk
+
+    Yields:
+    - (start index, (chunk_times, num_grid) eta), NaN behind the wave maker and past the last gauge
+    """
+    gauge_x = np.asarray(gauge_x, dtype = float)
+    x_grid  = np.asarray(x_grid, dtype = float)
+
+    weights = get_gauge_weights(gauge_x, x_grid)
+
+    num_times = len(flume_wse)
+
+    for start in range(0, num_times, chunk_size):
+        stop = min(start + chunk_size, num_times)
+
+        out = np.empty((stop - start, len(x_grid)))
+
+        yield start, _grid_chunk(flume_wse[start:stop], wave_maker_position[start:stop],
+                                 gauge_x, x_grid, weights, out)
+
+def grid_flume_wse(flume_wse, wave_maker_position, gauge_x, x_grid, chunk_size = 10000, out = None):
+    """
+    Interpolate the flume water surface elevation onto x_grid for every time,
+    processed in chunks of times (see iter_gridded_wse)
+
+    Parameters:
+    - out: (num_times, num_grid) array to write into eg. a np.memmap for long records,
+           a new array is made if it's None
+
+    Returns:
+    - (num_times, num_grid) eta
+    """
+    gauge_x = np.asarray(gauge_x, dtype = float)
+    x_grid  = np.asarray(x_grid, dtype = float)
+
+    num_times = len(flume_wse)
+
+    if out is None:
+        out = np.empty((num_times, len(x_grid)))
+    elif out.shape != (num_times, len(x_grid)):
+        raise ValueError(f"out has shape {out.shape}, it needs to be {(num_times, len(x_grid))}")
+
+    weights = get_gauge_weights(gauge_x, x_grid)
+
+    for start in range(0, num_times, chunk_size):
+        stop = min(start + chunk_size, num_times)
+
+        # Write straight into out, no temporary chunk array
+        _grid_chunk(flume_wse[start:stop], wave_maker_position[start:stop],
+                    gauge_x, x_grid, weights, out[start:stop])
+
+    return out
@@ -0,0 +1,186 @@
+"""
+Functions for batched spectral analysis (Welch PSD) and spectral wave parameters.
+
+The PSD of every channel of a (num_channels, num_times) array is calculated in one
+call: the segments of all of the channels are framed as a strided view and
+transformed with a single FFT call. The window arrays are cached so they're reused
+across channels and runs.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+from functools import lru_cache
+import numpy as np
+
+# Default number of samples per Welch segment
+DEFAULT_NPERSEG = 4096
+
+@lru_cache(maxsize = 32)
+def get_window_array(window, nperseg):
+    """
+    Get a window array, cached so each (window, nperseg) is only built once
+    """
+    # Lazy import (see lib/__init__.py)
+    import scipy.signal
+
+    window_array = scipy.signal.get_window(window, nperseg)
+
+    # The array is shared so don't let it be modified
+    window_array.setflags(write = False)
+
+    return window_array
+
+def welch_psd(data, sample_frequency, nperseg = DEFAULT_NPERSEG, noverlap = None,
+              window = "hann", axis = -1, detrend = True):
+    """
+    One-sided power spectral density of every channel using Welch's method.
+
+    Parameters:
+    - data: Array with time along axis eg. (num_channels, num_times)
+    - sample_frequency: Sample frequency (Hz)
+    - nperseg: Samples per segment, limited to the length of the data
+    - noverlap: Samples the segments overlap, defaults to nperseg // 2
+    - window: Window name passed to scipy.signal.get_window
+    - axis: Time axis of data
+    - detrend: Remove the mean of each segment
+
+    Returns:
+    - frequency: (num_freqs,) frequencies (Hz)
+    - psd: data's shape with the time axis replaced by num_freqs (units^2/Hz)
+    """
+    data = np.moveaxis(np.asarray(data, dtype = float), axis, -1)
+
+    nperseg = int(min(nperseg, data.shape[-1]))
+
+    if noverlap is None:
+        noverlap = nperseg // 2
+
+    power, num_segments = welch_segment_power(data, nperseg, noverlap, window = window, detrend = detrend)
+
+    frequency, psd = scale_welch_power(power, num_segments, sample_frequency, nperseg, window = window)
+
+    return frequency, np.moveaxis(psd, -1, axis)
+
+def welch_segment_power(data, nperseg, noverlap, window = "hann", detrend = True):
+    """
+    Sum of the windowed |FFT|^2 of the Welch segments of (..., num_times) data.
+    The segments start at multiples of nperseg - noverlap, samples after the last
+    full segment aren't used
+
+    Returns:
+    - power: (..., nperseg // 2 + 1) sum over the segments
+    - num_segments: Number of segments
+    """
+    # Lazy import (see lib/__init__.py)
+    import scipy.fft
+
+    if not 0 <= noverlap < nperseg:
+        raise ValueError("noverlap must be greater than or equal to 0 and less than nperseg")
+
+    step = nperseg - noverlap
+
+    # (..., num_segments, nperseg) view of the segments, nothing is copied
+    segments = np.lib.stride_tricks.sliding_window_view(data, nperseg, axis = -1)[..., ::step, :]
+
+    if detrend:
+        segments = segments - segments.mean(axis = -1, keepdims = True)
+
+    window_array = get_window_array(window, nperseg)
+
+    # One FFT call for all of the segments of all of the channels
+    spectrum = scipy.fft.rfft(segments * window_array, axis = -1, workers = -1)
+
+    return np.sum(np.abs(spectrum)**2, axis = -2), segments.shape[-2]
+
+def scale_welch_power(power, num_segments, sample_frequency, nperseg, window = "hann"):
+    """
+    Convert the summed segment power (see welch_segment_power) to the one-sided PSD
+
+    Returns:
+    - frequency: (num_freqs,) frequencies (Hz)
+    - psd: (..., num_freqs) (units^2/Hz)
+    """
+    # Lazy import (see lib/__init__.py)
+    import scipy.fft
+
+    window_array = get_window_array(window, nperseg)
+
+    # Mean over the segments with density scaling
+    scale = 1.0 / (sample_frequency * np.sum(window_array**2))
+    psd = power / num_segments * scale
+
+    # One sided, double everything but the zero and Nyquist frequencies
+    if nperseg % 2 == 0:
+        psd[..., 1:-1] *= 2
+    else:
+        psd[..., 1:] *= 2
+
+    frequency = scipy.fft.rfftfreq(nperseg, d = 1.0 / sample_frequency)
+
+    return frequency, psd
+
+def calc_spectral_moment(frequency, psd, order, f_min = None, f_max = None, axis = -1):
+    """
+    Calc the spectral moment m_n = integral( f^n S(f) df ) between f_min and f_max
+    """
+    frequency = np.asarray(frequency, dtype = float)
+    psd = np.moveaxis(np.asarray(psd, dtype = float), axis, -1)
+
+    # Select the frequency band, the zero frequency is skipped for negative orders
+    in_band = np.ones(frequency.shape, dtype = bool)
+
+    if f_min is not None:
+        in_band &= frequency >= f_min
+    if f_max is not None:
+        in_band &= frequency <= f_max
+    if order < 0:
+        in_band &= frequency > 0
+
+    band_frequency = frequency[in_band]
+    integrand = psd[..., in_band] * band_frequency**order
+
+    # Trapezoid rule
+    df = np.diff(band_frequency)
+
+    return np.sum(0.5 * (integrand[..., 1:] + integrand[..., :-1]) * df, axis = -1)
+
+def calc_spectral_parameters(frequency, psd, f_min = None, f_max = None, axis = -1):
+    """
+    Calc the spectral wave parameters of every channel
+
+    Returns:
+    - dict of arrays with the frequency axis removed:
+        * Hm0: 4 * sqrt(m0)
+        * Tp: peak period, 1 / frequency of the largest PSD value
+        * Tm-1,0: energy period, m-1 / m0
+        * Tm01: m0 / m1
+        * Tm02: sqrt(m0 / m2)
+    """
+    frequency = np.asarray(frequency, dtype = float)
+    psd = np.moveaxis(np.asarray(psd, dtype = float), axis, -1)
+
+    m_minus_1 = calc_spectral_moment(frequency, psd, -1, f_min, f_max)
+    m0 = calc_spectral_moment(frequency, psd, 0, f_min, f_max)
+    m1 = calc_spectral_moment(frequency, psd, 1, f_min, f_max)
+    m2 = calc_spectral_moment(frequency, psd, 2, f_min, f_max)
+
+    # Peak of the spectrum inside the band
+    in_band = frequency > 0
+
+    if f_min is not None:
+        in_band &= frequency >= f_min
+    if f_max is not None:
+        in_band &= frequency <= f_max
+
+    band_frequency = frequency[in_band]
+    peak_frequency = band_frequency[np.argmax(psd[..., in_band], axis = -1)]
+
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        return {"Hm0": 4 * np.sqrt(m0),
+                "Tp": 1.0 / peak_frequency,
+                "Tm-1,0": m_minus_1 / m0,
+                "Tm01": m0 / m1,
+                "Tm02": np.sqrt(m0 / m2)
+        }
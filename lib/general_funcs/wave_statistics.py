@@ -0,0 +1,197 @@
+"""
+Zero-crossing wave statistics.
+
+All of the channels (eg. the 17 wave gauges) are analyzed in one call using array
+operations, there are no per-wave python loops.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import numpy as np
+
+def _find_crossings(data, kind):
+    """
+    Find the zero crossings of (num_channels, num_times) data
+
+    Returns:
+    - channel, sample: Channel and index of the sample before each crossing,
+                       sorted by channel then time
+    - crossing_time: Interpolated time of each crossing in samples
+    """
+    above = data >= 0
+
+    if kind == "up":
+        crossing = ~above[:, :-1] & above[:, 1:]
+    elif kind == "down":
+        crossing = above[:, :-1] & ~above[:, 1:]
+    else:
+        raise ValueError(f"kind: {kind} is not valid. Valid values are: 'up' or 'down'")
+
+    # NaNs compare as False so don't let them create crossings
+    finite = np.isfinite(data)
+    crossing &= finite[:, :-1] & finite[:, 1:]
+
+    # Row major order so the crossings are sorted by channel then time
+    channel, sample = np.nonzero(crossing)
+
+    # Linearly interpolate the time the crossing happened between the samples
+    before = data[channel, sample]
+    after  = data[channel, sample + 1]
+    crossing_time = sample + before / (before - after)
+
+    return channel, sample, crossing_time
+
+def zero_crossing_analysis(eta, sample_period, kind = "up", axis = 0, remove_mean = True):
+    """
+    Find the individual waves of each channel using the zero-upcrossing or
+    zero-downcrossing method.
+
+    Parameters:
+    - eta: Surface elevations eg. Run.wave_gauge_wse (num_times, num_channels)
+    - sample_period: Time between samples (s)
+    - kind: "up" or "down" crossing
+    - axis: Time axis of eta
+    - remove_mean: Subtract the mean of each channel before finding the crossings
+
+    Returns:
+    - dict of per-wave arrays: "channel", "start_time" (s), "period" (s), "height",
+      "crest" and "trough" (m)
+    """
+    # (num_channels, num_times)
+    data = np.moveaxis(np.asarray(eta, dtype = float), axis, -1)
+    data = np.atleast_2d(data).reshape(-1, data.shape[-1])
+
+    if remove_mean:
+        data = data - np.nanmean(data, axis = 1, keepdims = True)
+
+    num_times = data.shape[1]
+
+    channel, sample, crossing_time = _find_crossings(data, kind)
+
+    # A wave goes from one crossing to the next one on the same channel
+    is_wave = channel[1:] == channel[:-1]
+
+    # The samples of wave k are [sample[k] + 1, sample[k + 1]]. Take the max and min of
+    # every segment between crossings at once with reduceat on the flattened data.
+    # A trailing NaN is added so the end index of the last segment is valid
+    flat_data  = np.append(data.ravel(), np.nan)
+    flat_start = channel * num_times + sample + 1
+
+    if flat_start.size > 0:
+        crest  = np.fmax.reduceat(flat_data, flat_start)[:-1][is_wave]
+        trough = np.fmin.reduceat(flat_data, flat_start)[:-1][is_wave]
+    else:
+        crest = trough = np.empty(0)
+
+    return {"channel": channel[:-1][is_wave],
+            "start_time": crossing_time[:-1][is_wave] * sample_period,
+            "period": np.diff(crossing_time)[is_wave] * sample_period,
+            "height": crest - trough,
+            "crest": crest,
+            "trough": trough
+    }
+
+def calc_wave_statistics(eta, sample_period, kind = "up", axis = 0, remove_mean = True):
+    """
+    Calc the wave statistics of each channel
+
+    Returns:
+    - statistics: dict of (num_channels,) arrays
+        * num_waves
+        * H1/3: mean height of the highest third of the waves, T1/3 their mean period
+        * Hs: significant wave height from the variance, 4 * std(eta)
+        * Hrms: root mean square wave height
+        * Hmax: largest wave height
+        * Tm: mean wave period of the individual waves
+        * Tz: mean zero-crossing period from the variance of eta and its time derivative,
+              2 * pi * std(eta) / std(d eta / dt)
+    - waves: per-wave arrays (see zero_crossing_analysis)
+    """
+    data = np.moveaxis(np.asarray(eta, dtype = float), axis, -1)
+    data = np.atleast_2d(data).reshape(-1, data.shape[-1])
+
+    num_channels = data.shape[0]
+
+    waves = zero_crossing_analysis(data, sample_period, kind = kind, axis = -1,
+                                   remove_mean = remove_mean)
+
+    wave_statistics = summarize_waves(waves, num_channels)
+
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        # Variance based values
+        std_eta  = np.nanstd(data, axis = 1)
+        std_deta = np.nanstd(np.gradient(data, sample_period, axis = 1), axis = 1)
+
+        t_z = 2 * np.pi * std_eta / std_deta
+
+    statistics = {"num_waves": wave_statistics["num_waves"],
+                  "H1/3": wave_statistics["H1/3"],
+                  "T1/3": wave_statistics["T1/3"],
+                  "Hs": 4 * std_eta,
+                  "Hrms": wave_statistics["Hrms"],
+                  "Hmax": wave_statistics["Hmax"],
+                  "Tm": wave_statistics["Tm"],
+                  "Tz": t_z
+    }
+
+    return statistics, waves
+
+def summarize_waves(waves, num_channels):
+    """
+    Calc the statistics of the individual waves of each channel (see zero_crossing_analysis)
+
+    Returns:
+    - dict of (num_channels,) arrays: num_waves, H1/3, T1/3, Hrms, Hmax and Tm
+    """
+    channel = waves["channel"]
+    height  = waves["height"]
+    period  = waves["period"]
+
+    num_waves = np.bincount(channel, minlength = num_channels)
+
+    with np.errstate(invalid = "ignore", divide = "ignore"):
+        h_rms = np.sqrt(np.bincount(channel, height**2, minlength = num_channels) / num_waves)
+        t_m   = np.bincount(channel, period, minlength = num_channels) / num_waves
+
+        # Sort the waves by channel and then from the highest to the lowest
+        order = np.lexsort((-height, channel))
+
+        # Rank of each wave inside its channel
+        first_wave = np.concatenate(([0], np.cumsum(num_waves)[:-1]))
+        rank = np.arange(order.size) - first_wave[channel[order]]
+
+        # Keep the highest third of each channel
+        num_third = np.maximum(num_waves // 3, 1)
+        in_third  = rank < num_third[channel[order]]
+
+        third_channel = channel[order][in_third]
+        num_in_third  = np.bincount(third_channel, minlength = num_channels)
+
+        h_third = np.bincount(third_channel, height[order][in_third], minlength = num_channels) / num_in_third
+        t_third = np.bincount(third_channel, period[order][in_third], minlength = num_channels) / num_in_third
+
+        # Largest wave of each channel
+        h_max = np.full(num_channels, np.nan)
+        np.fmax.at(h_max, channel, height)
+
+    return {"num_waves": num_waves,
+            "H1/3": h_third,
+            "T1/3": t_third,
+            "Hrms": h_rms,
+            "Hmax": h_max,
+            "Tm": t_m
+    }
+
+def compare_periods(wave_periods, period_realization):
+    """
+    Compare the mean period of the zero-crossing waves with the periods of the
+    wave realizations measured by a pressure gauge (PressureSensor.period_realization)
+
+    Returns:
+    - Percent difference of the mean periods, same shape as wave_periods
+    """
+    mean_realization_period = np.nanmean(np.asarray(period_realization, dtype = float))
+
+    return (np.asarray(wave_periods) - mean_realization_period) / mean_realization_period * 100
@@ -0,0 +1,247 @@
+"""
+Functions for writing the inputs of a 1D non-hydrostatic xBeach model of a BarSed run.
+
+The model of a run is written to its own folder:
+    * x.grd, y.grd, bed.dep: Cross-shore grid and bed level (the Bathymetry's flume profile
+                             with the sand pit at the run's initial bed level)
+    * boun_U.bcf: Time series boundary forcing (wbctype = ts_nonh), from the wave maker
+                  (paddle velocity and eta_wm) or the first wave gauge
+    * params.txt: Model settings, the wave gauges are the point output locations
+
+The boundary file is written in chunks of times so long runs aren't formatted in memory at once.
+With block_duration the forcing is also calculated one time block of the run at a time
+(see Run.iter_blocks) so the whole record is never in memory.
+
+Author: WaveHello
+
+Date: 10/17/2026
+"""
+# Standard imports
+import os
+import numpy as np
+
+# Library imports
+from lib.general_funcs.datetime_funcs import to_datetime64, time_slice
+from lib.general_funcs.kinematic_funcs import GRAVITY
+from lib.data_classes.Bathymetry import Bathymetry
+
+def make_x_grid(bathy_x, dx, x_start = None, x_end = None):
+    """
+    Uniform cross-shore grid with spacing dx, defaults to the extent of the bathymetry
+    """
+    x_start = np.min(bathy_x) if x_start is None else x_start
+    x_end   = np.max(bathy_x) if x_end is None else x_end
+
+    num_cells = int(np.ceil((x_end - x_start) / dx))
+
+    return x_start + dx * np.arange(num_cells + 1)
+
+def write_grid_files(output_dir, x_grid, bed_level):
+    """
+    Write the 1D grid (x.grd, y.grd) and the bed level (bed.dep, positive up so posdwn = -1)
+    """
+    # 1D model, one row of ny + 1 = 1 grid points
+    np.savetxt(os.path.join(output_dir, "x.grd"), np.atleast_2d(x_grid), fmt = "%.4f")
+    np.savetxt(os.path.join(output_dir, "y.grd"), np.zeros((1, len(x_grid))), fmt = "%.4f")
+    np.savetxt(os.path.join(output_dir, "bed.dep"), np.atleast_2d(bed_level), fmt = "%.4f")
+
+def get_boundary_forcing(run, forcing = "wave_maker", boundary_depth = None, time_origin = None):
+    """
+    Get the time series forcing at the offshore boundary
+
+    Parameters:
+    - run: Run with the wave data loaded
+    - forcing:
+        * "wave_maker": velocity of the paddle (d position / dt) and eta_wm
+        * "gauge": eta of the first wave gauge, the velocity is the shallow water
+                   estimate U = eta * sqrt(g / h)
+    - boundary_depth: Still water depth (m) at the boundary, needed for "gauge"
+    - time_origin: Time the seconds are counted from, defaults to the first time of the run
+
+    Returns:
+    - time: (num_times,) seconds since the start of the run
+    - U: (num_times,) depth averaged velocity (m/s)
+    - Z: (num_times,) water surface elevation (m)
+    """
+    time_ns = to_datetime64(run.date_time).view(np.int64)
+
+    if time_origin is None:
+        origin_ns = time_ns[0]
+    else:
+        origin_ns = to_datetime64([time_origin]).view(np.int64)[0]
+
+    time = (time_ns - origin_ns) / 1e9
+
+    if forcing == "wave_maker":
+        Z = np.asarray(run.wave_maker.eta_wm, dtype = float)
+        U = run.wave_maker.calc_velocity()
+
+    elif forcing == "gauge":
+        if boundary_depth is None:
+            raise ValueError("boundary_depth is needed to estimate the velocity from the gauge data")
+
+        Z = np.asarray(run.wave_gauges[0].eta, dtype = float)
+        U = Z * np.sqrt(GRAVITY / boundary_depth)
+
+    else:
+        raise ValueError(f"forcing: {forcing} is not valid. Valid forcings are: 'wave_maker' or 'gauge'")
+
+    return time, U, Z
+
+def write_boundary_file(file_path, time, U, Z, chunk_size = 100000):
+    """
+    Write the ts_nonh boundary file (boun_U.bcf) in chunks of chunk_size times.
+    The forcing is uniform along the (1D) boundary so it's a scalar file of t, U and Z
+    """
+    chunks = ((time[start:start + chunk_size], U[start:start + chunk_size], Z[start:start + chunk_size])
+              for start in range(0, len(time), chunk_size))
+
+    write_boundary_blocks(file_path, chunks)
+
+def write_boundary_blocks(file_path, blocks):
+    """
+    Write the boundary file from an iterable of (time, U, Z) blocks
+
+    Returns:
+    - time: (2,) first two times written, used for the output interval
+    - end_time: Last time written
+    """
+    first_times = []
+    end_time = 0.0
+
+    with open(file_path, "w") as file:
+        file.write("scalar\n")
+        file.write("t U Z\n")
+
+        for time, U, Z in blocks:
+            if len(time) == 0:
+                continue
+
+            np.savetxt(file, np.column_stack((time, U, Z)), fmt = "%.4f %.6f %.6f")
+
+            first_times = (list(first_times) + list(time[:2]))[:2]
+            end_time = time[-1]
+
+    return np.asarray(first_times), end_time
+
+def iter_boundary_blocks(run, block_duration, forcing = "wave_maker", boundary_depth = None):
+    """
+    Calculate the boundary forcing one time block of the run at a time (see get_boundary_forcing).
+    The windows have a sample of overlap on each side so the paddle velocity (np.gradient)
+    at the ends of the blocks is the same as for the whole record
+
+    Yields:
+    - (time, U, Z) of each block
+    """
+    time_ns = to_datetime64(run.date_time)
+
+    if len(time_ns) == 0:
+        return
+
+    overlap = 2 * (time_ns[-1] - time_ns[0]) / max(len(time_ns) - 1, 1)
+
+    for block_start, block_end, run_window in run.iter_blocks(block_duration, overlap = overlap):
+        time, U, Z = get_boundary_forcing(run_window, forcing, boundary_depth, time_origin = time_ns[0])
+
+        block_slice = time_slice(run_window.date_time, block_start, block_end)
+
+        yield time[block_slice], U[block_slice], Z[block_slice]
+
+def write_params_file(file_path, params, output_points = None, point_variables = ["zs"]):
+    """
+    Write params.txt
+
+    Parameters:
+    - params: {keyword: value} of the model settings
+    - output_points: (num_points, 2) x, y of the point output locations
+    - point_variables: Variables written at the output points
+    """
+    with open(file_path, "w") as file:
+        for keyword, value in params.items():
+            file.write(f"{keyword:<12}= {value}\n")
+
+        if output_points is not None and len(output_points) > 0:
+            file.write(f"\n{'npoints':<12}= {len(output_points)}\n")
+            for x, y in output_points:
+                file.write(f"{x:.4f} {y:.4f}\n")
+
+            file.write(f"{'npointvar':<12}= {len(point_variables)}\n")
+            for variable in point_variables:
+                file.write(f"{variable}\n")
+
+def export_run(run, bathymetry, output_dir, water_level, dx = 0.5, site = None, forcing = "wave_maker",
+               chunk_size = 100000, block_duration = None, extra_params = None):
+    """
+    Write the xBeach model of a run
+
+    Parameters:
+    - run: Run with the wave data loaded
+    - bathymetry: Bathymetry or the path to bathy.mat
+    - output_dir: Folder the model is written to (made if it doesn't exist)
+    - water_level: Still water level (zs0) of the run in the bathymetry's z
+    - dx: Grid spacing (m)
+    - site: Site whose initial bed level is used over the sand pit (see Bathymetry.run_bed_elevation),
+            None uses the mean of the sites. Only used if the Bathymetry has bed levels
+    - forcing: Boundary forcing (see get_boundary_forcing)
+    - chunk_size: Number of times written at a time to the boundary file
+    - block_duration: Calculate the forcing one block of this many seconds at a time
+                      (see iter_boundary_blocks), None does the whole record at once
+    - extra_params: {keyword: value} added to (or replacing) the params.txt settings
+
+    Returns:
+    - output_dir
+    """
+    os.makedirs(output_dir, exist_ok = True)
+
+    if not isinstance(bathymetry, Bathymetry):
+        bathymetry = Bathymetry.load(bathy_file_path = bathymetry)
+
+    # Grid and the bed level of the run
+    x_grid = make_x_grid(bathymetry.x, dx)
+    bed_level = bathymetry.run_bed_elevation(x_grid, run.id, site)
+
+    write_grid_files(output_dir, x_grid, bed_level)
+
+    # Boundary forcing
+    boundary_depth = water_level - bed_level[0]
+    boundary_path = os.path.join(output_dir, "boun_U.bcf")
+
+    if block_duration is None:
+        time, U, Z = get_boundary_forcing(run, forcing, boundary_depth)
+
+        write_boundary_file(boundary_path, time, U, Z, chunk_size = chunk_size)
+
+        end_time = time[-1]
+    else:
+        time, end_time = write_boundary_blocks(boundary_path,
+                                               iter_boundary_blocks(run, block_duration, forcing, boundary_depth))
+
+    # Wave gauges are the output points, the model is 1D so y = 0
+    run.get_wave_gauge_locations()
+    output_points = np.column_stack((run.wg_locations["x_loc"], np.zeros(len(run.wg_locations))))
+
+    sample_period = time[1] - time[0] if len(time) > 1 else 1.0
+
+    params = {"nx": len(x_grid) - 1,
+              "ny": 0,
+              "vardx": 1,
+              "xfile": "x.grd",
+              "yfile": "y.grd",
+              "depfile": "bed.dep",
+              "posdwn": -1,
+              "nonh": 1,
+              "zs0": f"{water_level:.4f}",
+              "wbctype": "ts_nonh",
+              "front": "nonh_1d",
+              "back": "wall",
+              "tstart": 0,
+              "tstop": f"{end_time:.4f}",
+              "tintp": f"{sample_period:.4f}",
+    }
+
+    if extra_params is not None:
+        params.update(extra_params)
+
+    write_params_file(os.path.join(output_dir, "params.txt"), params, output_points)
+
+    return output_dir